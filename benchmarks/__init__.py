@@ -0,0 +1,6 @@
+"""
+Benchmarks for the WeCare Inventory System.
+
+Run the full suite from the project root with:
+    python -m benchmarks.run_benchmarks
+"""
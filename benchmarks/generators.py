@@ -0,0 +1,108 @@
+"""
+Synthetic data generators for benchmarks.
+
+All generators are seeded so runs with the same arguments produce the same
+catalog and order streams and their results can be compared.
+"""
+import random
+from src.product_manager import HEADER_ROW, format_product_row
+
+BRANDS = ["Garnier", "Cetaphil", "Aqualogica", "Nivea", "L'Oréal", "Neutrogena", "Olay", "Dove",
+          "Himalaya", "Lakme", "Plum", "Minimalist", "CeraVe", "The Ordinary", "Biotique", "Mamaearth"]
+COUNTRIES = ["India", "France", "USA", "Germany", "Switzerland", "Japan", "South Korea", "UK"]
+PRODUCT_TYPES = ["Serum", "Cleanser", "Sunscreen", "Lotion", "Face Mask", "Toner", "Moisturizer",
+                 "Face Wash", "Night Cream", "Lip Balm", "Eye Cream", "Scrub"]
+
+def iter_catalog(product_count, seed=42):
+    """
+    Generate synthetic products one at a time.
+
+    Args:
+        product_count (int): Number of products (SKUs) to generate
+        seed (int, optional): Random seed
+
+    Yields:
+        dict: Product dictionary with the same keys as load_products
+    """
+    rng = random.Random(seed)
+    for i in range(1, product_count + 1):
+        yield {
+            "id": i,
+            "name": f"{rng.choice(PRODUCT_TYPES)} {i}",
+            "brand": rng.choice(BRANDS),
+            "quantity": rng.randint(0, 1000),
+            "cost_price": round(rng.uniform(50, 1500), 2),
+            "country": rng.choice(COUNTRIES)
+        }
+
+def generate_catalog(product_count, seed=42):
+    """
+    Generate a synthetic catalog in memory.
+
+    Args:
+        product_count (int): Number of products (SKUs) to generate
+        seed (int, optional): Random seed
+
+    Returns:
+        list: List of product dictionaries
+    """
+    return list(iter_catalog(product_count, seed))
+
+def write_catalog(file_path, product_count, seed=42, legacy=False):
+    """
+    Stream a synthetic catalog straight to a product file.
+
+    The catalog is never held in memory, so files with millions of SKUs can
+    be generated on small machines.
+
+    Args:
+        file_path (str): Path of the product file to write
+        product_count (int): Number of products (SKUs) to generate
+        seed (int, optional): Random seed
+        legacy (bool, optional): Write the legacy format without a header
+                                 row instead of the current schema
+
+    Returns:
+        None
+    """
+    with open(file_path, "wb") as file:
+        if not legacy:
+            file.write(HEADER_ROW + b"\n")
+        for product in iter_catalog(product_count, seed):
+            file.write(format_product_row(product) + b"\n")
+
+def generate_orders(product_count, order_count, seed=7):
+    """
+    Generate a stream of single-line sale orders.
+
+    Product popularity is skewed so a small share of products receives most
+    orders, as in a real store. Popular products are spread across the
+    catalog rather than clustered at the start of the file.
+
+    Args:
+        product_count (int): Number of products in the catalog
+        order_count (int): Number of orders to generate
+        seed (int, optional): Random seed
+
+    Returns:
+        list: List of (product_id, quantity) tuples
+    """
+    rng = random.Random(seed)
+    return [((int(rng.paretovariate(1.2)) * 7919) % product_count + 1, rng.randint(1, 6))
+            for _ in range(order_count)]
+
+def generate_restocks(product_count, restock_count, seed=11):
+    """
+    Generate a stream of restock operations.
+
+    Args:
+        product_count (int): Number of products in the catalog
+        restock_count (int): Number of restocks to generate
+        seed (int, optional): Random seed
+
+    Returns:
+        list: List of (product_id, quantity, cost_price) tuples
+    """
+    rng = random.Random(seed)
+    return [(rng.randint(1, product_count), rng.randint(10, 500), round(rng.uniform(50, 1500), 2))
+            for _ in range(restock_count)]
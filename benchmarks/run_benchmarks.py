@@ -0,0 +1,275 @@
+"""
+Benchmark suite for the core inventory operations.
+
+Generates synthetic catalogs and order streams and drives load_products,
+parsing of the current and legacy product file formats, update_product_file, single-change saves, product lookup, sale pricing,
+cart building, invoice generation, the inventory valuation summary and
+the product listing with and without the query cache, without any
+interactive input. Throughput, latency percentiles and peak
+memory are written to a JSON results file that can be compared with the
+results of an earlier run.
+
+Usage (from the project root):
+    python -m benchmarks.run_benchmarks --sizes 1000,100000 --output bench_results.json
+    python -m benchmarks.run_benchmarks --sizes 1000,100000 --compare bench_results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from benchmarks.generators import generate_orders, write_catalog
+from main import render_product_listing
+from src.analytics import compute_inventory_summary
+from src.cart import Cart, build_sale_item
+from src.product_manager import load_products, mark_dirty, parse_products, save_product_changes, update_product_file
+from src.product_store import open_product_store
+from src.query_cache import QueryCache
+from src.sale_manager import generate_invoice
+
+def percentile(samples, fraction):
+    """
+    Get a percentile of a list of samples using the nearest-rank method.
+
+    Args:
+        samples (list): Measured values
+        fraction (float): Percentile as a fraction, e.g. 0.95
+
+    Returns:
+        float: The percentile value, or 0.0 for no samples
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+def measure(name, size, operation, operations_per_call, repeats):
+    """
+    Time an operation and measure its peak memory.
+
+    The operation is run `repeats` times for timing, then once more under
+    tracemalloc, since tracing slows allocation-heavy code down too much to
+    be timed at the same time.
+
+    Args:
+        name (str): Benchmark name
+        size (int): Catalog size the benchmark ran against
+        operation (callable): Function running one timed call
+        operations_per_call (int): Number of operations each call performs
+        repeats (int): Number of timed calls
+
+    Returns:
+        dict: Result with throughput (operations/s), p50/p95/p99 latency of a
+              single call in milliseconds and peak traced memory in bytes
+    """
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            operation()
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        operation()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(samples)
+    result = {
+        "benchmark": name,
+        "size": size,
+        "operations": operations_per_call * repeats,
+        "throughput": operations_per_call * repeats / total if total > 0 else 0.0,
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "peak_memory_bytes": peak_memory
+    }
+    print(f"{name:<22}{size:>12,}{result['throughput']:>16,.0f}{result['p50_ms']:>12.3f}"
+          f"{result['p95_ms']:>12.3f}{result['p99_ms']:>12.3f}{peak_memory / 1024 / 1024:>12.1f}")
+    return result
+
+def run_size(size, order_count, repeats, work_dir):
+    """
+    Run every benchmark against a catalog of one size.
+
+    Args:
+        size (int): Number of products (SKUs) in the catalog
+        order_count (int): Number of orders in the order stream
+        repeats (int): Number of timed calls per benchmark
+        work_dir (str): Directory the catalog and invoices are written to
+
+    Returns:
+        list: One result dictionary per benchmark
+    """
+    catalog_path = os.path.join(work_dir, f"catalog_{size}.txt")
+    write_catalog(catalog_path, size)
+    legacy_path = os.path.join(work_dir, f"catalog_{size}_legacy.txt")
+    write_catalog(legacy_path, size, legacy=True)
+    # Parsed from memory so the parse benchmarks do not time disk reads
+    with open(catalog_path, "r", newline="", encoding="utf-8") as file:
+        catalog_text = file.read()
+    with open(legacy_path, "r", newline="", encoding="utf-8") as file:
+        legacy_text = file.read()
+    os.remove(legacy_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        products = load_products(catalog_path)
+        # Build the binary store up front so the summary benchmark only times aggregation
+        open_product_store(catalog_path).close()
+    orders = generate_orders(size, order_count)
+    by_id = {product["id"]: product for product in products}
+    lookup_names = [by_id[product_id]["name"] for product_id, _ in orders[:min(order_count, 200)]]
+
+    # Same name index process_sale builds once per sale
+    by_name = {product["name"].lower(): product for product in products}
+
+    def lookup():
+        for name in lookup_names:
+            by_name.get(name.lower())
+
+    def save_one_change():
+        # In-place save of a single changed row, as after a one-item sale
+        for product_id, _ in orders[:100]:
+            mark_dirty(by_id[product_id], products)
+            save_product_changes(products, catalog_path)
+
+    def price_orders():
+        for product_id, quantity in orders:
+            build_sale_item(by_id[product_id], quantity)
+
+    def fill_cart():
+        # Repeated products merge into one line and are checked against stock on every add
+        cart = Cart()
+        for product_id, quantity in orders:
+            cart.add(by_id[product_id], quantity)
+
+    listing_cache = QueryCache()
+
+    def cached_listing():
+        # Repeated views of an unchanged catalog, as from the View Products menu
+        listing_cache.get_or_compute(("products", "benchmark"), lambda: render_product_listing(products))
+
+    # Render once up front so the cached benchmark only times cache hits
+    cached_listing()
+
+    def write_invoices():
+        for product_id, quantity in orders[:100]:
+            sale_item = build_sale_item(by_id[product_id], quantity)
+            generate_invoice("Benchmark Customer", [sale_item], sale_item["item_total"])
+
+    return [
+        measure("load_products", size, lambda: load_products(catalog_path), size, repeats),
+        measure("parse_products_csv", size, lambda: parse_products(io.StringIO(catalog_text, newline="")),
+                size, repeats),
+        measure("parse_products_legacy", size, lambda: parse_products(io.StringIO(legacy_text, newline="")),
+                size, repeats),
+        measure("inventory_summary", size, lambda: compute_inventory_summary(catalog_path, use_cache=False),
+                size, repeats),
+        measure("update_product_file", size, lambda: update_product_file(products, catalog_path), size, repeats),
+        measure("save_one_change", size, save_one_change, min(len(orders), 100), repeats),
+        measure("lookup_by_name", size, lookup, len(lookup_names), repeats),
+        measure("sale_pricing", size, price_orders, len(orders), repeats),
+        measure("cart_add", size, fill_cart, len(orders), repeats),
+        measure("product_listing", size, lambda: render_product_listing(products), 1, repeats),
+        measure("product_listing_cached", size, cached_listing, 1, repeats),
+        measure("generate_invoice", size, write_invoices, min(len(orders), 100), repeats)
+    ]
+
+def load_baseline(baseline_path):
+    """
+    Load the results of an earlier run to compare against.
+
+    Args:
+        baseline_path (str): Path of an earlier results JSON file
+
+    Returns:
+        dict: Earlier results keyed by (benchmark, size)
+    """
+    with open(baseline_path, "r") as file:
+        return {(r["benchmark"], r["size"]): r for r in json.load(file)["results"]}
+
+def compare(results, baseline, baseline_path):
+    """
+    Print the throughput change of each benchmark against an earlier run.
+
+    Args:
+        results (list): Results of the current run
+        baseline (dict): Earlier results as returned by load_baseline
+        baseline_path (str): Path the earlier results were loaded from
+
+    Returns:
+        None
+    """
+    print("\n" + "="*80)
+    print(f"Comparison with {baseline_path}")
+    print("="*80)
+    print(f"{'Benchmark':<22}{'Size':>12}{'Before ops/s':>16}{'After ops/s':>16}{'Change':>10}")
+    print("-"*76)
+    for result in results:
+        before = baseline.get((result["benchmark"], result["size"]))
+        if not before or not before["throughput"]:
+            continue
+        change = (result["throughput"] / before["throughput"] - 1) * 100
+        print(f"{result['benchmark']:<22}{result['size']:>12,}{before['throughput']:>16,.0f}"
+              f"{result['throughput']:>16,.0f}{change:>+9.1f}%")
+
+def main():
+    """
+    Parse the command line, run the suite and write the results file.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description="Benchmark WeCare inventory operations")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma-separated catalog sizes (SKUs), e.g. 1000,1000000,10000000")
+    parser.add_argument("--orders", type=int, default=10000, help="number of orders in the order stream")
+    parser.add_argument("--repeats", type=int, default=5, help="timed calls per benchmark")
+    parser.add_argument("--output", default="bench_results.json", help="results file to write")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    # Read the baseline before the run, the results file may be the same file and is overwritten below
+    baseline = load_baseline(args.compare) if args.compare else None
+    project_dir = os.getcwd()
+
+    print(f"{'Benchmark':<22}{'Size':>12}{'Ops/s':>16}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}{'Peak MB':>12}")
+    print("-"*98)
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Invoices are written relative to the working directory
+        os.chdir(work_dir)
+        try:
+            for size in sizes:
+                results.extend(run_size(size, args.orders, args.repeats, work_dir))
+        finally:
+            os.chdir(project_dir)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "orders": args.orders,
+            "repeats": args.repeats
+        },
+        "results": results
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if baseline is not None:
+        compare(results, baseline, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Order throughput benchmark for the sharded inventory engine.
+
+Generates a synthetic catalog and a batch of orders, then measures how many
+orders per second ShardedInventory processes with 1 to N worker processes.
+
+Usage (from the project root):
+    python -m benchmarks.shard_throughput --products 10000 --orders 200000 --max-shards 8
+"""
+import argparse
+import multiprocessing
+import time
+from benchmarks.generators import generate_catalog, generate_orders
+from src.shard_engine import ShardedInventory
+
+def make_catalog(product_count):
+    """
+    Build a synthetic catalog with plenty of stock for every product.
+
+    Args:
+        product_count (int): Number of products to generate
+
+    Returns:
+        list: List of product dictionaries
+    """
+    products = generate_catalog(product_count)
+    for product in products:
+        product["quantity"] = 10**9
+    return products
+
+def make_orders(products, order_count):
+    """
+    Build a batch of single-line orders across the catalog.
+
+    Args:
+        products (list): The catalog the orders are placed against
+        order_count (int): Number of orders to generate
+
+    Returns:
+        list: List of (product_name, quantity) tuples
+    """
+    return [(products[product_id - 1]["name"], quantity)
+            for product_id, quantity in generate_orders(len(products), order_count)]
+
+def run(product_count, order_count, max_shards):
+    """
+    Run the benchmark for every shard count from 1 to max_shards.
+
+    Args:
+        product_count (int): Number of products in the catalog
+        order_count (int): Number of orders per run
+        max_shards (int): Largest number of worker processes to try
+
+    Returns:
+        list: One result dictionary per shard count
+    """
+    orders = make_orders(make_catalog(product_count), order_count)
+    results = []
+
+    print(f"{'Shards':<8}{'Orders/s':>15}{'Speedup':>10}")
+    print("-"*33)
+    for shard_count in range(1, max_shards + 1):
+        engine = ShardedInventory(make_catalog(product_count), shard_count)
+        start = time.perf_counter()
+        totals = engine.process_orders(orders)
+        elapsed = time.perf_counter() - start
+        engine.stop()
+
+        throughput = totals["completed"] / elapsed
+        speedup = throughput / results[0]["orders_per_second"] if results else 1.0
+        results.append({"shards": shard_count, "orders_per_second": throughput, "speedup": speedup})
+        print(f"{shard_count:<8}{throughput:>15,.0f}{speedup:>10.2f}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sharded order throughput")
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--orders", type=int, default=200000)
+    parser.add_argument("--max-shards", type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args()
+    run(args.products, args.orders, args.max_shards)
@@ -1,41 +1,56 @@
-import os
+import time
+
+# Recorded before any other import so startup profiling covers module imports
+STARTUP_TIME = time.perf_counter()
+
+import atexit
 import sys
-from src.product_manager import load_products, edit_product_information
-from src.sale_manager import process_sale
-from src.restock_manager import restock_products
+import threading
+from src import logger, metrics
+from src.data_paths import DEFAULT_LOCATION, get_location_file
+from src.product_store import is_store_fresh, load_products_cached, refresh_store
+from src.query_cache import cached_query
+
+# Managers and the replication module are imported on first use to keep startup fast; with an
+# up-to-date pre-parsed store not even the product manager is loaded before the menu
 
-def display_products(products):
+# Options handled by main itself, everything else is passed to command mode
+MAIN_FLAGS = ("--with-replica", "--profile-startup", "--metrics", "--quiet", "--log-async")
+MAIN_VALUE_OPTIONS = ("--log-file=", "--metrics-port=")
+
+def render_product_listing(products):
     """
-    Display all available products in a formatted table.
+    Render all available products as a formatted table.
     
     Args:
         products (list): List of product dictionaries containing product information
                         Each dictionary should have keys: name, brand, cost_price, quantity, country
     
     Returns:
-        None
+        str: The table, ready to be printed
     """
     # Define markup for selling price calculation
     MARKUP_MULTIPLIER = 3
 
     # Handle empty inventory case
     if not products:
-        print("\n" + "="*80)
-        print(" "*30 + "INVENTORY STATUS" + " "*30)
-        print("="*80)
-        print("\nNo products available in inventory. Please restock products.")
-        return
-    
-    # Display header    
-    print("\n" + "="*80)
-    print(" "*30 + "AVAILABLE PRODUCTS" + " "*30)
-    print("="*80)
+        return "\n".join([
+            "\n" + "="*80,
+            " "*30 + "INVENTORY STATUS" + " "*30,
+            "="*80,
+            "\nNo products available in inventory. Please restock products."
+        ])
     
-    # Display column headers
-    print(f"{'ID':^5} | {'Product Name':^30} | {'Brand':^15} | {'Selling Price':^15} | {'Stock':^10} | {'Country':^15}")
-    print("-"*105)
+    # Header and column headers
+    lines = [
+        "\n" + "="*80,
+        " "*30 + "AVAILABLE PRODUCTS" + " "*30,
+        "="*80,
+        f"{'ID':^5} | {'Product Name':^30} | {'Brand':^15} | {'Selling Price':^15} | {'Stock':^10} | {'Country':^15}",
+        "-"*105
+    ]
     
-    # Display each product with formatted values
+    # Format each product
     for product in products:
         selling_price = product["cost_price"] * MARKUP_MULTIPLIER
         if product["quantity"] <= 5:
@@ -43,24 +58,127 @@ def display_products(products):
         else:
             quantity_display = str(product['quantity'])
             
-        print(f"{product['id']:^5} | {product['name']:^30} | {product['brand']:^15} | ₹{selling_price:^13.2f} | {quantity_display:^10} | {product['country']:^15}")
+        lines.append(f"{product['id']:^5} | {product['name']:^30} | {product['brand']:^15} | ₹{selling_price:^13.2f} | {quantity_display:^10} | {product['country']:^15}")
+    
+    lines.append("-"*95)
+    lines.append(f"{'Total Products:':^30} {len(products):^5}")
+    lines.append("\n" + "="*95)
+    return "\n".join(lines)
+
+def display_products(products, location=None):
+    """
+    Display all available products in a formatted table.
+    
+    The rendered table of a location is cached until the next sale, restock,
+    edit or other inventory change, so viewing an unchanged catalog again
+    does not reformat every row.
+    
+    Args:
+        products (list): List of product dictionaries containing product information
+        location (str, optional): Location the products belong to. The table
+                                  is rendered without the cache when omitted
     
-    print("-"*95)
-    print(f"{'Total Products:':^30} {len(products):^5}")
-    print("\n" + "="*95)
+    Returns:
+        None
+    """
+    if location is None:
+        print(render_product_listing(products))
+        return
+    print(cached_query(("products", location), lambda: render_product_listing(products)))
 
-def display_menu():
+def clear_screen():
+    """
+    Clear the terminal and move the cursor to the top-left corner.
+    
+    Uses ANSI escape codes instead of running the 'clear' or 'cls' command,
+    so no shell process is spawned every time the menu is displayed.
+    
+    Returns:
+        None
+    """
+    sys.stdout.write("\033[2J\033[H")
+    sys.stdout.flush()
+
+def start_catalog_load(file_path):
+    """
+    Start loading the product catalog for a location.
+    
+    When an up-to-date pre-parsed store exists for the product file, it is
+    decoded on a background thread so the menu can be shown straight away.
+    Otherwise the text file is parsed immediately and the store is rebuilt
+    for the next start.
+    
+    Args:
+        file_path (str): Path to the product file
+        
+    Returns:
+        dict: Loader state with keys cached, thread and products
+    """
+    loader = {"cached": is_store_fresh(file_path), "thread": None, "products": None}
+    
+    if loader["cached"]:
+        def load():
+            loader["products"] = load_products_cached(file_path)
+        loader["thread"] = threading.Thread(target=load, daemon=True)
+        loader["thread"].start()
+    else:
+        loader["products"] = load_products_cached(file_path)
+    return loader
+
+def wait_for_catalog(loader):
+    """
+    Wait for a catalog load started by start_catalog_load to finish.
+    
+    Args:
+        loader (dict): Loader state returned by start_catalog_load
+        
+    Returns:
+        list: List of product dictionaries
+    """
+    if loader["thread"] is not None:
+        loader["thread"].join()
+        loader["thread"] = None
+    return loader["products"]
+
+def print_startup_report(phases, time_to_menu, cached):
+    """
+    Print the timings recorded in startup-performance mode.
+    
+    Args:
+        phases (list): List of (phase name, seconds) tuples in startup order
+        time_to_menu (float): Seconds from process start until the menu was shown
+        cached (bool): Whether the pre-parsed catalog store was used
+        
+    Returns:
+        None
+    """
+    print("\n" + "="*80)
+    print(" "*30 + "STARTUP PROFILE" + " "*30)
+    print("="*80)
+    print(f"{'Phase':<50}{'Time (ms)':>15}")
+    print("-"*65)
+    for name, seconds in phases:
+        print(f"{name:<50}{seconds * 1000:>15.2f}")
+    print("-"*65)
+    print(f"{'Time to menu:':<50}{time_to_menu * 1000:>15.2f}")
+    print(f"Catalog source: {'pre-parsed store' if cached else 'text file (store rebuilt)'}")
+    print("="*80)
+
+def display_menu(location=DEFAULT_LOCATION):
     """
     Display the main menu of the WeCare Inventory System.
     
     This function clears the screen and displays a formatted menu with options
     for the user to interact with the system.
     
+    Args:
+        location (str, optional): Name of the currently active location
+    
     Returns:
         None
     """
     # Clear screen for better user experience
-    os.system('clear' if os.name == 'posix' else 'cls')
+    clear_screen()
     
     # Display header banner
     print("\n" + "*"*80)
@@ -69,6 +187,7 @@ def display_menu():
     print("*" + "Your Complete Skincare Inventory Solution".center(78) + "*")
     print("*" + " "*78 + "*")
     print("*"*80)
+    print(f"\nCurrent location: {location}")
     
     # Display menu options
     print("\n" + "="*40 + " Main Menu " + "="*40 + "\n")
@@ -76,9 +195,39 @@ def display_menu():
     print("  2. Process Sale        - Record a customer purchase")
     print("  3. Restock Products    - Add inventory to existing products")
     print("  4. Update Information  - Edit product details or add new products")
-    print("  5. Exit                - Close the application")
+    print("  5. Manage Locations    - Switch stores, transfer stock, check availability")
+    print("  6. History & Returns   - Void sales or restocks, view past stock")
+    print("  7. Customers           - Purchase history and loyalty tiers")
+    print("  8. Inventory Report    - Stock value and margin by brand and country")
+    print("  9. Exit                - Close the application")
     print("\n" + "="*80 + "\n")
 
+def get_option_value(name):
+    """
+    Get the value of a "--name=value" command-line option.
+    
+    Args:
+        name (str): Option name including the leading dashes
+        
+    Returns:
+        str: The option's value, or None if the option was not given
+    """
+    for argument in sys.argv[1:]:
+        if argument.startswith(name + "="):
+            return argument[len(name) + 1:]
+    return None
+
+def get_command_arguments():
+    """
+    Get the command-line arguments meant for command mode.
+    
+    Returns:
+        list: Arguments other than the options main handles itself, empty
+              when the interactive menu should be started
+    """
+    return [argument for argument in sys.argv[1:]
+            if argument not in MAIN_FLAGS and not argument.startswith(MAIN_VALUE_OPTIONS)]
+
 def get_valid_choice(prompt, valid_range):
     """
     Get a valid integer choice from the user within the specified range.
@@ -103,10 +252,10 @@ def get_valid_choice(prompt, valid_range):
                 return choice
                 
             # Display error message for out-of-range values
-            print(f"\033[91mError: Please enter a number between {valid_range.start} and {valid_range.stop-1}.\033[0m")
+            logger.error(f"Error: Please enter a number between {valid_range.start} and {valid_range.stop-1}.")
         except ValueError:
             # Handle non-integer inputs
-            print("\033[91mError: Please enter a valid number.\033[0m")
+            logger.error("Error: Please enter a valid number.")
 
 def main():
     """
@@ -115,24 +264,106 @@ def main():
     This function initializes the system, loads product data, and handles the main
     application loop. It also includes error handling for graceful exits.
     
+    When started with --with-replica, a read replica process is started and
+    product listings are served from it instead of the live product list.
+    
+    When started with --profile-startup, each startup phase is timed, the
+    menu is displayed once and a timing report is printed instead of
+    entering the main loop.
+    
+    --log-file=PATH additionally writes every status message to PATH as JSON
+    lines, --quiet only shows warnings and errors on the console and
+    --log-async writes log records from a background thread.
+    
+    When started with --metrics, sale, restock, invoice and persistence
+    metrics are recorded and written to data/metrics.prom after every menu
+    action and on exit. --metrics-port=PORT additionally serves them at
+    http://127.0.0.1:PORT/metrics.
+    
+    Any other arguments run a single command or a command file instead of
+    the menu, e.g. "python main.py edit --sku 12 --cost-price 250" or
+    "python main.py run commands.txt". See src/commands.py.
+    
     Returns:
         None
     """
-    # Ensure required directories exist
-    os.makedirs("data/sales_invoices", exist_ok=True)
-    os.makedirs("data/restock_invoices", exist_ok=True)
+    profile = "--profile-startup" in sys.argv
+    phases = [("Module imports", time.perf_counter() - STARTUP_TIME)]
+    
+    # Configure logging before anything is loaded
+    log_file = get_option_value("--log-file")
+    if log_file or "--quiet" in sys.argv or "--log-async" in sys.argv:
+        logger.configure_logging(json_path=log_file, quiet="--quiet" in sys.argv,
+                                 asynchronous="--log-async" in sys.argv)
     
+    # Enable metrics before any instrumented work runs
+    metrics_port = get_option_value("--metrics-port")
+    if "--metrics" in sys.argv or metrics_port:
+        metrics.enable_metrics()
+        # Also export on exit, so the last menu action and command mode runs are not lost
+        atexit.register(metrics.write_prometheus_file)
+    if metrics_port:
+        metrics.serve_metrics(int(metrics_port))
+    
+    # Run scripted commands instead of the interactive menu
+    command_arguments = get_command_arguments()
+    if command_arguments:
+        from src.commands import run_commands
+        sys.exit(run_commands(command_arguments))
+    
+    current_location = DEFAULT_LOCATION
+    products = None
     try:
-        # Load product data from file
-        products = load_products("data/products.txt")        
+        # Start loading product data for the default location
+        phase_start = time.perf_counter()
+        catalog = start_catalog_load(get_location_file(current_location))
+        phases.append(("Catalog cache check and load start", time.perf_counter() - phase_start))
+        
+        # Optionally serve read-only queries from a replica process
+        primary = None
+        replica = None
+        if "--with-replica" in sys.argv:
+            from src.replication import ReplicaClient, ReplicationPrimary
+            phase_start = time.perf_counter()
+            products = wait_for_catalog(catalog)
+            primary = ReplicationPrimary(products)
+            replica = ReplicaClient.start(primary)
+            phases.append(("Replica start", time.perf_counter() - phase_start))
+        
         # Main application loop
         while True:
-            display_menu()
-            choice = get_valid_choice("Enter your choice (1-5): ", range(1, 6))
+            phase_start = time.perf_counter()
+            display_menu(current_location)
+            
+            if profile:
+                phases.append(("Menu render", time.perf_counter() - phase_start))
+                time_to_menu = time.perf_counter() - STARTUP_TIME
+                phase_start = time.perf_counter()
+                wait_for_catalog(catalog)
+                phases.append(("Catalog ready (after menu)", time.perf_counter() - phase_start))
+                print_startup_report(phases, time_to_menu, catalog["cached"])
+                return
+            
+            choice = get_valid_choice("Enter your choice (1-9): ", range(1, 10))
+            
+            # The catalog may still be loading in the background
+            if products is None:
+                products = wait_for_catalog(catalog)
+            
+            # Export metrics recorded by the previous action
+            if metrics.is_enabled():
+                metrics.write_prometheus_file()
             
             if choice == 1:
                 # Display available products
-                display_products(products)
+                if replica:
+                    _, replica_products = replica.query("products")
+                    display_products(replica_products)
+                    for lag in primary.replica_lag():
+                        print(f"Replica {lag['replica_id']} lag: {lag['versions_behind']} changes "
+                              f"({lag['seconds_behind']:.3f}s)")
+                else:
+                    display_products(products, current_location)
                 input("\nPress Enter to return to main menu...")
                 
             elif choice == 2:
@@ -141,32 +372,72 @@ def main():
                 print(" "*30 + "PROCESS SALE" + " "*30)
                 print("="*80)
                 
+                from src.customer_manager import find_customer, get_or_create_customer
                 while True:
-                    customer_name = input("\nEnter customer name: ").strip()
+                    customer_name = input("\nEnter customer name or customer ID: ").strip()
+                    customer = find_customer(customer_name) if customer_name else None
 
-                    if customer_name == "":
-                        print("\033[91mError: Customer name cannot be empty.\033[0m")
+                    if customer:
+                        customer_name = customer["name"]
+                        break
+                    elif customer_name == "":
+                        logger.error("Error: Customer name cannot be empty.")
                     elif any(char.isdigit() for char in customer_name):
-                        print("\033[91mError: Customer name cannot contain numbers.\033[0m")
+                        logger.error("Error: Customer name cannot contain numbers.")
                     elif not all(c.isalpha() or c.isspace() for c in customer_name):
-                        print("\033[91mError: Please enter a valid customer name (letters and spaces only).\033[0m")
+                        logger.error("Error: Please enter a valid customer name (letters and spaces only).")
                     else:
+                        customer = get_or_create_customer(customer_name)
                         break
                 
-                process_sale(products, customer_name)
+                from src.sale_manager import process_sale
+                process_sale(products, customer_name, get_location_file(current_location), customer)
                 input("\nPress Enter to return to main menu...")
                 
             elif choice == 3:
                 # Restock products
-                restock_products(products)
+                from src.restock_manager import restock_products
+                restock_products(products, get_location_file(current_location))
                 input("\nPress Enter to return to main menu...")
                 
             elif choice == 4:
                 # Update product information
-                edit_product_information(products)
+                from src.product_manager import edit_product_information
+                edit_product_information(products, get_location_file(current_location))
                 input("\nPress Enter to return to main menu...")
                 
             elif choice == 5:
+                # Manage store and warehouse locations
+                from src.location_manager import manage_locations
+                previous_location, previous_products = current_location, products
+                current_location, products = manage_locations(current_location, products)
+                if current_location != previous_location:
+                    refresh_store(previous_products, get_location_file(previous_location))
+                if primary:
+                    primary.publish_snapshot(products)
+                input("\nPress Enter to return to main menu...")
+                
+            elif choice == 6:
+                # Transaction history, voids and returns
+                from src.returns_manager import manage_history
+                manage_history(products, get_location_file(current_location))
+                input("\nPress Enter to return to main menu...")
+                
+            elif choice == 7:
+                # Customer purchase history
+                from src.customer_manager import manage_customers
+                manage_customers()
+                input("\nPress Enter to return to main menu...")
+                
+            elif choice == 8:
+                # Inventory valuation and margin exposure
+                from src.analytics import display_inventory_report
+                # Build the store from memory, the report would otherwise reparse a changed text file
+                refresh_store(products, get_location_file(current_location))
+                display_inventory_report(get_location_file(current_location))
+                input("\nPress Enter to return to main menu...")
+                
+            elif choice == 9:
                 print("\n" + "*"*80)
                 print("*" + " "*78 + "*")
                 print("*" + "Thank you for using WeCare!".center(78) + "*")
@@ -179,9 +450,14 @@ def main():
         print("\n\nProgram interrupted. Saving data and exiting...")
         sys.exit(0)
     except Exception as e:
-        print(f"\n\033[91mAn unexpected error occurred: {e}\033[0m")
+        print()
+        logger.error(f"An unexpected error occurred: {e}")
         print("The system will now exit. Please restart the application.")
         sys.exit(1)
+    finally:
+        # Saves leave the pre-parsed store stale, rebuild it from memory so the next start can use it
+        if products is not None:
+            refresh_store(products, get_location_file(current_location))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
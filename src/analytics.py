@@ -0,0 +1,272 @@
+import json
+import os
+from src import logger, metrics
+from src.product_manager import PRODUCTS_FILE
+from src.product_store import RECORD, get_store_path, open_product_store
+from src.cart import MARKUP_MULTIPLIER
+from src.query_cache import cached_query
+
+# NumPy is optional: with it, every chunk is aggregated with vectorized
+# operations over the store's columns, without it a pure Python loop is used
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Number of store records aggregated at a time, bounding memory use for
+# catalogs larger than memory
+CHUNK_SIZE = 1_000_000
+
+# NumPy view of a store record, matching product_store.RECORD
+if np is not None:
+    RECORD_DTYPE = np.dtype([
+        ("name_off", "<u4"), ("name_len", "<u4"),
+        ("brand_off", "<u4"), ("brand_len", "<u4"),
+        ("country_off", "<u4"), ("country_len", "<u4"),
+        ("quantity", "<i8"), ("cost_price", "<f8")
+    ])
+
+def get_summary_path(file_path=PRODUCTS_FILE):
+    """
+    Get the path of the cached inventory summary of a product file.
+
+    Args:
+        file_path (str, optional): Path to the product text file
+
+    Returns:
+        str: Path to the summary, e.g. data/products.summary.json
+    """
+    return os.path.splitext(file_path)[0] + ".summary.json"
+
+def _code_table(known):
+    """
+    Build a lookup table from the low bits of the known offsets to their positions.
+
+    The smallest power-of-two table in which no two known offsets share a slot
+    is used. Returns (None, None) if there is none up to 2**20 slots.
+    """
+    size = 1 << max((len(known) * 4 - 1).bit_length(), 4)
+    positions = np.arange(len(known))
+    while size <= 1 << 20:
+        slots = known & (size - 1)
+        if len(np.unique(slots)) == len(known):
+            table = np.zeros(size, dtype=np.intp)
+            table[slots] = positions
+            return table, size - 1
+        size <<= 1
+    return None, None
+
+def _group_codes(offsets, known):
+    """
+    Map string offsets to positions in a sorted array of known offsets.
+
+    Brands and countries have few distinct values, so every offset is looked
+    up in a small table indexed by its low bits instead of sorting the chunk.
+    Offsets not seen before are added to the known array first.
+
+    Args:
+        offsets (numpy.ndarray): String offsets of one column of a chunk
+        known (numpy.ndarray): Sorted distinct offsets seen so far
+
+    Returns:
+        tuple: (group position of every offset, updated known offsets)
+    """
+    if not len(known):
+        known = np.unique(offsets[:4096])
+
+    while True:
+        table, mask = _code_table(known)
+        if table is not None:
+            codes = table[offsets & mask]
+        else:
+            codes = np.minimum(np.searchsorted(known, offsets), len(known) - 1)
+        found = known[codes] == offsets
+        if found.all():
+            return codes, known
+        known = np.union1d(known, offsets[~found])
+
+def _aggregate_chunk_numpy(chunk, groups):
+    """Add the products in a chunk of store records to the brand and country groups using NumPy."""
+    records = np.frombuffer(chunk, dtype=RECORD_DTYPE)
+    quantity = records["quantity"]
+    value = quantity * records["cost_price"]
+
+    for column in ("brand", "country"):
+        column_groups = groups[column]
+        known = np.fromiter(sorted(column_groups), dtype="<u4", count=len(column_groups))
+        codes, known = _group_codes(records[column + "_off"], known)
+
+        counts = np.bincount(codes, minlength=len(known))
+        units = np.bincount(codes, weights=quantity, minlength=len(known))
+        values = np.bincount(codes, weights=value, minlength=len(known))
+
+        for code, (offset, count, unit_count, cost_value) in enumerate(zip(known.tolist(), counts.tolist(),
+                                                                           units.tolist(), values.tolist())):
+            if not count:
+                continue
+            group = column_groups.get(offset)
+            if group is None:
+                # Only looked up once per new brand or country
+                length = int(records[column + "_len"][np.flatnonzero(codes == code)[0]])
+                group = column_groups[offset] = [length, 0, 0, 0.0]
+            group[1] += count
+            group[2] += int(unit_count)
+            group[3] += cost_value
+
+def _aggregate_chunk_python(chunk, groups):
+    """Add the products in a chunk of store records to the brand and country groups."""
+    brands = groups["brand"]
+    countries = groups["country"]
+    for _, _, brand_off, brand_len, country_off, country_len, quantity, cost_price in RECORD.iter_unpack(chunk):
+        value = quantity * cost_price
+
+        group = brands.get(brand_off)
+        if group is None:
+            group = brands[brand_off] = [brand_len, 0, 0, 0.0]
+        group[1] += 1
+        group[2] += quantity
+        group[3] += value
+
+        group = countries.get(country_off)
+        if group is None:
+            group = countries[country_off] = [country_len, 0, 0, 0.0]
+        group[1] += 1
+        group[2] += quantity
+        group[3] += value
+
+def _valuation(products, units, cost_value):
+    """Build the valuation entry of a group from its product count, units and stock value at cost."""
+    selling_value = cost_value * MARKUP_MULTIPLIER
+    return {
+        "products": products,
+        "units": units,
+        "cost_value": cost_value,
+        "selling_value": selling_value,
+        "margin": selling_value - cost_value
+    }
+
+@metrics.timed("wecare_inventory_summary_seconds")
+def compute_inventory_summary(file_path=PRODUCTS_FILE, chunk_size=CHUNK_SIZE, use_cache=True):
+    """
+    Value the stock of a product file at cost and selling price, by brand and country.
+
+    The catalog is streamed from the memory-mapped product store in chunks,
+    so only one chunk is held in memory at a time. Products are grouped by
+    their brand and country string offsets in the store, which identify the
+    deduplicated strings, so grouping never decodes a string per product.
+
+    The result is cached next to the product file together with the
+    modification time and size of the text file it was computed from, so
+    repeated reports on an unchanged catalog are read from the cache.
+
+    Args:
+        file_path (str, optional): Path to the product text file
+        chunk_size (int, optional): Number of records aggregated at a time
+        use_cache (bool, optional): Use and update the cached summary
+
+    Returns:
+        dict: Valuation with keys products, units, cost_value, selling_value
+              and margin for the whole catalog, plus by_brand and by_country
+              mapping each brand and country to a valuation with the same keys
+    """
+    summary_path = get_summary_path(file_path)
+    store = open_product_store(file_path, get_store_path(file_path))
+    try:
+        if use_cache and os.path.exists(summary_path):
+            with open(summary_path, "r", encoding="utf-8") as file:
+                cached = json.load(file)
+            if (cached.get("source_mtime"), cached.get("source_size"), cached.get("markup")) == \
+                    (store.source_mtime, store.source_size, MARKUP_MULTIPLIER):
+                return cached["summary"]
+
+        groups = {"brand": {}, "country": {}}
+        aggregate_chunk = _aggregate_chunk_numpy if np is not None else _aggregate_chunk_python
+        for chunk in store.record_chunks(chunk_size):
+            aggregate_chunk(chunk, groups)
+
+        summary = _valuation(
+            sum(group[1] for group in groups["brand"].values()),
+            sum(group[2] for group in groups["brand"].values()),
+            sum(group[3] for group in groups["brand"].values())
+        )
+        for column in ("brand", "country"):
+            summary["by_" + column] = {
+                store.string_at(offset, length): _valuation(count, units, cost_value)
+                for offset, (length, count, units, cost_value) in groups[column].items()
+            }
+
+        if use_cache:
+            with open(summary_path, "w", encoding="utf-8") as file:
+                json.dump({"source_mtime": store.source_mtime, "source_size": store.source_size,
+                           "markup": MARKUP_MULTIPLIER, "summary": summary}, file, ensure_ascii=False)
+    finally:
+        store.close()
+
+    return summary
+
+def display_valuation_table(title, groups, total_margin, limit=None):
+    """
+    Display valuations by brand or country, largest margin first.
+
+    Args:
+        title (str): Name of the grouping column, e.g. "Brand"
+        groups (dict): Mapping of group name to valuation
+        total_margin (float): Margin of the whole catalog, for each group's share
+        limit (int, optional): Maximum number of groups to show
+
+    Returns:
+        None
+    """
+    rows = sorted(groups.items(), key=lambda item: item[1]["margin"], reverse=True)
+    print(f"\n{title:<20}{'Products':>10}{'Units':>10}{'At Cost':>16}{'At Selling':>16}{'Margin':>16}{'Share':>8}")
+    print("-"*96)
+    for name, valuation in rows[:limit]:
+        share = valuation["margin"] / total_margin * 100 if total_margin else 0
+        print(f"{name[:19]:<20}{valuation['products']:>10}{valuation['units']:>10}"
+              f"{'₹' + format(valuation['cost_value'], ',.2f'):>16}{'₹' + format(valuation['selling_value'], ',.2f'):>16}"
+              f"{'₹' + format(valuation['margin'], ',.2f'):>16}{share:>7.1f}%")
+    if limit is not None and len(rows) > limit:
+        print(f"... and {len(rows) - limit} more")
+    print("-"*96)
+
+def display_inventory_report(file_path=PRODUCTS_FILE, limit=20):
+    """
+    Display the inventory valuation and margin exposure report.
+
+    The summary and the cost of goods sold are cached until the inventory
+    changes or the product file is written by another process.
+
+    Args:
+        file_path (str, optional): Path to the product text file
+        limit (int, optional): Maximum number of brands and countries to show
+
+    Returns:
+        None
+    """
+    # Imported here so the lot file is only read when the report is shown
+    from src.lot_manager import display_expiring_lots, get_cost_of_goods_sold
+
+    file_stat = os.stat(file_path) if os.path.exists(file_path) else None
+    file_state = (file_stat.st_mtime_ns, file_stat.st_size) if file_stat else None
+    summary = cached_query(("inventory_summary", file_path, file_state), lambda: compute_inventory_summary(file_path))
+    if not summary["products"]:
+        logger.warning("No products available in inventory.")
+        return
+
+    print("\n" + "="*96)
+    print(" "*38 + "INVENTORY VALUATION" + " "*39)
+    print("="*96)
+    print(f"{'Products:':<30}{summary['products']:>20,}")
+    print(f"{'Units in stock:':<30}{summary['units']:>20,}")
+    print(f"{'Stock value at cost:':<30}{'₹' + format(summary['cost_value'], ',.2f'):>20}")
+    print(f"{'Stock value at selling price:':<30}{'₹' + format(summary['selling_value'], ',.2f'):>20}")
+    print(f"{'Margin:':<30}{'₹' + format(summary['margin'], ',.2f'):>20}")
+
+    display_valuation_table("Brand", summary["by_brand"], summary["margin"], limit)
+    display_valuation_table("Country", summary["by_country"], summary["margin"], limit)
+
+    units_sold, cost_of_goods_sold = cached_query(("cost_of_goods_sold", file_path, file_state),
+                                                  lambda: get_cost_of_goods_sold(file_path))
+    print(f"\n{'Units sold:':<30}{units_sold:>20,}")
+    print(f"{'Cost of goods sold (FIFO):':<30}{'₹' + format(cost_of_goods_sold, ',.2f'):>20}")
+    display_expiring_lots(file_path)
@@ -0,0 +1,192 @@
+from src import metrics
+from src.inventory_events import publish_change
+from src.lot_manager import cost_of_goods
+from src.product_manager import mark_dirty
+
+# Selling price is cost price plus 200% markup
+MARKUP_MULTIPLIER = 3
+
+# Carts whose subtotal reaches the threshold get the bulk discount rate off
+BULK_DISCOUNT_THRESHOLD = 1000
+BULK_DISCOUNT_RATE = 0.05
+
+def build_sale_item(product, quantity):
+    """
+    Price a single cart line and apply the "Buy 3, Get 1 Free" policy.
+
+    Args:
+        product (dict): Product being sold
+        quantity (int): Number of paid units
+
+    Returns:
+        dict: Sale details for the line with keys product_name, brand,
+              quantity_sold, free_quantity, unit_price and item_total
+    """
+    selling_price = product["cost_price"] * MARKUP_MULTIPLIER
+    return {
+        "product_name": product["name"],
+        "brand": product["brand"],
+        "quantity_sold": quantity,
+        "free_quantity": quantity // 3,
+        "unit_price": selling_price,
+        "item_total": selling_price * quantity
+    }
+
+def max_paid_quantity(stock):
+    """
+    Get the most paid units that can be sold from a stock level, counting free units.
+
+    Every third paid unit adds a free one, so 3k + r paid units (r < 3)
+    take 4k + r units from stock.
+
+    Args:
+        stock (int): Units in stock
+
+    Returns:
+        int: Largest paid quantity whose paid plus free units fit in stock
+    """
+    if stock <= 0:
+        return 0
+    return 3 * (stock // 4) + min(stock % 4, 2)
+
+class Cart:
+    """
+    Shopping cart of one sale, with one line per product.
+
+    Adding a product that is already in the cart merges the quantities into
+    its line, so the "Buy 3, Get 1 Free" promotion and the stock check always
+    see the combined quantity. The subtotal and the units held from stock
+    are kept up to date on every add instead of being recomputed from the
+    lines, so adding a line and reading the totals take constant time.
+
+    Example:
+        cart = Cart()
+        if cart.add(product, 3) is None:
+            print(f"Only {cart.available(product)} more can be added")
+        history_lines = cart.commit(products)
+    """
+
+    def __init__(self):
+        self._lines = {}
+        self._products = {}
+        self.subtotal = 0.0
+        self.units = 0
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __iter__(self):
+        return iter(self._lines.values())
+
+    def lines(self):
+        """
+        Get the cart lines in the order products were first added.
+
+        Returns:
+            list: Sale details as returned by build_sale_item, one per product
+        """
+        return list(self._lines.values())
+
+    def units_held(self, product):
+        """
+        Get the units (paid plus free) of a product already in the cart.
+
+        Args:
+            product (dict): Product to look up
+
+        Returns:
+            int: Units that will be taken from stock for the product
+        """
+        line = self._lines.get(product["id"])
+        return line["quantity_sold"] + line["free_quantity"] if line else 0
+
+    def available(self, product):
+        """
+        Get how many more paid units of a product can be added.
+
+        Args:
+            product (dict): Product to check
+
+        Returns:
+            int: Largest paid quantity that can still be added for the product
+        """
+        line = self._lines.get(product["id"])
+        return max_paid_quantity(product["quantity"]) - (line["quantity_sold"] if line else 0)
+
+    def add(self, product, quantity):
+        """
+        Add paid units of a product, merging them into its existing line.
+
+        Args:
+            product (dict): Product to add
+            quantity (int): Paid units to add
+
+        Returns:
+            dict: The product's updated line, or None if the combined paid and
+                  free units would exceed the product's stock. The cart is
+                  unchanged in that case
+        """
+        key = product["id"]
+        old_line = self._lines.get(key)
+        paid = quantity + (old_line["quantity_sold"] if old_line else 0)
+        if quantity <= 0 or paid + paid // 3 > product["quantity"]:
+            return None
+
+        line = build_sale_item(product, paid)
+        if old_line:
+            self.subtotal -= old_line["item_total"]
+            self.units -= old_line["quantity_sold"] + old_line["free_quantity"]
+        self.subtotal += line["item_total"]
+        self.units += line["quantity_sold"] + line["free_quantity"]
+
+        self._lines[key] = line
+        self._products[key] = product
+        return line
+
+    @property
+    def discount(self):
+        """Bulk discount amount, given once the subtotal reaches BULK_DISCOUNT_THRESHOLD."""
+        return self.subtotal * BULK_DISCOUNT_RATE if self.subtotal >= BULK_DISCOUNT_THRESHOLD else 0
+
+    @property
+    def total(self):
+        """Amount due after the bulk discount."""
+        return self.subtotal - self.discount
+
+    def commit(self, products, lot_book=None):
+        """
+        Take every line's paid and free units from stock at once.
+
+        All lines are checked against current stock first, so either every
+        decrement is applied or none is.
+
+        Args:
+            products (list): Product list the cart's products belong to,
+                             whose changed rows are saved afterwards
+            lot_book (LotBook, optional): Lots of the location, depleted
+                                          earliest expiry first
+
+        Returns:
+            list: History lines with keys name and quantity_delta, plus lots
+                  and cost_of_goods when a lot book is given, or None if a
+                  product no longer has enough stock
+        """
+        for key, line in self._lines.items():
+            if line["quantity_sold"] + line["free_quantity"] > self._products[key]["quantity"]:
+                return None
+
+        history_lines = []
+        for key, line in self._lines.items():
+            product = self._products[key]
+            units = line["quantity_sold"] + line["free_quantity"]
+            history_line = {"name": product["name"], "quantity_delta": -units}
+            if lot_book is not None:
+                consumed = lot_book.deplete(product, units)
+                history_line["lots"] = consumed
+                history_line["cost_of_goods"] = cost_of_goods(consumed)
+            product["quantity"] -= units
+            mark_dirty(product, products)
+            publish_change("sale", product, quantity_delta=-units)
+            metrics.increment("wecare_units_sold_total", units)
+            history_lines.append(history_line)
+        return history_lines
@@ -0,0 +1,440 @@
+import argparse
+import shlex
+import sys
+from src import logger, metrics
+from src.history_manager import record_transactions
+from src.inventory_events import publish_change
+from src.location_manager import DEFAULT_LOCATION, get_location_file, list_locations
+from src.lot_manager import display_expiring_lots, get_lot_book, parse_expiry
+from src.product_manager import mark_dirty, save_product_changes, weighted_average_cost
+from src.product_store import load_products_cached, refresh_store
+
+class CommandError(Exception):
+    """Raised when a command is malformed or cannot be applied to the catalog."""
+
+class CommandParser(argparse.ArgumentParser):
+    """Argument parser that raises CommandError instead of exiting the process."""
+
+    def error(self, message):
+        raise CommandError(message)
+
+def build_parser(batch=False):
+    """
+    Build the parser for command mode.
+
+    Args:
+        batch (bool, optional): Build the parser for single lines of a command
+                                file or the shell, which only accepts the
+                                commands that change the catalog
+
+    Returns:
+        CommandParser: The argument parser
+    """
+    parser = CommandParser(prog="" if batch else "python main.py", add_help=not batch,
+                           description="Run inventory commands without the interactive menu. "
+                                       "The catalog is loaded once and changes are saved once at the end.")
+    if not batch:
+        parser.add_argument("--location", default=DEFAULT_LOCATION,
+                            help=f"location to run the commands against (default: {DEFAULT_LOCATION})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    edit = subparsers.add_parser("edit", help="change the details of a product")
+    edit.add_argument("--sku", required=True, help="product ID or name")
+    edit.add_argument("--name", help="new product name")
+    edit.add_argument("--brand", help="new brand")
+    edit.add_argument("--quantity", type=int, help="new stock quantity")
+    edit.add_argument("--cost-price", type=float, help="new cost price")
+    edit.add_argument("--country", help="new country of origin")
+
+    restock = subparsers.add_parser("restock", help="add stock to a product")
+    restock.add_argument("--sku", required=True, help="product ID or name")
+    restock.add_argument("--quantity", type=int, required=True, help="units to add")
+    restock.add_argument("--cost-price", type=float,
+                         help="cost price of the delivered units, averaged into the product's cost price "
+                              "(default: the current cost price)")
+    restock.add_argument("--expiry", type=parse_expiry, default="",
+                         help="expiry date of the new lot as YYYY-MM-DD, none by default")
+
+    add = subparsers.add_parser("add", help="add a new product")
+    add.add_argument("--name", required=True, help="product name")
+    add.add_argument("--brand", default="Generic", help="brand (default: Generic)")
+    add.add_argument("--quantity", type=int, default=0, help="initial quantity (default: 0)")
+    add.add_argument("--cost-price", type=float, required=True, help="cost price")
+    add.add_argument("--country", default="Unknown", help="country of origin (default: Unknown)")
+
+    if not batch:
+        subparsers.add_parser("report", help="show the inventory valuation report")
+
+        expiring = subparsers.add_parser("expiring", help="list lots that expire soon")
+        expiring.add_argument("--days", type=int, default=30, help="days from today (default: 30)")
+
+        run = subparsers.add_parser("run", help="run a file of commands, one per line")
+        run.add_argument("file", help="command file, or - to read commands from standard input")
+        run.add_argument("--keep-going", action="store_true",
+                         help="skip failing lines instead of abandoning the whole batch")
+
+        subparsers.add_parser("shell", help="enter commands interactively against one loaded catalog")
+
+    return parser
+
+class CommandSession:
+    """
+    A loaded catalog that commands are applied to in memory.
+
+    Every command changes the products and queues its history lines.
+    Nothing is written until save is called, which records the queued
+    transactions and writes all changed rows at once, so a batch of
+    thousands of edits costs one load and one save.
+    """
+
+    def __init__(self, location=DEFAULT_LOCATION):
+        """
+        Load the catalog of a location.
+
+        Args:
+            location (str, optional): Name of the location
+
+        Raises:
+            CommandError: If the location does not exist
+        """
+        if location not in list_locations():
+            raise CommandError(f"Unknown location: {location}")
+        self.file_path = get_location_file(location)
+        self.products = load_products_cached(self.file_path)
+        self.by_name = {product["name"].lower(): product for product in self.products}
+        self.lot_book = get_lot_book(self.file_path)
+        self.order_book = None
+        self.pending = []
+        self.restock_details = []
+
+    def find_product(self, sku):
+        """
+        Find a product by its ID or name (case-insensitive).
+
+        Args:
+            sku (str): Product ID or name
+
+        Returns:
+            dict: The product
+
+        Raises:
+            CommandError: If there is no such product
+        """
+        product = None
+        if sku.isdigit():
+            index = int(sku) - 1
+            if 0 <= index < len(self.products):
+                product = self.products[index]
+        else:
+            product = self.by_name.get(sku.lower())
+        if product is None:
+            raise CommandError(f"Product not found: {sku}")
+        return product
+
+    def queue_history(self, change_type, line):
+        """Queue a history line, merging consecutive commands of the same type into one transaction."""
+        if self.pending and self.pending[-1][0] == change_type:
+            self.pending[-1][1].append(line)
+        else:
+            self.pending.append((change_type, [line]))
+
+    def execute(self, args):
+        """
+        Apply a parsed command to the catalog.
+
+        Args:
+            args (argparse.Namespace): Parsed edit, restock or add command
+
+        Returns:
+            None
+
+        Raises:
+            CommandError: If the command cannot be applied. The catalog is
+                          unchanged in that case
+        """
+        if args.command == "edit":
+            self.edit(args)
+        elif args.command == "restock":
+            self.restock(args)
+        elif args.command == "add":
+            self.add(args)
+
+    def edit(self, args):
+        """Apply an edit command."""
+        product = self.find_product(args.sku)
+        changes = {field: getattr(args, field) for field in ("name", "brand", "quantity", "cost_price", "country")
+                   if getattr(args, field) is not None}
+        if not changes:
+            raise CommandError("Nothing to change. Give at least one of --name, --brand, --quantity, "
+                               "--cost-price or --country.")
+        if changes.get("quantity", 0) < 0:
+            raise CommandError("Quantity cannot be negative.")
+        if changes.get("cost_price", 0) < 0:
+            raise CommandError("Cost price cannot be negative.")
+        for field in ("name", "brand", "country"):
+            if field in changes and not changes[field].strip():
+                raise CommandError(f"{field.capitalize()} cannot be empty.")
+        new_name = changes.get("name", product["name"]).strip()
+        if new_name.lower() != product["name"].lower() and new_name.lower() in self.by_name:
+            raise CommandError(f"Product '{new_name}' already exists.")
+
+        old_name = product["name"]
+        history_line = {"name": old_name, "quantity_delta": changes.get("quantity", product["quantity"]) - product["quantity"]}
+        if new_name != old_name:
+            history_line["new_name"] = new_name
+            del self.by_name[old_name.lower()]
+            self.by_name[new_name.lower()] = product
+        if "cost_price" in changes:
+            history_line["cost_price"] = changes["cost_price"]
+            history_line["old_cost_price"] = product["cost_price"]
+
+        for field, value in changes.items():
+            product[field] = value.strip() if isinstance(value, str) else value
+        if product["name"] != old_name:
+            # Imported here so edits that keep the name do not load the purchase orders
+            from src.purchase_order_manager import get_order_book
+            self.order_book = get_order_book(self.file_path)
+            self.order_book.rename(old_name, product["name"])
+            self.lot_book.rename(old_name, product["name"])
+        if history_line["quantity_delta"] < 0:
+            self.lot_book.reconcile(product)
+        mark_dirty(product, self.products)
+        publish_change("edit", product, name=old_name, quantity_delta=history_line["quantity_delta"])
+        self.queue_history("edit", history_line)
+        logger.info("Updated %s: %s", old_name, ", ".join(f"{field}={value}" for field, value in changes.items()),
+                    rate_limit=True, product=old_name)
+
+    def restock(self, args):
+        """Apply a restock command."""
+        product = self.find_product(args.sku)
+        if args.quantity <= 0:
+            raise CommandError("Quantity must be a positive integer.")
+        cost_price = product["cost_price"] if args.cost_price is None else args.cost_price
+        if cost_price < 0:
+            raise CommandError("Cost price cannot be negative.")
+
+        old_quantity = product["quantity"]
+        old_cost_price = product["cost_price"]
+        average_cost = weighted_average_cost(product, args.quantity, cost_price)
+        product["quantity"] += args.quantity
+        product["cost_price"] = average_cost
+        mark_dirty(product, self.products)
+        publish_change("restock", product, quantity_delta=args.quantity, old_cost_price=old_cost_price)
+        metrics.increment("wecare_units_restocked_total", args.quantity)
+        lot_id = self.lot_book.add_lot(product["name"], args.quantity, cost_price, args.expiry)
+
+        self.queue_history("restock", {"name": product["name"], "quantity_delta": args.quantity,
+                                       "cost_price": average_cost, "old_cost_price": old_cost_price,
+                                       "lot": lot_id})
+        self.restock_details.append({
+            "product_name": product["name"],
+            "brand": product["brand"],
+            "quantity": args.quantity,
+            "cost_price": cost_price,
+            "average_cost": average_cost,
+            "old_quantity": old_quantity,
+            "old_cost_price": old_cost_price,
+            "item_cost": cost_price * args.quantity,
+            "lot": lot_id,
+            "expiry": args.expiry
+        })
+        logger.info("Restocked %s: +%d units at ₹%.2f, average cost ₹%.2f", product["name"], args.quantity,
+                    cost_price, average_cost, rate_limit=True, product=product["name"])
+
+    def add(self, args):
+        """Apply an add command."""
+        name = args.name.strip()
+        if not name:
+            raise CommandError("Product name cannot be empty.")
+        if name.lower() in self.by_name:
+            raise CommandError(f"Product '{name}' already exists. Use edit instead.")
+        if args.quantity < 0:
+            raise CommandError("Quantity cannot be negative.")
+        if args.cost_price < 0:
+            raise CommandError("Cost price cannot be negative.")
+
+        product = {
+            "name": name,
+            "brand": args.brand.strip() or "Generic",
+            "quantity": args.quantity,
+            "cost_price": args.cost_price,
+            "country": args.country.strip() or "Unknown",
+            "id": len(self.products) + 1
+        }
+        self.products.append(product)
+        self.by_name[name.lower()] = product
+        mark_dirty(product, self.products)
+        publish_change("add", product, quantity_delta=args.quantity)
+        self.queue_history("add", {"name": name, "quantity_delta": args.quantity, "cost_price": args.cost_price})
+        logger.info("Added %s with %d units", name, args.quantity, rate_limit=True, product=name)
+
+    def save(self):
+        """
+        Record the queued transactions and write every changed product.
+
+        Consecutive restocks share one restock invoice and transaction.
+
+        Returns:
+            list: IDs of the recorded transactions
+        """
+        if not self.pending:
+            logger.info("No changes to save.", file=self.file_path)
+            return []
+
+        # Imported here so edits alone do not load the invoicing code
+        from src.restock_manager import generate_restock_invoice
+
+        transactions = []
+        restocked = 0
+        for change_type, lines in self.pending:
+            reference = None
+            if change_type == "restock":
+                details = self.restock_details[restocked:restocked + len(lines)]
+                restocked += len(lines)
+                reference = generate_restock_invoice(details, sum(item["item_cost"] for item in details))
+                metrics.increment("wecare_restocks_total")
+            transactions.append((change_type, lines, reference))
+
+        txn_ids = record_transactions(transactions, self.products, self.file_path)
+        save_product_changes(self.products, self.file_path)
+        refresh_store(self.products, self.file_path)
+        self.lot_book.save()
+        if self.order_book is not None:
+            self.order_book.save()
+        logger.success("Applied %d changes in %d transactions (%s).", sum(len(lines) for _, lines, _ in transactions),
+                       len(txn_ids), ", ".join(txn_ids), file=self.file_path, transactions=txn_ids)
+
+        self.pending = []
+        self.restock_details = []
+        return txn_ids
+
+def read_command_lines(file_path):
+    """
+    Read the commands of a command file.
+
+    Blank lines and lines starting with # are skipped.
+
+    Args:
+        file_path (str): Path of the command file, or - for standard input
+
+    Yields:
+        tuple: (line number, command line)
+    """
+    file = sys.stdin if file_path == "-" else open(file_path, "r", encoding="utf-8")
+    try:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line_number, line
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+def run_command_file(session, file_path, keep_going=False):
+    """
+    Run every command of a command file against one session and save once.
+
+    By default the first failing line abandons the whole batch without
+    writing anything, so a command file is applied completely or not at all.
+
+    Args:
+        session (CommandSession): Loaded catalog
+        file_path (str): Path of the command file, or - for standard input
+        keep_going (bool, optional): Skip failing lines and save the rest
+
+    Returns:
+        int: Number of failed lines
+    """
+    parser = build_parser(batch=True)
+    failed = 0
+    for line_number, line in read_command_lines(file_path):
+        try:
+            session.execute(parser.parse_args(shlex.split(line)))
+        except (CommandError, ValueError) as e:
+            failed += 1
+            logger.error("Line %d: %s", line_number, e, line=line_number)
+            if not keep_going:
+                logger.error("Batch abandoned, no changes were saved.")
+                return failed
+
+    session.save()
+    return failed
+
+def run_shell(session):
+    """
+    Read commands interactively and apply them to one loaded catalog.
+
+    Besides edit, restock and add, the shell understands save (write all
+    changes so far), help and exit. Changes are saved on exit.
+
+    Args:
+        session (CommandSession): Loaded catalog
+
+    Returns:
+        None
+    """
+    parser = build_parser(batch=True)
+    print("WeCare command shell. Type 'help' for commands, 'exit' to save and quit.")
+    while True:
+        try:
+            line = input("wecare> ").strip()
+        except EOFError:
+            print()
+            break
+        if not line or line.startswith("#"):
+            continue
+        if line in ("exit", "quit"):
+            break
+        if line == "save":
+            session.save()
+            continue
+        if line == "help":
+            parser.print_help()
+            continue
+        try:
+            session.execute(parser.parse_args(shlex.split(line)))
+        except (CommandError, ValueError) as e:
+            logger.error(f"Error: {e}")
+        except SystemExit:
+            # Raised by argparse after printing the help of a command
+            pass
+    session.save()
+
+def run_commands(argv):
+    """
+    Run command mode, e.g. "python main.py edit --sku 12 --cost-price 250".
+
+    Args:
+        argv (list): Command-line arguments after the script name, without
+                     the logging and metrics options handled by main
+
+    Returns:
+        int: Process exit status, 0 on success
+    """
+    try:
+        args = build_parser().parse_args(argv)
+
+        if args.command == "report":
+            from src.analytics import display_inventory_report
+            display_inventory_report(get_location_file(args.location))
+            return 0
+        if args.command == "expiring":
+            display_expiring_lots(get_location_file(args.location), args.days)
+            return 0
+
+        session = CommandSession(args.location)
+        if args.command == "run":
+            return 1 if run_command_file(session, args.file, args.keep_going) else 0
+        if args.command == "shell":
+            run_shell(session)
+            return 0
+
+        session.execute(args)
+        session.save()
+        return 0
+    except CommandError as e:
+        logger.error(f"Error: {e}")
+        return 2
+    except (OSError, ValueError) as e:
+        logger.error(f"Error: {e}")
+        return 1
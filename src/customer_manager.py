@@ -0,0 +1,283 @@
+import os
+from src import logger
+
+CUSTOMERS_FILE = "data/customers.txt"
+CUSTOMER_HISTORY_DIR = "data/customer_history"
+
+# (minimum previous purchases, discount rate, tier name), best tier first
+LOYALTY_TIERS = (
+    (10, 0.05, "Gold"),
+    (5, 0.03, "Silver"),
+    (3, 0.02, "Bronze")
+)
+
+# Total column of a history row that marks an earlier sale as voided or fully returned
+REVERSED_MARKER = "reversed"
+
+# Customers loaded from CUSTOMERS_FILE, cached for the session
+_customers = None
+
+def load_customers():
+    """
+    Load all customers, reading the customer file only once per session.
+
+    Returns:
+        dict: Customer directory with keys by_id (customer ID to customer)
+              and by_name (lowercase name to customer)
+    """
+    global _customers
+    if _customers is not None:
+        return _customers
+
+    _customers = {"by_id": {}, "by_name": {}}
+    if os.path.exists(CUSTOMERS_FILE):
+        with open(CUSTOMERS_FILE, "r") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                customer_id, name = line.rstrip("\n").split(",", 1)
+                _index_customer({"id": customer_id, "name": name})
+    return _customers
+
+def _index_customer(customer):
+    """Add a customer to the in-memory directory."""
+    _customers["by_id"][customer["id"]] = customer
+    _customers["by_name"].setdefault(customer["name"].lower(), customer)
+
+def find_customer(name_or_id):
+    """
+    Find a customer by ID (e.g. C0007) or by name (case-insensitive).
+
+    Args:
+        name_or_id (str): Customer ID or name
+
+    Returns:
+        dict: Customer with keys id and name, or None if not found
+    """
+    customers = load_customers()
+    value = name_or_id.strip()
+    return customers["by_id"].get(value.upper()) or customers["by_name"].get(value.lower())
+
+def get_or_create_customer(name):
+    """
+    Get the customer with a name, registering a new customer if there is none.
+
+    New customers get the next stable ID, which never changes afterwards.
+
+    Args:
+        name (str): Customer name
+
+    Returns:
+        dict: Customer with keys id and name
+    """
+    customer = find_customer(name)
+    if customer:
+        return customer
+
+    customers = load_customers()
+    customer = {"id": f"C{len(customers['by_id']) + 1:04d}", "name": name.strip()}
+
+    directory = os.path.dirname(CUSTOMERS_FILE)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(CUSTOMERS_FILE, "a") as file:
+        file.write(f"{customer['id']},{customer['name']}\n")
+
+    _index_customer(customer)
+    logger.success(f"Registered new customer {customer['name']} with ID {customer['id']}.", customer=customer["id"])
+    return customer
+
+def get_history_file(customer_id):
+    """
+    Get the path of a customer's purchase history file.
+
+    Args:
+        customer_id (str): Customer ID
+
+    Returns:
+        str: Path to the history file
+    """
+    return os.path.join(CUSTOMER_HISTORY_DIR, f"{customer_id}.txt")
+
+def record_customer_sale(customer_id, date, txn_id, total, invoice_path):
+    """
+    Add a completed sale to a customer's purchase history.
+
+    Each customer has their own history file, so recording a sale is a single
+    append and looking up a customer's history never touches other customers'
+    sales or invoice files.
+
+    Args:
+        customer_id (str): Customer ID
+        date (str): Sale date in YYYY-MM-DD format
+        txn_id (str): Transaction ID of the sale
+        total (float): Amount paid
+        invoice_path (str): Path to the sale's invoice
+
+    Returns:
+        None
+    """
+    os.makedirs(CUSTOMER_HISTORY_DIR, exist_ok=True)
+    with open(get_history_file(customer_id), "a") as file:
+        file.write(f"{date},{txn_id},{total:.2f},{invoice_path}\n")
+
+def record_customer_reversal(customer_id, date, txn_id, reversal_id):
+    """
+    Mark a sale in a customer's purchase history as voided or fully returned.
+
+    The reversal is appended as its own row, so the history file stays
+    append-only. Reversed sales no longer count toward the loyalty tier.
+
+    Args:
+        customer_id (str): Customer ID
+        date (str): Reversal date in YYYY-MM-DD format
+        txn_id (str): Transaction ID of the reversed sale
+        reversal_id (str): Transaction ID of the void or return
+
+    Returns:
+        None
+    """
+    os.makedirs(CUSTOMER_HISTORY_DIR, exist_ok=True)
+    with open(get_history_file(customer_id), "a") as file:
+        file.write(f"{date},{txn_id},{REVERSED_MARKER},{reversal_id}\n")
+
+def get_purchase_history(customer_id):
+    """
+    Get all purchases of a customer, oldest first.
+
+    Args:
+        customer_id (str): Customer ID
+
+    Returns:
+        list: One dictionary per sale with keys date, txn_id, total, invoice
+              and reversed (ID of the void or return that reversed the
+              whole sale, or None)
+    """
+    history = []
+    history_file = get_history_file(customer_id)
+    if not os.path.exists(history_file):
+        return history
+
+    reversals = {}
+    with open(history_file, "r") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            date, txn_id, total, invoice_path = line.rstrip("\n").split(",", 3)
+            if total == REVERSED_MARKER:
+                reversals[txn_id] = invoice_path
+                continue
+            history.append({"date": date, "txn_id": txn_id, "total": float(total), "invoice": invoice_path})
+    for sale in history:
+        sale["reversed"] = reversals.get(sale["txn_id"])
+    return history
+
+def get_loyalty_tier(purchase_count):
+    """
+    Get the loyalty tier earned by a number of previous purchases.
+
+    Args:
+        purchase_count (int): Number of previous purchases
+
+    Returns:
+        tuple: (discount rate, tier name), or (0, None) below the lowest tier
+    """
+    for minimum, rate, tier in LOYALTY_TIERS:
+        if purchase_count >= minimum:
+            return rate, tier
+    return 0, None
+
+def get_loyalty_discount_rate(customer):
+    """
+    Get the loyalty discount a customer receives on their next purchase.
+
+    Sales that were voided or fully returned do not count.
+
+    Args:
+        customer (dict): Customer with keys id and name
+
+    Returns:
+        tuple: (discount rate, tier name), or (0, None) if not eligible
+    """
+    history = get_purchase_history(customer["id"])
+    return get_loyalty_tier(sum(1 for sale in history if not sale["reversed"]))
+
+def display_purchase_history(customer):
+    """
+    Display a customer's purchase history and loyalty status.
+
+    Args:
+        customer (dict): Customer with keys id and name
+
+    Returns:
+        None
+    """
+    history = get_purchase_history(customer["id"])
+    purchases = [sale for sale in history if not sale["reversed"]]
+    rate, tier = get_loyalty_tier(len(purchases))
+
+    print("\n" + "="*80)
+    print(f"Customer: {customer['name']} ({customer['id']})")
+    print(f"Loyalty tier: {tier or 'None'}" + (f" - {rate * 100:.0f}% off every purchase" if tier else ""))
+    print("="*80)
+    if not history:
+        print("No purchases recorded yet.")
+        return
+
+    print(f"{'Date':<12}{'Transaction':<14}{'Total':>12}  {'Invoice'}")
+    print("-"*80)
+    for sale in history:
+        note = f" (reversed by {sale['reversed']})" if sale["reversed"] else ""
+        print(f"{sale['date']:<12}{sale['txn_id']:<14}{'₹' + format(sale['total'], '.2f'):>12}  "
+              f"{sale['invoice']}{note}")
+    print("-"*80)
+    print(f"{'Purchases:':<26}{len(purchases):>12}")
+    print(f"{'Total spent:':<26}{'₹' + format(sum(s['total'] for s in purchases), '.2f'):>12}")
+
+def manage_customers():
+    """
+    Display the customer submenu.
+
+    Allows looking up a customer's purchase history by name or ID and
+    listing all registered customers.
+
+    Returns:
+        None
+    """
+    while True:
+        # Display submenu header
+        print("\n" + "="*80)
+        print(" "*30 + "CUSTOMERS" + " "*30)
+        print("="*80)
+
+        # Display menu options
+        print("\n  1. Purchase History     - Show a customer's purchases and loyalty tier")
+        print("  2. List Customers       - Show all registered customers")
+        print("  3. Return to Main Menu  - Go back to main menu")
+
+        try:
+            choice = int(input("\nEnter your choice (1-3): "))
+        except ValueError:
+            logger.error("Invalid input. Please enter a valid number.")
+            continue
+
+        if choice == 1:
+            customer = find_customer(input("\nEnter customer name or ID: "))
+            if customer is None:
+                logger.error("Customer not found. Please try again.")
+                continue
+            display_purchase_history(customer)
+        elif choice == 2:
+            customers = load_customers()["by_id"]
+            if not customers:
+                logger.warning("No customers registered yet.")
+                continue
+            print(f"\n{'ID':<10}{'Name':<30}")
+            print("-"*40)
+            for customer in customers.values():
+                print(f"{customer['id']:<10}{customer['name']:<30}")
+            print("-"*40)
+        elif choice == 3:
+            return
+        else:
+            logger.error("Invalid choice. Please enter a number between 1 and 3.")
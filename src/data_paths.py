@@ -0,0 +1,25 @@
+import os
+
+# Default product file used by the main store location
+PRODUCTS_FILE = "data/products.txt"
+
+# The main store keeps using the original product file so existing data still loads
+DEFAULT_LOCATION = "main"
+LOCATIONS_DIR = "data/locations"
+
+def get_location_file(location):
+    """
+    Get the path of the product shard file for a location.
+
+    Each location keeps its stock in its own file so it can be loaded and
+    written independently of every other location.
+
+    Args:
+        location (str): Name of the store or warehouse location
+
+    Returns:
+        str: Path to the product file for the location
+    """
+    if location == DEFAULT_LOCATION:
+        return PRODUCTS_FILE
+    return os.path.join(LOCATIONS_DIR, f"{location}.txt")
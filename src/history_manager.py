@@ -0,0 +1,310 @@
+import json
+import os
+import time
+from collections import deque
+
+# A full checkpoint of stock and cost prices is written every this many transactions
+CHECKPOINT_INTERVAL = 500
+
+# Next sequence number, transactions since the last checkpoint and whether the base checkpoint
+# exists, per history directory
+_history_state = {}
+
+def get_history_dir(file_path):
+    """
+    Get the directory holding the inventory history of a product file.
+
+    Args:
+        file_path (str): Path to the product file, e.g. data/products.txt
+
+    Returns:
+        str: History directory, e.g. data/products_history
+    """
+    return os.path.splitext(file_path)[0] + "_history"
+
+def _apply_lines(state, lines, reverse=False):
+    """
+    Apply the product changes of one transaction to a stock state.
+
+    Args:
+        state (dict): Mapping of product name to [quantity, cost_price]
+        lines (list): Transaction lines
+        reverse (bool, optional): Undo the lines instead of applying them
+
+    Returns:
+        None
+    """
+    for line in (reversed(lines) if reverse else lines):
+        name, new_name = line["name"], line.get("new_name")
+        if reverse and new_name:
+            name, new_name = new_name, name
+
+        entry = state.pop(name, [0, line.get("cost_price", 0.0)])
+        delta = line.get("quantity_delta", 0)
+        entry[0] += -delta if reverse else delta
+        cost_key = "old_cost_price" if reverse else "cost_price"
+        if line.get(cost_key) is not None:
+            entry[1] = line[cost_key]
+        state[new_name or name] = entry
+
+def _load_state(history_dir):
+    """Get the cached sequence state of a history directory, reading it from disk once."""
+    if history_dir in _history_state:
+        return _history_state[history_dir]
+
+    checkpoints = read_checkpoint_index(history_dir)
+    state = {"next_seq": 1, "since_checkpoint": 0, "has_base": bool(checkpoints)}
+    last_entry = _read_last_line(os.path.join(history_dir, "deltas.log"))
+    if last_entry:
+        state["next_seq"] = last_entry["seq"] + 1
+        if checkpoints:
+            state["since_checkpoint"] = last_entry["seq"] - checkpoints[-1]["seq"]
+    _history_state[history_dir] = state
+    return state
+
+def _stock_state(products):
+    """Get the stock of a product list as a mapping of product name to [quantity, cost_price]."""
+    return {p["name"]: [p["quantity"], p["cost_price"]] for p in products}
+
+def _read_last_line(path):
+    """Read and decode the last JSON line of a file without reading the whole file."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, "rb") as file:
+        file.seek(0, os.SEEK_END)
+        position = file.tell()
+        chunk = b""
+        while position > 0 and chunk.count(b"\n") < 2:
+            step = min(4096, position)
+            position -= step
+            file.seek(position)
+            chunk = file.read(step) + chunk
+    return json.loads(chunk.rstrip(b"\n").rsplit(b"\n", 1)[-1])
+
+def read_checkpoint_index(history_dir):
+    """
+    Read the list of checkpoints of a history directory.
+
+    Args:
+        history_dir (str): History directory
+
+    Returns:
+        list: Checkpoint entries in sequence order, each with keys seq, ts,
+              offset (byte offset of the next delta in deltas.log) and file
+    """
+    index_path = os.path.join(history_dir, "checkpoints.idx")
+    checkpoints = []
+    if os.path.exists(index_path):
+        with open(index_path, "r") as file:
+            for line in file:
+                seq, ts, offset, file_name = line.rstrip("\n").split(",", 3)
+                checkpoints.append({"seq": int(seq), "ts": float(ts), "offset": int(offset), "file": file_name})
+    return checkpoints
+
+def write_checkpoint(history_dir, seq, state, timestamp):
+    """
+    Write a full checkpoint of stock and cost prices.
+
+    Args:
+        history_dir (str): History directory
+        seq (int): Sequence number of the last transaction included
+        state (dict): Mapping of product name to [quantity, cost_price]
+        timestamp (float): Time the checkpoint represents
+
+    Returns:
+        None
+    """
+    log_path = os.path.join(history_dir, "deltas.log")
+    offset = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+    file_name = f"checkpoint_{seq}.json"
+
+    with open(os.path.join(history_dir, file_name), "w") as file:
+        json.dump({"seq": seq, "ts": timestamp, "products": state}, file)
+    with open(os.path.join(history_dir, "checkpoints.idx"), "a") as file:
+        file.write(f"{seq},{timestamp},{offset},{file_name}\n")
+
+def record_transaction(change_type, lines, products, file_path, reference=None, reverses=None, customer=None):
+    """
+    Append a committed transaction to the inventory history of a product file.
+
+    The history is an append-only log of per-product deltas plus periodic
+    checkpoints of the full stock. The first transaction also writes a base
+    checkpoint of the stock as it was before that transaction. The products
+    are only read when a checkpoint is written, so recording a transaction
+    does not depend on the size of the catalog.
+
+    Args:
+        change_type (str): Kind of transaction, e.g. "sale", "restock", "edit",
+                           "add", "transfer", "void" or "return"
+        lines (list): One dictionary per product with keys name,
+                      quantity_delta and optionally cost_price,
+                      old_cost_price and new_name (for renames)
+        products (list): Products after the transaction was applied
+        file_path (str): Product file the products belong to
+        reference (str, optional): Related document, e.g. an invoice path
+        reverses (str, optional): ID of the transaction this one reverses
+        customer (str, optional): ID of the registered customer of a sale
+
+    Returns:
+        str: ID of the recorded transaction, e.g. TXN-42
+    """
+    history_dir = get_history_dir(file_path)
+    state = _load_state(history_dir)
+    timestamp = time.time()
+
+    if not state["has_base"]:
+        os.makedirs(history_dir, exist_ok=True)
+        before = _stock_state(products)
+        _apply_lines(before, lines, reverse=True)
+        write_checkpoint(history_dir, 0, before, timestamp)
+        state["has_base"] = True
+
+    seq = state["next_seq"]
+    entry = {
+        "seq": seq,
+        "txn_id": f"TXN-{seq}",
+        "type": change_type,
+        "ts": timestamp,
+        "lines": lines,
+        "reference": reference,
+        "reverses": reverses
+    }
+    if customer:
+        entry["customer"] = customer
+    with open(os.path.join(history_dir, "deltas.log"), "a") as file:
+        file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    state["next_seq"] = seq + 1
+    state["since_checkpoint"] += 1
+    if state["since_checkpoint"] >= CHECKPOINT_INTERVAL:
+        write_checkpoint(history_dir, seq, _stock_state(products), timestamp)
+        state["since_checkpoint"] = 0
+
+    return entry["txn_id"]
+
+def record_transactions(transactions, products, file_path):
+    """
+    Append several transactions that were applied one after another but are committed together.
+
+    The products only show the stock after the last transaction, so the
+    stock after an earlier one is rebuilt by undoing the transactions that
+    followed it. That stock is only needed where a checkpoint is written,
+    so it is copied for those transactions alone and the rest are recorded
+    without a snapshot.
+
+    Args:
+        transactions (list): (change_type, lines, reference) tuples in the
+                             order they were applied
+        products (list): Products after all transactions were applied
+        file_path (str): Product file the products belong to
+
+    Returns:
+        list: IDs of the recorded transactions, in order
+    """
+    state = _load_state(get_history_dir(file_path))
+    # The base checkpoint is rebuilt from the stock after the first transaction
+    needed = set() if state["has_base"] else {0}
+    since_checkpoint = state["since_checkpoint"]
+    for index in range(len(transactions)):
+        since_checkpoint += 1
+        if since_checkpoint >= CHECKPOINT_INTERVAL:
+            needed.add(index)
+            since_checkpoint = 0
+
+    snapshots = {}
+    if needed:
+        stock = _stock_state(products)
+        for index in range(len(transactions) - 1, min(needed) - 1, -1):
+            if index in needed:
+                snapshots[index] = [{"name": name, "quantity": quantity, "cost_price": cost_price}
+                                    for name, (quantity, cost_price) in stock.items()]
+            _apply_lines(stock, transactions[index][1], reverse=True)
+
+    # Transactions without a checkpoint never read the products, so they get an empty list
+    return [record_transaction(change_type, lines, snapshots.get(index, []), file_path, reference=reference)
+            for index, (change_type, lines, reference) in enumerate(transactions)]
+
+def iter_transactions(file_path, offset=0):
+    """
+    Iterate over the recorded transactions of a product file in order.
+
+    Args:
+        file_path (str): Product file
+        offset (int, optional): Byte offset in the log to start from
+
+    Yields:
+        dict: Transaction entries as written by record_transaction
+    """
+    log_path = os.path.join(get_history_dir(file_path), "deltas.log")
+    if not os.path.exists(log_path):
+        return
+    with open(log_path, "r") as file:
+        file.seek(offset)
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+def get_recent_transactions(file_path, limit=20):
+    """
+    Get the most recent transactions of a product file.
+
+    Args:
+        file_path (str): Product file
+        limit (int, optional): Maximum number of transactions to return
+
+    Returns:
+        list: Transaction entries, oldest first
+    """
+    return list(deque(iter_transactions(file_path), maxlen=limit))
+
+def find_transaction(file_path, txn_id):
+    """
+    Find a transaction and every transaction that reverses it.
+
+    Args:
+        file_path (str): Product file
+        txn_id (str): Transaction ID, e.g. TXN-42
+
+    Returns:
+        tuple: (transaction entry or None, list of reversing entries)
+    """
+    transaction = None
+    reversals = []
+    for entry in iter_transactions(file_path):
+        if entry["txn_id"] == txn_id:
+            transaction = entry
+        elif entry.get("reverses") == txn_id:
+            reversals.append(entry)
+    return transaction, reversals
+
+def reconstruct_stock_at(file_path, timestamp):
+    """
+    Reconstruct stock and cost prices as they were at a point in time.
+
+    Starts from the latest checkpoint taken at or before the timestamp and
+    replays only the deltas recorded after it, so the cost depends on the
+    checkpoint interval rather than on the length of the history.
+
+    Args:
+        file_path (str): Product file
+        timestamp (float): Point in time as a Unix timestamp
+
+    Returns:
+        dict: Mapping of product name to {"quantity": int, "cost_price": float},
+              or None if the history does not reach back to the timestamp
+    """
+    history_dir = get_history_dir(file_path)
+    checkpoints = [c for c in read_checkpoint_index(history_dir) if c["ts"] <= timestamp]
+    if not checkpoints:
+        return None
+
+    checkpoint = checkpoints[-1]
+    with open(os.path.join(history_dir, checkpoint["file"]), "r") as file:
+        state = json.load(file)["products"]
+
+    for entry in iter_transactions(file_path, checkpoint["offset"]):
+        if entry["ts"] > timestamp:
+            break
+        _apply_lines(state, entry["lines"])
+
+    return {name: {"quantity": quantity, "cost_price": cost_price} for name, (quantity, cost_price) in state.items()}
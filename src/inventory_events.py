@@ -0,0 +1,75 @@
+import time
+
+# Callbacks notified of every committed inventory change
+_subscribers = []
+
+# Monotonic counter bumped by every published change
+_version = 0
+
+def subscribe(callback):
+    """
+    Register a callback to be notified of inventory changes.
+
+    Args:
+        callback (callable): Function called with each change event dictionary
+
+    Returns:
+        None
+    """
+    if callback not in _subscribers:
+        _subscribers.append(callback)
+
+def unsubscribe(callback):
+    """
+    Stop notifying a previously registered callback.
+
+    Args:
+        callback (callable): Function passed to subscribe
+
+    Returns:
+        None
+    """
+    if callback in _subscribers:
+        _subscribers.remove(callback)
+
+def get_version():
+    """
+    Get the version of the inventory, bumped by every published change.
+
+    Returns:
+        int: Current inventory version
+    """
+    return _version
+
+def publish_change(change_type, product, name=None, **details):
+    """
+    Publish a committed change to a product.
+
+    Managers call this after a sale, restock, edit or new product has been
+    applied to the in-memory product list.
+
+    Args:
+        change_type (str): Kind of change, e.g. "sale", "restock", "edit" or "add"
+        product (dict): The product after the change
+        name (str, optional): Name the product had before the change, used to
+                              identify renamed products. Defaults to the current name
+        **details: Extra fields describing the change (e.g. quantity_delta)
+
+    Returns:
+        dict: The published event
+    """
+    global _version
+    _version += 1
+
+    event = {
+        "version": _version,
+        "type": change_type,
+        "name": name if name is not None else product["name"],
+        "product": dict(product),
+        "timestamp": time.time()
+    }
+    event.update(details)
+
+    for callback in list(_subscribers):
+        callback(event)
+    return event
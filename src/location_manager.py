@@ -0,0 +1,331 @@
+import os
+from src import logger
+from src.data_paths import DEFAULT_LOCATION, LOCATIONS_DIR, get_location_file
+from src.history_manager import record_transaction
+from src.inventory_events import publish_change
+from src.lot_manager import get_lot_book
+from src.product_manager import (load_products, mark_dirty, save_product_changes, update_product_file,
+                                 weighted_average_cost)
+
+AVAILABILITY_INDEX_FILE = "data/availability_index.json"
+
+# Files kept next to a location's product file that are not locations themselves
+AUXILIARY_FILE_SUFFIXES = ("_lots.txt", "_rejected.txt", "_orders.txt")
+
+def list_locations():
+    """
+    List all known store and warehouse locations.
+
+    The main store is always listed first, followed by every shard file
+    found in the locations directory in alphabetical order. Lot files and
+    other files kept next to the shards are skipped.
+
+    Returns:
+        list: Names of all locations
+    """
+    locations = [DEFAULT_LOCATION]
+    if os.path.isdir(LOCATIONS_DIR):
+        for file_name in sorted(os.listdir(LOCATIONS_DIR)):
+            if file_name.endswith(".txt") and not file_name.endswith(AUXILIARY_FILE_SUFFIXES):
+                locations.append(file_name[:-4])
+    return locations
+
+def is_valid_location_name(location):
+    """
+    Check that a location name is safe to use as a shard file name.
+
+    Args:
+        location (str): Proposed location name
+
+    Returns:
+        bool: True if the name only contains lowercase letters, digits,
+              hyphens and underscores
+    """
+    return bool(location) and all(c.islower() or c.isdigit() or c in "-_" for c in location)
+
+def create_location(location):
+    """
+    Create an empty product shard for a new location.
+
+    Args:
+        location (str): Name of the new location
+
+    Returns:
+        bool: True if the location was created, False if it already exists
+              or the name is invalid
+    """
+    if not is_valid_location_name(location):
+        logger.error("Error: Location names may only contain lowercase letters, digits, '-' and '_'.")
+        return False
+    if location in list_locations():
+        logger.warning(f"Location '{location}' already exists.")
+        return False
+
+    update_product_file([], get_location_file(location))
+    logger.success(f"Location '{location}' created successfully.")
+    return True
+
+def load_availability_index():
+    """
+    Load the aggregated cross-location availability index.
+
+    The index keeps each location's stock per lowercase product name together
+    with the modification time of the shard it was built from, and the same
+    stock inverted by product name. Only shards that have changed since the
+    index was last written are re-read and patched into the inverted part, so
+    a lookup costs one index read plus a stat per location instead of parsing
+    every shard.
+
+    Returns:
+        dict: {"locations": {location: {"mtime": float, "stock": {name: quantity}}},
+               "products": {name: {location: quantity}}} with lowercase names
+    """
+    # Imported here so loading this module at startup stays cheap
+    import json
+
+    index = None
+    if os.path.exists(AVAILABILITY_INDEX_FILE):
+        try:
+            with open(AVAILABILITY_INDEX_FILE, "r") as file:
+                index = json.load(file)
+        except (ValueError, OSError):
+            index = None
+    # Rebuild indexes that are unreadable or were written before the inverted part existed
+    changed = not isinstance(index, dict) or "products" not in index
+    if changed:
+        index = {"locations": {}, "products": {}}
+    entries, products = index["locations"], index["products"]
+
+    def remove_location(location):
+        for name in entries.pop(location)["stock"]:
+            stock = products[name]
+            del stock[location]
+            if not stock:
+                del products[name]
+
+    locations = list_locations()
+
+    # Drop locations whose shard no longer exists
+    for location in list(entries):
+        if location not in locations:
+            remove_location(location)
+            changed = True
+
+    # Refresh stale or missing shard entries
+    for location in locations:
+        file_path = get_location_file(location)
+        if not os.path.exists(file_path):
+            continue
+        mtime = os.path.getmtime(file_path)
+        entry = entries.get(location)
+        if entry is not None and entry.get("mtime") == mtime:
+            continue
+        if entry is not None:
+            remove_location(location)
+
+        stock = {}
+        for product in load_products(file_path):
+            name = product["name"].lower()
+            stock[name] = stock.get(name, 0) + product["quantity"]
+        entries[location] = {"mtime": mtime, "stock": stock}
+        for name, quantity in stock.items():
+            products.setdefault(name, {})[location] = quantity
+        changed = True
+
+    if changed:
+        save_availability_index(index)
+    return index
+
+def save_availability_index(index):
+    """
+    Write the aggregated availability index to disk.
+
+    Args:
+        index (dict): Index as returned by load_availability_index
+
+    Returns:
+        None
+    """
+    import json
+
+    os.makedirs(os.path.dirname(AVAILABILITY_INDEX_FILE), exist_ok=True)
+    with open(AVAILABILITY_INDEX_FILE, "w") as file:
+        json.dump(index, file)
+
+def get_availability(product_name, index=None):
+    """
+    Get the stock of a product across all locations.
+
+    Args:
+        product_name (str): Name of the product (case-insensitive)
+        index (dict, optional): Preloaded availability index
+
+    Returns:
+        dict: Mapping of location name to available quantity, only for
+              locations that stock the product
+    """
+    if index is None:
+        index = load_availability_index()
+    return dict(index["products"].get(product_name.lower(), {}))
+
+def transfer_stock(source_location, source_products, destination_location, product_name, quantity):
+    """
+    Move stock of a product from one location to another.
+
+    The destination shard is loaded on demand. If the destination does not
+    stock the product yet, it is added with the source's brand, cost price and
+    country, otherwise its cost price becomes the weighted average of its
+    stock and the transferred units. Units are taken from the source's lots earliest expiry first and
+    arrive at the destination as lots with the same cost and expiry date.
+    Both shards are saved once the transfer is applied.
+
+    Args:
+        source_location (str): Location the stock is taken from
+        source_products (list): Loaded products of the source location
+        destination_location (str): Location the stock is moved to
+        product_name (str): Name of the product to transfer (case-insensitive)
+        quantity (int): Number of units to transfer
+
+    Returns:
+        bool: True if the transfer was completed, False otherwise
+    """
+    if source_location == destination_location:
+        logger.error("Error: Source and destination must be different locations.")
+        return False
+    if destination_location not in list_locations():
+        logger.error(f"Error: Location '{destination_location}' does not exist.")
+        return False
+    if quantity <= 0:
+        logger.error("Error: Quantity must be a positive number.")
+        return False
+
+    source = next((p for p in source_products if p["name"].lower() == product_name.lower()), None)
+    if not source:
+        logger.error("Product not found at this location.")
+        return False
+    if source["quantity"] < quantity:
+        logger.error(f"Error: Only {source['quantity']} units of {source['name']} available.")
+        return False
+
+    source_lots = get_lot_book(get_location_file(source_location))
+    consumed = source_lots.deplete(source, quantity)
+
+    destination_file = get_location_file(destination_location)
+    destination_lots = get_lot_book(destination_file)
+    destination_lots.receive(source["name"], consumed)
+    destination_products = load_products(destination_file)
+    destination = next((p for p in destination_products if p["name"].lower() == source["name"].lower()), None)
+    if destination:
+        destination_old_cost_price = destination["cost_price"]
+        destination["cost_price"] = weighted_average_cost(destination, quantity, source["cost_price"])
+        destination["quantity"] += quantity
+        mark_dirty(destination, destination_products)
+    else:
+        destination_products.append({
+            "name": source["name"],
+            "brand": source["brand"],
+            "quantity": quantity,
+            "cost_price": source["cost_price"],
+            "country": source["country"],
+            "id": len(destination_products) + 1
+        })
+        destination = destination_products[-1]
+        destination_old_cost_price = None
+        mark_dirty(destination, destination_products)
+    source["quantity"] -= quantity
+    mark_dirty(source, source_products)
+    publish_change("transfer", source, quantity_delta=-quantity, destination=destination_location)
+
+    save_product_changes(source_products, get_location_file(source_location))
+    save_product_changes(destination_products, destination_file)
+    source_lots.save()
+    destination_lots.save()
+    
+    # Record both sides of the transfer in each location's history
+    record_transaction("transfer", [{"name": source["name"], "quantity_delta": -quantity}], source_products,
+                       get_location_file(source_location), reference=destination_location)
+    record_transaction("transfer", [{"name": source["name"], "quantity_delta": quantity,
+                                     "cost_price": destination["cost_price"],
+                                     "old_cost_price": destination_old_cost_price}], destination_products,
+                       destination_file, reference=source_location)
+
+    logger.success(f"Transferred {quantity} units of {source['name']} from '{source_location}' to '{destination_location}'.",
+                   product=source["name"], quantity=quantity, source=source_location,
+                   destination=destination_location)
+    return True
+
+def manage_locations(current_location, products):
+    """
+    Display the location management submenu.
+
+    Allows switching the active location, creating new locations, transferring
+    stock between locations and checking a product's availability everywhere.
+
+    Args:
+        current_location (str): Name of the currently active location
+        products (list): Loaded products of the currently active location
+
+    Returns:
+        tuple: (location, products) for the location that is active afterwards
+    """
+    while True:
+        # Display submenu header
+        print("\n" + "="*80)
+        print(" "*30 + "MANAGE LOCATIONS" + " "*30)
+        print("="*80)
+        print(f"\nCurrent location: {current_location}")
+
+        # Display menu options
+        print("\n  1. Switch Location      - Work with another store or warehouse")
+        print("  2. Create Location      - Add a new store or warehouse")
+        print("  3. Transfer Stock       - Move stock to another location")
+        print("  4. Check Availability   - Find a product across all locations")
+        print("  5. Return to Main Menu  - Go back to main menu")
+
+        try:
+            choice = int(input("\nEnter your choice (1-5): "))
+        except ValueError:
+            logger.error("Invalid input. Please enter a valid number.")
+            continue
+
+        if choice == 1:
+            locations = list_locations()
+            print("\nAvailable locations:")
+            for location in locations:
+                marker = " (current)" if location == current_location else ""
+                print(f"  - {location}{marker}")
+            location = input("\nEnter location to switch to: ").strip().lower()
+            if location not in locations:
+                logger.error(f"Error: Location '{location}' does not exist.")
+                continue
+            current_location = location
+            products = load_products(get_location_file(current_location))
+            logger.success(f"Switched to location '{current_location}'.")
+        elif choice == 2:
+            create_location(input("\nEnter new location name: ").strip().lower())
+        elif choice == 3:
+            product_name = input("\nEnter product name to transfer: ").strip()
+            destination = input("Enter destination location: ").strip().lower()
+            try:
+                quantity = int(input("Enter quantity to transfer: "))
+            except ValueError:
+                logger.error("Error: Invalid input. Quantity must be a number.")
+                continue
+            transfer_stock(current_location, products, destination, product_name, quantity)
+        elif choice == 4:
+            product_name = input("\nEnter product name: ").strip()
+            availability = get_availability(product_name)
+            if not availability:
+                logger.warning(f"Product '{product_name}' is not stocked at any location.")
+                continue
+            print("\n" + "-"*40)
+            print(f"{'Location':<25}{'Stock':>10}")
+            print("-"*40)
+            for location, quantity in availability.items():
+                print(f"{location:<25}{quantity:>10}")
+            print("-"*40)
+            print(f"{'Total:':<25}{sum(availability.values()):>10}")
+        elif choice == 5:
+            return current_location, products
+        else:
+            logger.error("Invalid choice. Please enter a number between 1 and 5.")
@@ -0,0 +1,279 @@
+import atexit
+import logging
+import os
+import sys
+import time
+
+# Level between INFO and WARNING for completed operations, shown in green on a TTY
+SUCCESS = 25
+logging.addLevelName(SUCCESS, "SUCCESS")
+
+# ANSI colors used when writing to a terminal
+COLORS = {
+    "red": "\033[91m",
+    "green": "\033[92m",
+    "yellow": "\033[93m"
+}
+LEVEL_COLORS = {
+    logging.ERROR: "red",
+    logging.CRITICAL: "red",
+    logging.WARNING: "yellow",
+    SUCCESS: "green"
+}
+
+# JSON-lines records written before the log file is flushed, unless one is an error
+JSON_BUFFER_RECORDS = 256
+
+_logger = logging.getLogger("wecare")
+_logger.propagate = False
+_listener = None
+_handlers = []
+_color = None
+
+def use_color():
+    """
+    Check whether console output should be colored.
+
+    Colors are used when they were enabled explicitly with configure_logging,
+    or otherwise when stdout is a terminal and NO_COLOR is not set.
+
+    Returns:
+        bool: True if ANSI colors should be written
+    """
+    if _color is not None:
+        return _color
+    return sys.stdout.isatty() and "NO_COLOR" not in os.environ
+
+def colorize(text, color):
+    """
+    Wrap text in an ANSI color if console output is colored.
+
+    Args:
+        text (str): Text to color
+        color (str): One of "red", "green" or "yellow"
+
+    Returns:
+        str: Colored text, or the text unchanged if colors are off
+    """
+    if not use_color():
+        return text
+    return f"{COLORS[color]}{text}\033[0m"
+
+class ConsoleFormatter(logging.Formatter):
+    """Format records as plain messages, colored by level when colors are on."""
+
+    def format(self, record):
+        message = record.getMessage()
+        if getattr(record, "suppressed", 0):
+            message += f" ({record.suppressed} similar messages suppressed)"
+        color = LEVEL_COLORS.get(record.levelno)
+        return colorize(message, color) if color else message
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format records as one JSON object per line for machine parsing."""
+
+    def format(self, record):
+        # Imported here so startup does not pay for json unless JSON logging is used
+        import json
+
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "message": record.getMessage()
+        }
+        entry.update(getattr(record, "fields", {}))
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class ConsoleHandler(logging.StreamHandler):
+    """Stream handler that always writes to the current sys.stdout."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    File handler that flushes in batches instead of after every record.
+
+    Records are written to the file's buffer and flushed once `capacity`
+    records are pending or a record at `flush_level` or above is written, so
+    errors reach the file right away. Pending records are flushed by
+    shutdown_logging at exit.
+    """
+
+    def __init__(self, filename, capacity=JSON_BUFFER_RECORDS, flush_level=logging.ERROR):
+        super().__init__(filename, encoding="utf-8")
+        self.capacity = capacity
+        self.flush_level = flush_level
+        self._pending = 0
+
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        self._pending += 1
+        if self._pending >= self.capacity or record.levelno >= self.flush_level:
+            self.flush()
+
+    def flush(self):
+        super().flush()
+        self._pending = 0
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let through at most `limit` records with the same message template per interval.
+
+    Only records logged with rate_limit=True are limited. They are grouped by
+    their unformatted message, so a warning logged once per malformed line is
+    shown a few times and then suppressed. The number of suppressed records is
+    reported on the next record let through.
+    """
+
+    def __init__(self, limit=5, interval=60.0):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self._windows = {}
+
+    def filter(self, record):
+        if not getattr(record, "rate_limit", False):
+            return True
+
+        now = time.monotonic()
+        key = (record.levelno, record.msg)
+        window = self._windows.get(key)
+        if window is None or now - window["start"] >= self.interval:
+            suppressed = window["suppressed"] if window else 0
+            self._windows[key] = {"start": now, "count": 1, "suppressed": 0}
+            record.suppressed = suppressed
+            return True
+
+        if window["count"] < self.limit:
+            window["count"] += 1
+            record.suppressed = 0
+            return True
+
+        window["suppressed"] += 1
+        return False
+
+def configure_logging(json_path=None, quiet=False, color=None, asynchronous=False, rate_limit=5,
+                      rate_interval=60.0):
+    """
+    Configure where and how log records are written.
+
+    Args:
+        json_path (str, optional): File to append JSON-lines records to. Records
+                                   are flushed in batches, errors immediately
+        quiet (bool, optional): Only show warnings and errors on the console
+        color (bool, optional): Force colors on or off, detected from the terminal by default
+        asynchronous (bool, optional): Hand records to a background thread
+                                       through a queue instead of writing them
+                                       in the calling thread
+        rate_limit (int, optional): Repeats of a rate-limited message let through per interval
+        rate_interval (float, optional): Length of the rate-limit interval in seconds
+
+    Returns:
+        None
+    """
+    global _color, _handlers
+    shutdown_logging()
+    _color = color
+
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+        handler.close()
+    # In asynchronous mode the output handlers were owned by the listener
+    for handler in _handlers:
+        handler.close()
+    for log_filter in list(_logger.filters):
+        _logger.removeFilter(log_filter)
+
+    console = ConsoleHandler()
+    console.setFormatter(ConsoleFormatter())
+    console.setLevel(logging.WARNING if quiet else logging.INFO)
+    handlers = [console]
+
+    if json_path:
+        directory = os.path.dirname(json_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        json_file = BufferedFileHandler(json_path)
+        json_file.setFormatter(JsonLinesFormatter())
+        handlers.append(json_file)
+
+    _handlers = handlers
+    _logger.setLevel(logging.INFO)
+    _logger.addFilter(RateLimitFilter(rate_limit, rate_interval))
+
+    if asynchronous:
+        # Only needed in asynchronous mode, so not imported at startup
+        import queue
+        from logging.handlers import QueueHandler, QueueListener
+
+        global _listener
+        records = queue.SimpleQueue()
+        _logger.addHandler(QueueHandler(records))
+        _listener = QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+    else:
+        for handler in handlers:
+            _logger.addHandler(handler)
+
+def shutdown_logging():
+    """
+    Write out all queued and buffered records and stop the background logging thread.
+
+    Returns:
+        None
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    for handler in _handlers:
+        handler.flush()
+
+def _log(level, message, args, rate_limit, fields):
+    if _logger.isEnabledFor(level):
+        _logger.log(level, message, *args, extra={"fields": fields, "rate_limit": rate_limit})
+
+def info(message, *args, rate_limit=False, **fields):
+    """
+    Log an informational message.
+
+    Args:
+        message (str): Message, optionally with %-style placeholders for args
+        *args: Values for the message placeholders
+        rate_limit (bool, optional): Suppress repeats of this message template
+                                     beyond the configured limit, for messages
+                                     logged in loops over many rows
+        **fields: Structured fields added to JSON-lines output
+
+    Returns:
+        None
+    """
+    _log(logging.INFO, message, args, rate_limit, fields)
+
+def success(message, *args, rate_limit=False, **fields):
+    """Log a completed operation. Arguments are the same as for info."""
+    _log(SUCCESS, message, args, rate_limit, fields)
+
+def warning(message, *args, rate_limit=False, **fields):
+    """Log a warning. Arguments are the same as for info."""
+    _log(logging.WARNING, message, args, rate_limit, fields)
+
+def error(message, *args, rate_limit=False, **fields):
+    """Log an error. Arguments are the same as for info."""
+    _log(logging.ERROR, message, args, rate_limit, fields)
+
+# Console output only until the application configures logging itself
+configure_logging()
+atexit.register(shutdown_logging)
@@ -0,0 +1,434 @@
+import heapq
+import os
+from bisect import bisect_right, insort
+from datetime import date, timedelta
+from src import logger
+
+# Sort key of lots without an expiry date, so they are depleted last
+NO_EXPIRY = date.max.toordinal()
+
+# Lot books loaded during this session, keyed by product file
+_lot_books = {}
+
+def get_lots_file(file_path):
+    """
+    Get the path of the lot file of a product file.
+
+    Args:
+        file_path (str): Path to the product file, e.g. data/products.txt
+
+    Returns:
+        str: Path to the lot file, e.g. data/products_lots.txt
+    """
+    return os.path.splitext(file_path)[0] + "_lots.txt"
+
+def parse_expiry(value):
+    """
+    Parse an expiry date entered by the user.
+
+    Args:
+        value (str): Date in YYYY-MM-DD format, or an empty string for none
+
+    Returns:
+        str: The normalized date, or "" for no expiry
+
+    Raises:
+        ValueError: If the date is not a valid YYYY-MM-DD date
+    """
+    value = value.strip()
+    return date.fromisoformat(value).isoformat() if value else ""
+
+def get_lot_book(file_path):
+    """
+    Get the lot book of a product file, loading it on first use.
+
+    Args:
+        file_path (str): Path to the product file
+
+    Returns:
+        LotBook: Lots of every product in the file
+    """
+    book = _lot_books.get(file_path)
+    if book is None:
+        book = _lot_books[file_path] = LotBook(get_lots_file(file_path))
+    return book
+
+class LotBook:
+    """
+    Stock lots of one product file, each with its own cost price and expiry date.
+
+    Every restock creates a lot. Sales take units from the lot that expires
+    first, using one heap per product ordered by expiry date and then by the
+    order lots were received, so picking the next lot takes O(log lots).
+    Lots without an expiry date are used last.
+
+    Stock that was on hand before lot tracking started, or was added by
+    editing the quantity directly, is not in any lot. It is treated as the
+    oldest stock without an expiry date and valued at the product's cost price.
+
+    A list of all lots sorted by expiry date is kept alongside the heaps, so
+    finding the lots that expire within a number of days takes O(log lots)
+    plus the number of lots found.
+    """
+
+    def __init__(self, lots_path):
+        """
+        Load a lot file.
+
+        Args:
+            lots_path (str): Path to the lot file; a missing file means no lots
+        """
+        self.path = lots_path
+        self.lots = {}
+        self._heaps = {}
+        self._totals = {}
+        self._by_expiry = []
+        self._next_seq = 1
+        self._changed = False
+
+        if os.path.exists(lots_path):
+            with open(lots_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    if not line.strip():
+                        continue
+                    lot_id, expiry, quantity, cost_price, received, product_name = line.rstrip("\n").split(",", 5)
+                    self._insert({
+                        "id": lot_id,
+                        "product": product_name,
+                        "quantity": int(quantity),
+                        "cost_price": float(cost_price),
+                        "expiry": expiry,
+                        "received": received,
+                        "seq": int(lot_id.split("-")[1])
+                    })
+
+    def _insert(self, lot):
+        """Index a lot in the product heap, the expiry list and the totals."""
+        self.lots[lot["id"]] = lot
+        self._next_seq = max(self._next_seq, lot["seq"] + 1)
+        key = (date.fromisoformat(lot["expiry"]).toordinal() if lot["expiry"] else NO_EXPIRY, lot["seq"])
+        heapq.heappush(self._heaps.setdefault(lot["product"], []), (key, lot["id"]))
+        insort(self._by_expiry, (key, lot["id"]))
+        self._totals[lot["product"]] = self._totals.get(lot["product"], 0) + lot["quantity"]
+
+    def add_lot(self, product_name, quantity, cost_price, expiry=""):
+        """
+        Add a lot of received stock.
+
+        Args:
+            product_name (str): Product the lot belongs to
+            quantity (int): Units received
+            cost_price (float): Cost price of each unit in the lot
+            expiry (str, optional): Expiry date in YYYY-MM-DD format, "" for none
+
+        Returns:
+            str: ID of the new lot, e.g. LOT-7
+        """
+        seq = self._next_seq
+        lot = {
+            "id": f"LOT-{seq}",
+            "product": product_name,
+            "quantity": quantity,
+            "cost_price": cost_price,
+            "expiry": expiry,
+            "received": date.today().isoformat(),
+            "seq": seq
+        }
+        self._insert(lot)
+        self._changed = True
+        return lot["id"]
+
+    def lot_units(self, product_name):
+        """
+        Get how many units of a product are held in lots.
+
+        Args:
+            product_name (str): Product name
+
+        Returns:
+            int: Units in lots; the rest of the product's stock is untracked
+        """
+        return self._totals.get(product_name, 0)
+
+    def lots_for(self, product_name):
+        """
+        Get the non-empty lots of a product in the order they will be sold.
+
+        Args:
+            product_name (str): Product name
+
+        Returns:
+            list: Lot dictionaries
+        """
+        return [self.lots[lot_id] for _, lot_id in sorted(self._heaps.get(product_name, []))
+                if self.lots[lot_id]["quantity"] > 0]
+
+    def _take(self, product_name, units, before_key=None):
+        """
+        Take units from a product's lots in heap order.
+
+        Args:
+            product_name (str): Product name
+            units (int): Units to take at most
+            before_key (tuple, optional): Only take from lots whose sort key is lower
+
+        Returns:
+            list: Consumed entries with keys lot, quantity, cost_price and expiry
+        """
+        heap = self._heaps.get(product_name, [])
+        consumed = []
+        while units > 0 and heap and (before_key is None or heap[0][0] < before_key):
+            lot = self.lots[heap[0][1]]
+            taken = min(units, lot["quantity"])
+            if taken:
+                lot["quantity"] -= taken
+                units -= taken
+                self._totals[product_name] -= taken
+                consumed.append({"lot": lot["id"], "quantity": taken, "cost_price": lot["cost_price"],
+                                 "expiry": lot["expiry"]})
+            if lot["quantity"] == 0:
+                heapq.heappop(heap)
+        return consumed
+
+    def deplete(self, product, units):
+        """
+        Take units of a product from stock, earliest expiry first.
+
+        Must be called before the product's quantity is reduced, so the
+        untracked part of its stock can be worked out.
+
+        Args:
+            product (dict): Product the units are taken from
+            units (int): Units leaving stock
+
+        Returns:
+            list: Consumed entries with keys lot (None for untracked stock),
+                  quantity, cost_price and expiry, in the order they were taken
+        """
+        name = product["name"]
+        untracked = max(product["quantity"] - self.lot_units(name), 0)
+
+        # Lots with an expiry date, then untracked stock, then lots without one
+        consumed = self._take(name, units, before_key=(NO_EXPIRY, 0))
+        remaining = units - sum(entry["quantity"] for entry in consumed)
+        if remaining and untracked:
+            taken = min(remaining, untracked)
+            consumed.append({"lot": None, "quantity": taken, "cost_price": product["cost_price"], "expiry": ""})
+            remaining -= taken
+        if remaining:
+            consumed.extend(self._take(name, remaining))
+
+        if any(entry["lot"] for entry in consumed):
+            self._changed = True
+        return consumed
+
+    def reconcile(self, product):
+        """
+        Shrink a product's lots after its quantity was reduced directly, e.g. by an edit.
+
+        Units are removed from lots in the order they would be sold.
+
+        Args:
+            product (dict): Product after its quantity was changed
+
+        Returns:
+            list: Consumed entries, as returned by deplete
+        """
+        excess = self.lot_units(product["name"]) - max(product["quantity"], 0)
+        if excess <= 0:
+            return []
+        self._changed = True
+        return self._take(product["name"], excess)
+
+    def restore(self, product_name, consumed):
+        """
+        Put units back into the lots they were taken from, e.g. for a return.
+
+        Lots that no longer exist are re-created with their original ID,
+        cost price and expiry date. Untracked units stay untracked.
+
+        Args:
+            product_name (str): Product name
+            consumed (list): Entries as returned by deplete, with the units to put back
+
+        Returns:
+            None
+        """
+        for entry in consumed:
+            if not entry.get("lot") or entry["quantity"] <= 0:
+                continue
+            lot = self.lots.get(entry["lot"])
+            if lot is None:
+                self._insert({"id": entry["lot"], "product": product_name, "quantity": entry["quantity"],
+                              "cost_price": entry["cost_price"], "expiry": entry["expiry"],
+                              "received": date.today().isoformat(), "seq": int(entry["lot"].split("-")[1])})
+                continue
+            if lot["quantity"] == 0:
+                key = (date.fromisoformat(lot["expiry"]).toordinal() if lot["expiry"] else NO_EXPIRY, lot["seq"])
+                heapq.heappush(self._heaps.setdefault(product_name, []), (key, lot["id"]))
+            lot["quantity"] += entry["quantity"]
+            self._totals[product_name] = self._totals.get(product_name, 0) + entry["quantity"]
+        self._changed = True
+
+    def receive(self, product_name, consumed):
+        """
+        Add lots for units moved in from another location, keeping their cost and expiry.
+
+        Args:
+            product_name (str): Product name
+            consumed (list): Entries as returned by deplete at the other location
+
+        Returns:
+            None
+        """
+        for entry in consumed:
+            if entry["lot"]:
+                self.add_lot(product_name, entry["quantity"], entry["cost_price"], entry["expiry"])
+
+    def remove_lot_units(self, lot_id, units):
+        """
+        Remove units from one specific lot, e.g. when its restock is voided.
+
+        Args:
+            lot_id (str): Lot ID
+            units (int): Units to remove
+
+        Returns:
+            int: Units actually removed, at most the lot's remaining quantity
+        """
+        lot = self.lots.get(lot_id)
+        if lot is None:
+            return 0
+        removed = min(units, lot["quantity"])
+        lot["quantity"] -= removed
+        self._totals[lot["product"]] -= removed
+        self._changed = True
+        return removed
+
+    def rename(self, old_name, new_name):
+        """
+        Move a product's lots to its new name.
+
+        Args:
+            old_name (str): Previous product name
+            new_name (str): New product name
+
+        Returns:
+            None
+        """
+        if old_name not in self._heaps:
+            return
+        for _, lot_id in self._heaps[old_name]:
+            self.lots[lot_id]["product"] = new_name
+        self._heaps[new_name] = self._heaps.pop(old_name)
+        self._totals[new_name] = self._totals.pop(old_name, 0)
+        self._changed = True
+
+    def expiring_within(self, days, today=None):
+        """
+        Find lots with stock left that expire within a number of days.
+
+        Lots that have already expired are included.
+
+        Args:
+            days (int): Number of days from today
+            today (date, optional): Date to count from, today by default
+
+        Returns:
+            list: Lot dictionaries ordered by expiry date
+        """
+        cutoff = ((today or date.today()) + timedelta(days=days)).toordinal()
+        end = bisect_right(self._by_expiry, ((cutoff, float("inf")), ""))
+        return [self.lots[lot_id] for _, lot_id in self._by_expiry[:end] if self.lots[lot_id]["quantity"] > 0]
+
+    def save(self):
+        """
+        Write the lot file if any lot changed, dropping empty lots.
+
+        The file is written to a temporary path and moved into place.
+
+        Returns:
+            None
+        """
+        if not self._changed:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            for lot in sorted(self.lots.values(), key=lambda lot: lot["seq"]):
+                if lot["quantity"] > 0:
+                    file.write(f"{lot['id']},{lot['expiry']},{lot['quantity']},{lot['cost_price']},"
+                               f"{lot['received']},{lot['product']}\n")
+        os.replace(temp_path, self.path)
+        self._changed = False
+
+def cost_of_goods(consumed):
+    """
+    Get the FIFO cost of goods of the units taken from stock.
+
+    Args:
+        consumed (list): Entries as returned by LotBook.deplete
+
+    Returns:
+        float: Sum of units times their lot's cost price
+    """
+    return sum(entry["quantity"] * entry["cost_price"] for entry in consumed)
+
+def display_expiring_lots(file_path, days=30):
+    """
+    Display the lots of a product file that expire within a number of days.
+
+    Args:
+        file_path (str): Path to the product file
+        days (int, optional): Number of days from today
+
+    Returns:
+        None
+    """
+    lots = get_lot_book(file_path).expiring_within(days)
+    print(f"\nLots expiring within {days} days:")
+    if not lots:
+        print("None.")
+        return
+
+    today = date.today()
+    print(f"{'Lot':<10}{'Product':<30}{'Expiry':<12}{'Days Left':>10}{'Units':>10}{'Value at Cost':>16}")
+    print("-"*88)
+    for lot in lots:
+        days_left = (date.fromisoformat(lot["expiry"]) - today).days
+        status = "EXPIRED" if days_left < 0 else str(days_left)
+        print(f"{lot['id']:<10}{lot['product'][:29]:<30}{lot['expiry']:<12}{status:>10}{lot['quantity']:>10}"
+              f"{'₹' + format(lot['quantity'] * lot['cost_price'], ',.2f'):>16}")
+    print("-"*88)
+    total = sum(lot["quantity"] * lot["cost_price"] for lot in lots)
+    logger.warning(f"{len(lots)} lots worth ₹{total:,.2f} at cost expire within {days} days.", lots=len(lots),
+                   value=total)
+
+def get_cost_of_goods_sold(file_path, since=None):
+    """
+    Sum the FIFO cost of goods sold recorded in the inventory history.
+
+    Returns and voided sales are subtracted again.
+
+    Args:
+        file_path (str): Path to the product file
+        since (float, optional): Only count transactions from this Unix timestamp on
+
+    Returns:
+        tuple: (units sold, cost of goods sold)
+    """
+    # Imported here because the history is only needed for reports
+    from src.history_manager import iter_transactions
+
+    units = 0
+    cost = 0.0
+    for entry in iter_transactions(file_path):
+        if since is not None and entry["ts"] < since:
+            continue
+        for line in entry["lines"]:
+            if "cost_of_goods" in line:
+                units -= line["quantity_delta"]
+                cost += line["cost_of_goods"]
+    return units, cost
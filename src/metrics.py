@@ -0,0 +1,286 @@
+import os
+import threading
+import time
+
+# Metrics are off unless enabled, so instrumented code only pays a flag check
+_enabled = os.environ.get("WECARE_METRICS") == "1"
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_histograms = {}
+_help = {}
+
+def enable_metrics():
+    """
+    Start recording metrics.
+
+    Returns:
+        None
+    """
+    global _enabled
+    _enabled = True
+
+def disable_metrics():
+    """
+    Stop recording metrics. Already recorded values are kept.
+
+    Returns:
+        None
+    """
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    """
+    Check whether metrics are being recorded.
+
+    Returns:
+        bool: True if metrics are enabled
+    """
+    return _enabled
+
+def describe(name, help_text):
+    """
+    Set the help text exported for a metric.
+
+    Args:
+        name (str): Metric name
+        help_text (str): One-line description of the metric
+
+    Returns:
+        None
+    """
+    _help[name] = help_text
+
+def increment(name, value=1):
+    """
+    Add to a counter.
+
+    Args:
+        name (str): Counter name, e.g. wecare_sales_total
+        value (float, optional): Amount to add
+
+    Returns:
+        None
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def set_gauge(name, value):
+    """
+    Set a gauge to its current value.
+
+    Args:
+        name (str): Gauge name, e.g. wecare_product_file_bytes
+        value (float): Current value
+
+    Returns:
+        None
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _gauges[name] = value
+
+def observe(name, seconds):
+    """
+    Record a latency in a histogram.
+
+    Args:
+        name (str): Histogram name, e.g. wecare_invoice_write_seconds
+        seconds (float): Observed duration
+
+    Returns:
+        None
+    """
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][i] += 1
+                break
+        histogram["sum"] += seconds
+        histogram["count"] += 1
+
+class _Timer:
+    """Context manager that records its duration in a histogram."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+class _NullTimer:
+    """Context manager used when metrics are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+def timer(name):
+    """
+    Time a block of code into a latency histogram.
+
+    Example:
+        with timer("wecare_sale_commit_seconds"):
+            ...
+
+    Args:
+        name (str): Histogram name
+
+    Returns:
+        Context manager recording the block's duration, or a shared no-op
+        context manager when metrics are disabled
+    """
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+def timed(name):
+    """
+    Decorator that records a function's duration in a latency histogram.
+
+    Args:
+        name (str): Histogram name
+
+    Returns:
+        callable: Decorator
+    """
+    def decorator(function):
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        wrapper.__name__ = function.__name__
+        wrapper.__doc__ = function.__doc__
+        wrapper.__wrapped__ = function
+        return wrapper
+    return decorator
+
+def export_prometheus():
+    """
+    Render all recorded metrics in the Prometheus text exposition format.
+
+    Returns:
+        str: Metrics text
+    """
+    lines = []
+    with _lock:
+        for name in sorted(_counters):
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {_counters[name]}")
+
+        for name in sorted(_gauges):
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_gauges[name]}")
+
+        for name in sorted(_histograms):
+            histogram = _histograms[name]
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+                cumulative += count
+                lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{le="+Inf"}} {histogram["count"]}')
+            lines.append(f"{name}_sum {histogram['sum']}")
+            lines.append(f"{name}_count {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+def write_prometheus_file(file_path="data/metrics.prom"):
+    """
+    Write all recorded metrics to a file, e.g. for a textfile collector.
+
+    The file is replaced atomically so scrapers never read a partial file.
+
+    Args:
+        file_path (str, optional): Path of the metrics file
+
+    Returns:
+        None
+    """
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = file_path + ".tmp"
+    with open(temp_path, "w") as file:
+        file.write(export_prometheus())
+    os.replace(temp_path, file_path)
+
+def serve_metrics(port, host="127.0.0.1"):
+    """
+    Serve metrics over HTTP at /metrics on a background thread.
+
+    Args:
+        port (int): Port to listen on
+        host (str, optional): Interface to bind, local only by default
+
+    Returns:
+        HTTPServer: The running server, call shutdown() to stop it
+    """
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = export_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = HTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+describe("wecare_load_products_seconds", "Time taken to load a product file")
+describe("wecare_load_rows_total", "Product rows loaded from product files")
+describe("wecare_load_rows_per_second", "Rows per second of the most recent product file load")
+describe("wecare_update_product_file_seconds", "Time taken to write a product file")
+describe("wecare_product_file_bytes", "Size of the most recently written product file")
+describe("wecare_product_file_bytes_written_total", "Bytes written to product files")
+describe("wecare_sales_total", "Completed sales")
+describe("wecare_units_sold_total", "Units sold including free units")
+describe("wecare_sale_commit_seconds", "Time taken to commit a confirmed sale")
+describe("wecare_invoice_write_seconds", "Time taken to write a sales invoice")
+describe("wecare_invoice_bytes_written_total", "Bytes written to sales invoices")
+describe("wecare_restocks_total", "Completed restock operations")
+describe("wecare_units_restocked_total", "Units added by restocks")
+describe("wecare_restock_invoice_write_seconds", "Time taken to write a restock invoice")
+describe("wecare_inventory_summary_seconds", "Time taken to compute the inventory valuation summary")
+describe("wecare_query_cache_hits_total", "Listings and reports served from the query cache")
+describe("wecare_query_cache_misses_total", "Listings and reports computed because the query cache had no current result")
+describe("wecare_query_cache_hit_ratio", "Share of query cache lookups served from the cache")
@@ -1,13 +1,342 @@
+import csv
 import os
+import shutil
+import time
+from itertools import chain
+from src import logger, metrics
+from src.data_paths import PRODUCTS_FILE
+from src.history_manager import record_transaction
+from src.inventory_events import publish_change
+from src.lot_manager import get_lot_book
 
+# Every row, including the header row, is padded with spaces to this many bytes
+# (including the newline) so a changed row can be overwritten in place at
+# (index + 1) * RECORD_WIDTH
+RECORD_WIDTH = 128
+
+# Product files start with a header row holding the signature and schema
+# version, followed by the column names. Files without it use the legacy
+# unquoted schema 1 and are upgraded when they are loaded
+FILE_SIGNATURE = "#wecare-products"
+SCHEMA_VERSION = 2
+PRODUCT_FIELDS = ("name", "brand", "quantity", "cost_price", "country")
+HEADER_ROW = f"{FILE_SIGNATURE} v{SCHEMA_VERSION},{','.join(PRODUCT_FIELDS)}".encode("utf-8")
+
+# Unsaved changes per product list, keyed by the identity of the list, so saving
+# one list never has to look at the changes of another. Each entry keeps the
+# list itself, so its identity cannot be reused while changes are pending, and
+# maps the identity of each changed product to [product, number of changes].
+# Nothing is stored in the product dictionaries themselves
+_dirty_products = {}
+
+def mark_dirty(product: dict, products: list) -> None:
+    """
+    Flag a product as changed since its product file was last written.
+
+    Also counts the changes made to the product since then.
+
+    Args:
+        product (dict): The changed product
+        products (list): The product list the product belongs to
+        
+    Returns:
+        None
+    """
+    changes = _dirty_products.setdefault(id(products), (products, {}))[1]
+    changes.setdefault(id(product), [product, 0])[1] += 1
+
+def find_dirty_rows(products: list) -> list:
+    """
+    Get the positions of the changed products in a product list.
+
+    Products normally sit at position id - 1, so each lookup is O(1); a
+    product that has moved is searched for in the list.
+
+    Args:
+        products (list): A list of dictionaries, each representing a product
+        
+    Returns:
+        list: Sorted row indexes of changed products in this list
+    """
+    entry = _dirty_products.get(id(products))
+    if entry is None:
+        return []
+    rows = []
+    for key, (product, _) in list(entry[1].items()):
+        index = product.get("id", 0) - 1
+        if not (0 <= index < len(products) and products[index] is product):
+            index = next((i for i, p in enumerate(products) if p is product), None)
+        if index is None:
+            # The product was removed from the list, so there is no row to save
+            del entry[1][key]
+            continue
+        rows.append(index)
+    return sorted(rows)
+
+def count_unsaved_changes(products: list) -> int:
+    """
+    Count the changes made to a product list since it was last written.
+
+    Args:
+        products (list): A list of dictionaries, each representing a product
+        
+    Returns:
+        int: Number of changes, counting every change of a product
+    """
+    entry = _dirty_products.get(id(products))
+    return sum(count for _, count in entry[1].values()) if entry else 0
+
+def clear_dirty(products: list) -> None:
+    """
+    Clear the changed flags of a product list once all its changes are written.
+
+    Args:
+        products (list): The saved product list
+        
+    Returns:
+        None
+    """
+    _dirty_products.pop(id(products), None)
+
+def quote_field(value: str) -> str:
+    """
+    Quote a text field for the product file if it contains a comma, quote or line break.
+
+    Args:
+        value (str): Field value
+
+    Returns:
+        str: The value, quoted with inner quotes doubled when needed
+    """
+    if "," in value or '"' in value or "\n" in value or "\r" in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+def format_product_row(product: dict) -> bytes:
+    """
+    Format a product as a row of the product file.
+
+    Names, brands and countries are quoted only when they need it, so rows
+    of ordinary products look the same as in the legacy format.
+
+    Args:
+        product (dict): The product to format
+        
+    Returns:
+        bytes: UTF-8 encoded row without padding or newline
+    """
+    row = f"{product['name']},{product['brand']},{product['quantity']},{product['cost_price']},{product['country']}"
+    if row.count(",") != 4 or '"' in row or "\n" in row or "\r" in row:
+        row = (f"{quote_field(product['name'])},{quote_field(product['brand'])},{product['quantity']},"
+               f"{product['cost_price']},{quote_field(product['country'])}")
+    return row.encode("utf-8")
+
+def read_header_row(file_path: str) -> bytes:
+    """
+    Read the start of a product file, as long as the current header row.
+
+    Args:
+        file_path (str): Path to the product file
+
+    Returns:
+        bytes: The first len(HEADER_ROW) bytes of the file
+    """
+    with open(file_path, "rb") as file:
+        return file.read(len(HEADER_ROW))
+
+def get_rejected_rows_file(file_path: str) -> str:
+    """
+    Get the path of the file that keeps rows that could not be loaded.
+
+    Args:
+        file_path (str): Path to the product file, e.g. data/products.txt
+
+    Returns:
+        str: Path to the rejected rows file, e.g. data/products_rejected.txt
+    """
+    return os.path.splitext(file_path)[0] + "_rejected.txt"
+
+def _read_header(file, file_path: str):
+    """
+    Read the header row of an open product file, if it has one.
+
+    Args:
+        file (file): Product file opened in text mode with newline=""
+        file_path (str): Path of the file, used in errors
+
+    Returns:
+        tuple: (rows, first_row_number, field_indexes, schema_version), where
+               rows iterates over the remaining rows as lists of fields and
+               field_indexes holds the column of each of PRODUCT_FIELDS
+
+    Raises:
+        ValueError: If the file was written with a newer schema or its
+                    header row lacks a required column
+    """
+    first_line = file.readline()
+    if first_line.startswith(FILE_SIGNATURE):
+        header = next(csv.reader([first_line]))
+        schema_version = int(header[0][len(FILE_SIGNATURE):].strip().lstrip("v") or SCHEMA_VERSION)
+        if schema_version > SCHEMA_VERSION:
+            raise ValueError(f"{file_path} uses product file schema {schema_version}, "
+                             f"this version only reads up to schema {SCHEMA_VERSION}")
+        columns = [name.strip() for name in header[1:]]
+        missing = [field for field in PRODUCT_FIELDS if field not in columns]
+        if missing:
+            raise ValueError(f"{file_path} is missing the columns: {', '.join(missing)}")
+        return csv.reader(file), 2, [columns.index(field) for field in PRODUCT_FIELDS], schema_version
+
+    rows = (line.strip().split(",") for line in chain([first_line], file))
+    return rows, 1, list(range(len(PRODUCT_FIELDS))), 1
+
+def _parse_rows(rows, first_row_number: int, field_indexes: list, file_path: str, rejected: list):
+    """Turn the rows of a product file into products, collecting rows that cannot be parsed."""
+    name_index, brand_index, quantity_index, cost_price_index, country_index = field_indexes
+    row_width = max(field_indexes) + 1
+
+    for line_number, row in enumerate(rows, first_row_number):
+        if len(row) < row_width:
+            if not any(field.strip() for field in row):
+                continue  # Skip empty lines
+            logger.warning("Warning: Invalid product format on line %d: %s", line_number, ",".join(row),
+                           rate_limit=True, file=file_path, line=line_number)
+            rejected.append((line_number, row))
+            continue
+            
+        try:
+            product = {
+                "name": row[name_index].strip(),
+                "brand": row[brand_index].strip(),
+                "quantity": int(row[quantity_index]),
+                "cost_price": float(row[cost_price_index]),
+                "country": row[country_index].strip()
+            }
+        except ValueError as e:
+            logger.error("Error parsing product on line %d: %s - %s", line_number, ",".join(row), e,
+                         rate_limit=True, file=file_path, line=line_number)
+            rejected.append((line_number, row))
+            continue
+        yield product
+
+def parse_products(file, file_path: str = ""):
+    """
+    Parse the rows of an open product file.
+
+    Files starting with the header row are read with the csv module, so
+    quoted names, brands and countries may contain commas, quotes and line
+    breaks. Columns are matched by the names in the header row. Files
+    without a header row are parsed in the legacy schema, splitting every
+    line on commas.
+
+    Args:
+        file (file): Product file opened in text mode with newline=""
+        file_path (str, optional): Path of the file, used in warnings
+
+    Returns:
+        tuple: (products, rejected, schema_version), where rejected is a list
+               of (line number, row) tuples of rows that could not be parsed
+               and schema_version is 1 for the legacy format
+
+    Raises:
+        ValueError: If the file was written with a newer schema or its
+                    header row lacks a required column
+    """
+    rows, first_row_number, field_indexes, schema_version = _read_header(file, file_path)
+    rejected = []
+    products = list(_parse_rows(rows, first_row_number, field_indexes, file_path, rejected))
+    return products, rejected, schema_version
+
+def iter_products(file, file_path: str = "", rejected: list = None):
+    """
+    Parse an open product file one product at a time.
+
+    Unlike parse_products the catalog is never held in memory as a whole,
+    so a file of any size can be streamed, e.g. into the product store.
+    Products do not get an id.
+
+    Args:
+        file (file): Product file opened in text mode with newline=""
+        file_path (str, optional): Path of the file, used in warnings
+        rejected (list, optional): Receives (line number, row) tuples of
+                                   rows that could not be parsed
+
+    Yields:
+        dict: Product with keys name, brand, quantity, cost_price and country
+
+    Raises:
+        ValueError: If the file was written with a newer schema or its
+                    header row lacks a required column
+    """
+    rows, first_row_number, field_indexes, _ = _read_header(file, file_path)
+    yield from _parse_rows(rows, first_row_number, field_indexes, file_path,
+                           rejected if rejected is not None else [])
+
+def save_rejected_rows(rejected: list, file_path: str) -> str:
+    """
+    Append rows that could not be loaded to the rejected rows file.
+
+    Rows are dropped from the product file the next time it is rewritten,
+    so they are kept here to be corrected and added back by hand. Rows that
+    are already in the file are not added again.
+
+    Args:
+        rejected (list): (line number, row) tuples as returned by parse_products
+        file_path (str): Path to the product file the rows came from
+
+    Returns:
+        str: Path to the rejected rows file
+    """
+    rejected_path = get_rejected_rows_file(file_path)
+    saved = set()
+    if os.path.exists(rejected_path):
+        with open(rejected_path, "r", newline="", encoding="utf-8") as file:
+            saved = {tuple(row[1:]) for row in csv.reader(file)}
+    
+    with open(rejected_path, "a", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        for line_number, row in rejected:
+            fields = [field.strip() for field in row]
+            if tuple(fields) not in saved:
+                writer.writerow([f"line {line_number}"] + fields)
+                saved.add(tuple(fields))
+    return rejected_path
+
+def weighted_average_cost(product: dict, quantity: int, unit_cost: float) -> float:
+    """
+    Get a product's cost price after receiving units at a given cost.
+
+    The cost of the stock on hand and of the delivery are averaged by units,
+    so a cheaper or dearer delivery moves the cost price only in proportion
+    to its share of the stock. Must be called before the quantity is added.
+
+    Args:
+        product (dict): Product receiving the units
+        quantity (int): Units received
+        unit_cost (float): Cost price of each received unit
+
+    Returns:
+        float: The weighted average cost price, rounded to paise
+    """
+    on_hand = max(product["quantity"], 0)
+    if on_hand + quantity <= 0:
+        return unit_cost
+    return round((on_hand * product["cost_price"] + quantity * unit_cost) / (on_hand + quantity), 2)
+
+@metrics.timed("wecare_load_products_seconds")
 def load_products(file_path: str):
     """
     Loads products from a file or creates a new file if it doesn't exist.
 
-    This function reads product data from a CSV-formatted file where each line
-    represents a product with comma-separated values. The expected format is:
+    This function reads product data from a CSV file with a header row that
+    holds the schema version and the column names, followed by one product
+    per row:
     name,brand,quantity,cost_price,country
 
+    Files in the legacy format without a header row are upgraded
+    automatically; the original file is kept next to it with a .v1.bak
+    suffix. Rows that cannot be parsed are copied to the rejected rows file
+    so their stock is not lost when the product file is next rewritten.
+
     Args:
         file_path (str): The path to the file containing the products
 
@@ -16,105 +345,178 @@ def load_products(file_path: str):
               id, name, brand, quantity, cost_price, country
     """
     products = []
+    start = time.perf_counter()
     
     try:
         # Create the file if it doesn't exist
         if not os.path.exists(file_path):
             directory = os.path.dirname(file_path)
-            if not os.path.exists(directory):
+            if directory and not os.path.exists(directory):
                 os.makedirs(directory)
-                print(f"Created directory: {directory}")
+                logger.info("Created directory: %s", directory, directory=directory)
                 
-            with open(file_path, "w") as file:
-                # Write empty file
-                pass
-            print(f"Created new product file at {file_path}")
+            with open(file_path, "wb") as file:
+                # Write a file with only the header row
+                file.write(HEADER_ROW.ljust(RECORD_WIDTH - 1) + b"\n")
+            logger.info("Created new product file at %s", file_path, file=file_path)
             return products
             
         # Read products from file
-        print(f"Reading products from {file_path}...")
-        with open(file_path, "r") as file:
-            line_number = 0
-            valid_products = 0
-            invalid_lines = 0
-            
-            for line in file:
-                line_number += 1
-                if not line.strip():
-                    continue  # Skip empty lines
-                    
-                parts = line.strip().split(",")
-                if len(parts) < 5:
-                    print(f"\033[93mWarning: Invalid product format on line {line_number}: {line.strip()}\033[0m")
-                    invalid_lines += 1
-                    continue
-                    
-                try:
-                    products.append({
-                        "name": parts[0].strip(),
-                        "brand": parts[1].strip(),
-                        "quantity": int(parts[2].strip()),
-                        "cost_price": float(parts[3].strip()),
-                        "country": parts[4].strip()
-                    })
-                    valid_products += 1
-                except (ValueError, IndexError) as e:
-                    print(f"\033[91mError parsing product on line {line_number}: {line.strip()} - {e}\033[0m")
-                    invalid_lines += 1
+        logger.info("Reading products from %s...", file_path, file=file_path)
+        with open(file_path, "r", newline="", encoding="utf-8") as file:
+            products, rejected, schema_version = parse_products(file, file_path)
             
-            # Summary of loading process
-            if invalid_lines > 0:
-                print(f"Loaded {valid_products} products successfully. Found {invalid_lines} invalid entries.")
-            else:
-                print(f"Loaded {valid_products} products successfully.")
+        # Keep rows that could not be parsed before they are lost on the next save
+        if rejected:
+            rejected_path = save_rejected_rows(rejected, file_path)
+            logger.warning("Loaded %d products successfully. Found %d invalid entries, copied to %s.",
+                           len(products), len(rejected), rejected_path, file=file_path, loaded=len(products),
+                           invalid=len(rejected))
+        else:
+            logger.info("Loaded %d products successfully.", len(products), file=file_path,
+                        loaded=len(products))
+        
+        # Upgrade legacy files to the current schema, keeping the original
+        if schema_version < SCHEMA_VERSION:
+            backup_path = f"{file_path}.v{schema_version}.bak"
+            shutil.copyfile(file_path, backup_path)
+            update_product_file(products, file_path)
+            logger.info("Upgraded %s to product file schema %d, the original is kept at %s.", file_path,
+                        SCHEMA_VERSION, backup_path, file=file_path, backup=backup_path)
                     
     except FileNotFoundError:
-        print(f"\033[91mProduct file not found: {file_path}\033[0m")
+        logger.error(f"Product file not found: {file_path}")
     except Exception as e:
-        print(f"\033[91mAn error occurred while loading products: {e}\033[0m")
+        logger.error(f"An error occurred while loading products: {e}")
     
     # Assign IDs to products (1-based indexing)
     for i, product in enumerate(products, 1):
         product["id"] = i
+    
+    # Record load throughput
+    elapsed = time.perf_counter() - start
+    metrics.increment("wecare_load_rows_total", len(products))
+    if elapsed > 0:
+        metrics.set_gauge("wecare_load_rows_per_second", len(products) / elapsed)
         
     return products
 
-def update_product_file(products: list) -> None:
+@metrics.timed("wecare_update_product_file_seconds")
+def update_product_file(products: list, file_path: str = PRODUCTS_FILE) -> None:
     """
     Updates the product file with the given products.
 
-    This function writes all products to the data file in CSV format.
-    Each product is written as a single line with comma-separated values.
+    This function writes the header row and all products to the data file
+    in CSV format. Each product is written as a single row with
+    comma-separated values, quoted where needed. When every row fits, rows
+    are padded to RECORD_WIDTH bytes so later changes can be saved in place
+    by save_product_changes. A warning names the product whose row is too
+    long, since without padding every later save rewrites the whole file.
 
     Args:
         products (list): A list of dictionaries, each representing a product
+        file_path (str, optional): The product file to write, defaults to the
+                                   main store's product file
         
     Returns:
         None
     """
     try:
         # Ensure directory exists
-        directory = os.path.dirname("data/products.txt")
-        if not os.path.exists(directory):
+        directory = os.path.dirname(file_path)
+        if directory and not os.path.exists(directory):
             os.makedirs(directory)
-            print(f"Created directory: {directory}")
+            logger.info("Created directory: %s", directory, directory=directory)
         
         # Count products being saved    
         product_count = len(products)
         
+        # Use the fixed-width layout only if no row is too long for it
+        rows = [format_product_row(product) for product in products]
+        long_rows = [index for index, row in enumerate(rows) if len(row) >= RECORD_WIDTH]
+        fixed_width = not long_rows
+        if long_rows:
+            first = long_rows[0]
+            logger.warning("Product %d (%s) needs %d bytes, more than a %d-byte record, so %s is saved without "
+                           "padding and every later save rewrites the whole file (%d products too long).",
+                           first + 1, products[first]["name"], len(rows[first]) + 1, RECORD_WIDTH, file_path,
+                           len(long_rows), rate_limit=True, file=file_path, product=products[first]["name"],
+                           long_rows=len(long_rows))
+        
         # Write products to file
-        with open("data/products.txt", "w") as file:
-            for product in products:
-                file.write(
-                    f"{product['name']},{product['brand']},{product['quantity']},{product['cost_price']},{product['country']}\n"
-                )
+        with open(file_path, "wb") as file:
+            file.write((HEADER_ROW.ljust(RECORD_WIDTH - 1) if fixed_width else HEADER_ROW) + b"\n")
+            for row in rows:
+                if fixed_width:
+                    row = row.ljust(RECORD_WIDTH - 1)
+                file.write(row + b"\n")
+        
+        # Everything is on disk now
+        clear_dirty(products)
+        
+        # Record snapshot size
+        if metrics.is_enabled():
+            file_size = os.path.getsize(file_path)
+            metrics.set_gauge("wecare_product_file_bytes", file_size)
+            metrics.increment("wecare_product_file_bytes_written_total", file_size)
         
         # Success message
-        print(f"\033[92mProduct file updated successfully. Saved {product_count} products.\033[0m")
+        logger.success("Product file updated successfully. Saved %d products.", product_count, file=file_path,
+                       saved=product_count)
     except Exception as e:
-        print(f"\033[91mAn error occurred while updating product file: {e}\033[0m")
+        logger.error("An error occurred while updating product file: %s", e, file=file_path)
 
-def edit_product_information(products: list) -> None:
+def save_product_changes(products: list, file_path: str = PRODUCTS_FILE) -> bool:
+    """
+    Save only the products that changed since the product file was last written.
+
+    Nothing is written if no product is flagged as changed. If the file uses
+    the fixed-width layout of the current schema and still holds exactly
+    these products, each changed row is overwritten in place after the
+    header row, so saving one change costs one seek and one write regardless
+    of catalog size. Otherwise (e.g. products were added, a row grew past
+    RECORD_WIDTH or the file is in the legacy format) the whole file is
+    rewritten.
+
+    Args:
+        products (list): A list of dictionaries, each representing a product
+        file_path (str, optional): The product file to write
+        
+    Returns:
+        bool: True if anything was written, False if there were no changes
+    """
+    dirty = find_dirty_rows(products)
+    if not dirty:
+        logger.info("No changes to save.", file=file_path)
+        return False
+    
+    changes = count_unsaved_changes(products)
+    rows = {index: format_product_row(products[index]) for index in dirty}
+    in_place = (os.path.exists(file_path)
+                and os.path.getsize(file_path) == (len(products) + 1) * RECORD_WIDTH
+                and all(len(row) < RECORD_WIDTH for row in rows.values())
+                and read_header_row(file_path) == HEADER_ROW)
+    if not in_place:
+        update_product_file(products, file_path)
+        return True
+    
+    try:
+        with metrics.timer("wecare_update_product_file_seconds"):
+            with open(file_path, "r+b") as file:
+                for index, row in rows.items():
+                    # The header row takes the first record
+                    file.seek((index + 1) * RECORD_WIDTH)
+                    file.write(row.ljust(RECORD_WIDTH - 1) + b"\n")
+        
+        clear_dirty(products)
+        metrics.increment("wecare_product_file_bytes_written_total", len(dirty) * RECORD_WIDTH)
+        logger.success("Product file updated successfully. Saved %d changed products.", len(dirty),
+                       file=file_path, saved=len(dirty), changes=changes)
+    except OSError as e:
+        logger.error("An error occurred while updating product file: %s", e, file=file_path)
+    return True
+
+def edit_product_information(products: list, file_path: str = PRODUCTS_FILE) -> None:
     """
     Edit existing product information or add new products to the inventory.
     
@@ -123,6 +525,7 @@ def edit_product_information(products: list) -> None:
     
     Args:
         products (list): A list of dictionaries, each representing a product
+        file_path (str, optional): The product file the changes are saved to
         
     Returns:
         None
@@ -144,28 +547,30 @@ def edit_product_information(products: list) -> None:
             
             # Process user choice
             if choice == 1:
-                edit_existing_product(products)
+                edit_existing_product(products, file_path)
             elif choice == 2:
-                add_new_product(products)
+                add_new_product(products, file_path)
             elif choice == 3:
                 break
             else:
-                print("\033[91mInvalid choice. Please enter a number between 1 and 3.\033[0m")
+                logger.error("Invalid choice. Please enter a number between 1 and 3.")
         except ValueError:
-            print("\033[91mInvalid input. Please enter a valid number.\033[0m")
+            logger.error("Invalid input. Please enter a valid number.")
     
-    # Save changes to file
-    update_product_file(products)
+    # Save changed products to file
+    save_product_changes(products, file_path)
 
-def edit_existing_product(products: list) -> None:
+def edit_existing_product(products: list, file_path: str = PRODUCTS_FILE) -> None:
     """
     Edit an existing product's information.
     
     This function displays all products and allows the user to select one to edit.
     The user can then modify specific attributes of the selected product.
+    Quantity, cost price and name changes are recorded in the inventory history.
     
     Args:
         products (list): A list of dictionaries, each representing a product
+        file_path (str, optional): The product file the product belongs to
         
     Returns:
         None
@@ -175,7 +580,8 @@ def edit_existing_product(products: list) -> None:
         print("\n" + "="*80)
         print(" "*30 + "EDIT PRODUCT" + " "*30)
         print("="*80)
-        print("\n\033[93mNo products available to edit. Please add products first.\033[0m")
+        print()
+        logger.warning("No products available to edit. Please add products first.")
         return
     
     # Display current products with a numbered list
@@ -196,9 +602,9 @@ def edit_existing_product(products: list) -> None:
                 return
             if 1 <= product_idx <= len(products):
                 break
-            print(f"\033[91mError: Please enter a number between 1 and {len(products)}.\033[0m")
+            logger.error(f"Error: Please enter a number between 1 and {len(products)}.")
         except ValueError:
-            print("\033[91mError: Invalid input. Please enter a valid number.\033[0m")
+            logger.error("Error: Invalid input. Please enter a valid number.")
     
     # Get the selected product
     product = products[product_idx - 1]
@@ -217,9 +623,9 @@ def edit_existing_product(products: list) -> None:
             attr_choice = int(input("\nSelect attribute to modify (1-6): "))
             if 1 <= attr_choice <= 6:
                 break
-            print("\033[91mError: Please enter a number between 1 and 6.\033[0m")
+            logger.error("Error: Please enter a number between 1 and 6.")
         except ValueError:
-            print("\033[91mError: Invalid input. Please enter a valid number.\033[0m")
+            logger.error("Error: Invalid input. Please enter a valid number.")
     
     # Store original values for confirmation message
     old_values = {}
@@ -231,7 +637,7 @@ def edit_existing_product(products: list) -> None:
         if new_value:
             product['name'] = new_value
         else:
-            print("\033[93mName unchanged - empty value provided.\033[0m")
+            logger.warning("Name unchanged - empty value provided.")
             return
     elif attr_choice == 2:
         old_values['brand'] = product['brand']
@@ -239,7 +645,7 @@ def edit_existing_product(products: list) -> None:
         if new_value:
             product['brand'] = new_value
         else:
-            print("\033[93mBrand unchanged - empty value provided.\033[0m")
+            logger.warning("Brand unchanged - empty value provided.")
             return
     elif attr_choice == 3:
         old_values['quantity'] = product['quantity']
@@ -248,10 +654,10 @@ def edit_existing_product(products: list) -> None:
             if new_value >= 0:
                 product['quantity'] = new_value
             else:
-                print("\033[91mError: Quantity cannot be negative.\033[0m")
+                logger.error("Error: Quantity cannot be negative.")
                 return
         except ValueError:
-            print("\033[91mError: Invalid input. Quantity must be a number.\033[0m")
+            logger.error("Error: Invalid input. Quantity must be a number.")
             return
     elif attr_choice == 4:
         old_values['cost_price'] = product['cost_price']
@@ -260,10 +666,10 @@ def edit_existing_product(products: list) -> None:
             if new_value >= 0:
                 product['cost_price'] = new_value
             else:
-                print("\033[91mError: Cost price cannot be negative.\033[0m")
+                logger.error("Error: Cost price cannot be negative.")
                 return
         except ValueError:
-            print("\033[91mError: Invalid input. Cost price must be a number.\033[0m")
+            logger.error("Error: Invalid input. Cost price must be a number.")
             return
     elif attr_choice == 5:
         old_values['country'] = product['country']
@@ -271,11 +677,38 @@ def edit_existing_product(products: list) -> None:
         if new_value:
             product['country'] = new_value
         else:
-            print("\033[93mCountry unchanged - empty value provided.\033[0m")
+            logger.warning("Country unchanged - empty value provided.")
             return
     elif attr_choice == 6:
         return
     
+    # Notify listeners, identifying renamed products by their previous name
+    quantity_delta = product['quantity'] - old_values.get('quantity', product['quantity'])
+    mark_dirty(product, products)
+    publish_change("edit", product, name=old_values.get('name', product['name']), quantity_delta=quantity_delta)
+    
+    # Record the manual adjustment in the inventory history
+    history_line = {"name": old_values.get('name', product['name']), "quantity_delta": quantity_delta}
+    if 'name' in old_values:
+        history_line["new_name"] = product['name']
+    if 'cost_price' in old_values:
+        history_line["cost_price"] = product['cost_price']
+        history_line["old_cost_price"] = old_values['cost_price']
+    record_transaction("edit", [history_line], products, file_path)
+    
+    # Keep the product's lots and purchase orders in step with its new name or lower quantity
+    lot_book = get_lot_book(file_path)
+    if 'name' in old_values:
+        # Imported here because purchase orders build on this module
+        from src.purchase_order_manager import get_order_book
+        order_book = get_order_book(file_path)
+        order_book.rename(old_values['name'], product['name'])
+        order_book.save()
+        lot_book.rename(old_values['name'], product['name'])
+    if quantity_delta < 0:
+        lot_book.reconcile(product)
+    lot_book.save()
+    
     # Show confirmation with before/after values
     print("\n" + "-"*80)
     if 'name' in old_values:
@@ -290,9 +723,10 @@ def edit_existing_product(products: list) -> None:
         print(f"Country updated: '{old_values['country']}' → '{product['country']}'")
     print("-"*80)
     
-    print(f"\n\033[92mProduct '{product['name']}' updated successfully.\033[0m")
+    print()
+    logger.success(f"Product '{product['name']}' updated successfully.")
 
-def add_new_product(products: list) -> None:
+def add_new_product(products: list, file_path: str = PRODUCTS_FILE) -> None:
     """
     Add a new product to the inventory.
     
@@ -301,6 +735,7 @@ def add_new_product(products: list) -> None:
     
     Args:
         products (list): A list of dictionaries, each representing a product
+        file_path (str, optional): The product file the product is added to
         
     Returns:
         None
@@ -313,12 +748,12 @@ def add_new_product(products: list) -> None:
     while True:
         name = input("\nEnter product name: ").strip()
         if not name:
-            print("\033[91mError: Product name cannot be empty.\033[0m")
+            logger.error("Error: Product name cannot be empty.")
             continue
             
         # Check if product already exists
         if any(p["name"].lower() == name.lower() for p in products):
-            print(f"\033[93mProduct '{name}' already exists. Please use edit option instead.\033[0m")
+            logger.warning(f"Product '{name}' already exists. Please use edit option instead.")
             continue
         
         break
@@ -326,35 +761,35 @@ def add_new_product(products: list) -> None:
     # Get brand with default value
     brand = input("Enter brand name: ").strip() or "Generic"
     if brand == "Generic":
-        print("\033[93mUsing default brand: 'Generic'\033[0m")
+        logger.warning("Using default brand: 'Generic'")
     
     # Get quantity with validation
     while True:
         try:
             quantity = int(input("Enter initial quantity: "))
             if quantity < 0:
-                print("\033[91mError: Quantity cannot be negative.\033[0m")
+                logger.error("Error: Quantity cannot be negative.")
                 continue
             break
         except ValueError:
-            print("\033[91mError: Invalid input. Please enter a valid quantity.\033[0m")
+            logger.error("Error: Invalid input. Please enter a valid quantity.")
     
     # Get cost price with validation
     while True:
         try:
             cost_price = float(input("Enter cost price: "))
             if cost_price < 0:
-                print("\033[91mError: Cost price cannot be negative.\033[0m")
+                logger.error("Error: Cost price cannot be negative.")
                 continue
             break
         except ValueError:
-            print("\033[91mError: Invalid input. Please enter a valid cost price.\033[0m")
+            logger.error("Error: Invalid input. Please enter a valid cost price.")
     
     # Get country with default value
     country = input("Enter country of origin: ").strip() or "Unknown"
     if country == "":
         country = "Unknown"
-        print("\033[93mUsing default country: 'Unknown'\033[0m")
+        logger.warning("Using default country: 'Unknown'")
     
     # Create and add new product
     new_product = {
@@ -373,6 +808,10 @@ def add_new_product(products: list) -> None:
     new_product["id"] = max_id + 1
     
     products.append(new_product)
+    mark_dirty(new_product, products)
+    publish_change("add", new_product, quantity_delta=quantity)
+    record_transaction("add", [{"name": name, "quantity_delta": quantity, "cost_price": cost_price}],
+                       products, file_path)
     
     # Display product summary
     print("\n" + "-"*80)
@@ -384,5 +823,6 @@ def add_new_product(products: list) -> None:
     print(f"  Cost Price: ₹{cost_price:.2f}")
     print("-"*80)
     
-    print(f"\n\033[92mNew product '{name}' added successfully.\033[0m")
+    print()
+    logger.success(f"New product '{name}' added successfully.")
 
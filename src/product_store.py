@@ -0,0 +1,399 @@
+import mmap
+import os
+import shutil
+import struct
+from src.data_paths import PRODUCTS_FILE
+
+# Binary layout of the store file:
+#   header  - magic, format version, record count, string table offset and the
+#             modification time and size of the text file it was built from
+#   records - one fixed-size record per product with offsets into the string table
+#   strings - UTF-8 names, plus brands and countries stored once each
+STORE_MAGIC = b"WCSTORE\x00"
+STORE_FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIQqQ")
+RECORD = struct.Struct("<IIIIIIqd")
+
+# Records and strings are written in pieces of about this many bytes when a store is built
+WRITE_CHUNK_BYTES = 1 << 20
+
+def get_store_path(text_path=PRODUCTS_FILE):
+    """
+    Get the path of the binary store built from a product text file.
+
+    Args:
+        text_path (str, optional): Path to the product text file
+
+    Returns:
+        str: Path to the matching binary store, e.g. data/products.store
+    """
+    return os.path.splitext(text_path)[0] + ".store"
+
+def build_store(products, store_path, text_path=None):
+    """
+    Write products to a binary, fixed-record store file.
+
+    Products are consumed one at a time and records and strings are written
+    in chunks, so the products can be streamed from the text file and a
+    catalog larger than memory can be stored. Brands and countries repeat
+    across the catalog and are stored once in the string table; names are
+    stored as they come. The file is written to a temporary path and moved
+    into place, so processes that already have the old store mapped keep a
+    consistent view.
+
+    Args:
+        products (iterable): Product dictionaries, e.g. a list or iter_products
+        store_path (str): Path of the store file to write
+        text_path (str, optional): Text file the products were loaded from,
+                                   recorded so stale stores can be detected
+
+    Returns:
+        None
+    """
+    temp_path = store_path + ".tmp"
+    strings_path = store_path + ".strings.tmp"
+    shared_offsets = {}
+    strings_size = 0
+    count = 0
+
+    try:
+        with open(temp_path, "wb") as file, open(strings_path, "w+b") as strings:
+
+            def add_string(value, shared=False):
+                nonlocal strings_size
+                encoded = value.encode("utf-8")
+                if shared and encoded in shared_offsets:
+                    return shared_offsets[encoded], len(encoded)
+                offset = strings_size
+                strings.write(encoded)
+                strings_size += len(encoded)
+                if shared:
+                    shared_offsets[encoded] = offset
+                return offset, len(encoded)
+
+            # The header is written last, once the record count is known
+            file.write(bytes(HEADER.size))
+            records = bytearray()
+            for product in products:
+                name = add_string(product["name"])
+                brand = add_string(product["brand"], shared=True)
+                country = add_string(product["country"], shared=True)
+                records += RECORD.pack(name[0], name[1], brand[0], brand[1], country[0], country[1],
+                                       product["quantity"], product["cost_price"])
+                count += 1
+                if len(records) >= WRITE_CHUNK_BYTES:
+                    file.write(records)
+                    records.clear()
+            file.write(records)
+
+            strings.seek(0)
+            shutil.copyfileobj(strings, file, WRITE_CHUNK_BYTES)
+
+            source_mtime, source_size = 0, 0
+            if text_path and os.path.exists(text_path):
+                stat = os.stat(text_path)
+                source_mtime, source_size = stat.st_mtime_ns, stat.st_size
+            file.seek(0)
+            file.write(HEADER.pack(STORE_MAGIC, STORE_FORMAT_VERSION, count, HEADER.size + count * RECORD.size,
+                                   source_mtime, source_size))
+        os.replace(temp_path, store_path)
+    finally:
+        # Leftovers of a failed build, and the string table once it was copied
+        for path in (strings_path, temp_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+class ProductStore:
+    """
+    Read-only, memory-mapped view of a binary product store.
+
+    Opening a store only maps the file and reads its header, so it takes the
+    same time regardless of catalog size, and every process that opens the
+    same store shares the operating system's page cache instead of holding a
+    private parsed copy. Products are decoded on access.
+
+    Example:
+        store = open_product_store("data/products.txt")
+        print(len(store), store[0]["name"])
+    """
+
+    def __init__(self, store_path):
+        """
+        Map a store file into memory.
+
+        Args:
+            store_path (str): Path to the store file
+
+        Raises:
+            ValueError: If the file is not a product store of a supported version
+        """
+        self.path = store_path
+        self._file = open(store_path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, strings_offset, source_mtime, source_size = HEADER.unpack_from(self._map, 0)
+        if magic != STORE_MAGIC or version != STORE_FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported product store: {store_path}")
+
+        self._count = count
+        self._strings_offset = strings_offset
+        self.source_mtime = source_mtime
+        self.source_size = source_size
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+
+    def __getitem__(self, index):
+        """
+        Decode the product at a position in the store.
+
+        Args:
+            index (int): Zero-based position of the product
+
+        Returns:
+            dict: Product dictionary with the same keys as load_products,
+                  including its 1-based id
+        """
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("product index out of range")
+
+        name_off, name_len, brand_off, brand_len, country_off, country_len, quantity, cost_price = \
+            RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size)
+        return {
+            "name": self._string(name_off, name_len),
+            "brand": self._string(brand_off, brand_len),
+            "quantity": quantity,
+            "cost_price": cost_price,
+            "country": self._string(country_off, country_len),
+            "id": index + 1
+        }
+
+    def _string(self, offset, length):
+        """Decode a string from the string table."""
+        start = self._strings_offset + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    def string_at(self, offset, length):
+        """
+        Decode a string from the string table.
+
+        Args:
+            offset (int): Offset of the string in the string table, as stored in a record
+            length (int): Length of the encoded string in bytes
+
+        Returns:
+            str: Decoded string
+        """
+        return self._string(offset, length)
+
+    def record_chunks(self, chunk_size):
+        """
+        Iterate over the raw records in chunks of at most chunk_size records.
+
+        Chunks are views of the mapping rather than copies, so the whole
+        catalog never has to fit in memory. A chunk is released when the next
+        one is requested and must not be used, or referenced by arrays built
+        on it, after that.
+
+        Args:
+            chunk_size (int): Maximum number of records per chunk
+
+        Yields:
+            memoryview: Consecutive RECORD-encoded records
+        """
+        with memoryview(self._map) as view:
+            for start in range(0, self._count, chunk_size):
+                end = min(start + chunk_size, self._count)
+                with view[HEADER.size + start * RECORD.size:HEADER.size + end * RECORD.size] as chunk:
+                    yield chunk
+
+    def quantity(self, index):
+        """
+        Read a product's stock without decoding its strings.
+
+        Args:
+            index (int): Zero-based position of the product
+
+        Returns:
+            int: Quantity in stock
+        """
+        return struct.unpack_from("<q", self._map, HEADER.size + index * RECORD.size + 24)[0]
+
+    def to_products(self):
+        """
+        Decode the whole store into a regular product list.
+
+        Returns:
+            list: List of product dictionaries, as returned by load_products
+        """
+        records = self._map[HEADER.size:HEADER.size + self._count * RECORD.size]
+        table = self._map[self._strings_offset:]
+
+        # Brands and countries repeat across the catalog, decode each one once
+        decoded = {}
+
+        def shared_string(offset, length):
+            value = decoded.get(offset)
+            if value is None:
+                value = decoded[offset] = table[offset:offset + length].decode("utf-8")
+            return value
+
+        return [{
+            "name": table[name_off:name_off + name_len].decode("utf-8"),
+            "brand": shared_string(brand_off, brand_len),
+            "quantity": quantity,
+            "cost_price": cost_price,
+            "country": shared_string(country_off, country_len),
+            "id": index
+        } for index, (name_off, name_len, brand_off, brand_len, country_off, country_len, quantity, cost_price)
+            in enumerate(RECORD.iter_unpack(records), 1)]
+
+    def is_stale(self, text_path):
+        """
+        Check whether the text file has changed since the store was built.
+
+        Args:
+            text_path (str): Path to the product text file
+
+        Returns:
+            bool: True if the store must be rebuilt
+        """
+        if not os.path.exists(text_path):
+            return False
+        stat = os.stat(text_path)
+        return stat.st_mtime_ns != self.source_mtime or stat.st_size != self.source_size
+
+    def close(self):
+        """
+        Unmap the store and close its file.
+
+        Returns:
+            None
+        """
+        self._map.close()
+        self._file.close()
+
+def open_product_store(text_path=PRODUCTS_FILE, store_path=None):
+    """
+    Open the binary store for a product file, rebuilding it if needed.
+
+    The store is rebuilt from the text file when it does not exist, has an
+    unsupported format, or the text file's modification time or size differs
+    from the ones recorded when the store was built. Rows are streamed from
+    the text file into the store, so rebuilding works for catalogs that do
+    not fit in memory.
+
+    Args:
+        text_path (str, optional): Path to the product text file
+        store_path (str, optional): Path to the store, derived from text_path by default
+
+    Returns:
+        ProductStore: Memory-mapped store in sync with the text file
+    """
+    store_path = store_path or get_store_path(text_path)
+
+    if os.path.exists(store_path):
+        try:
+            store = ProductStore(store_path)
+            if not store.is_stale(text_path):
+                return store
+            store.close()
+        except (ValueError, struct.error):
+            pass
+
+    # Imported here so reading an up-to-date store does not load the product manager
+    from src.product_manager import iter_products, save_rejected_rows
+    if not os.path.exists(text_path):
+        # Creates the text file, so the store records it
+        from src.product_manager import load_products
+        load_products(text_path)
+    # Stream the rows straight into the store, so the catalog is never held in memory
+    rejected = []
+    with open(text_path, "r", newline="", encoding="utf-8") as file:
+        build_store(iter_products(file, text_path, rejected), store_path, text_path)
+    if rejected:
+        save_rejected_rows(rejected, text_path)
+    return ProductStore(store_path)
+
+def is_store_fresh(text_path=PRODUCTS_FILE, store_path=None):
+    """
+    Check whether an up-to-date store exists for a product file.
+
+    Only the two files' metadata and the store header are read, so this is
+    cheap enough to call before deciding how to load the catalog.
+
+    Args:
+        text_path (str, optional): Path to the product text file
+        store_path (str, optional): Path to the store, derived from text_path by default
+
+    Returns:
+        bool: True if the store can be used instead of parsing the text file
+    """
+    store_path = store_path or get_store_path(text_path)
+    if not os.path.exists(store_path) or not os.path.exists(text_path):
+        return False
+    try:
+        with open(store_path, "rb") as file:
+            magic, version, _, _, source_mtime, source_size = HEADER.unpack(file.read(HEADER.size))
+    except (OSError, struct.error):
+        return False
+    stat = os.stat(text_path)
+    return (magic == STORE_MAGIC and version == STORE_FORMAT_VERSION
+            and stat.st_mtime_ns == source_mtime and stat.st_size == source_size)
+
+def refresh_store(products, text_path=PRODUCTS_FILE):
+    """
+    Rebuild the store of a product file from the products already in memory.
+
+    Every save rewrites the text file, which makes its store stale. Calling
+    this once the products are saved, e.g. before exiting, rebuilds the
+    store without parsing the text file again, so the next start can use it.
+    Nothing is written while the store is fresh or changes are unsaved.
+
+    Args:
+        products (list): Products of the text file, with every change saved
+        text_path (str, optional): Path to the product text file
+
+    Returns:
+        bool: True if the store was rebuilt
+    """
+    # Imported here so reading an up-to-date store does not load the product manager
+    from src.product_manager import count_unsaved_changes
+    if not os.path.exists(text_path) or is_store_fresh(text_path) or count_unsaved_changes(products):
+        return False
+    build_store(products, get_store_path(text_path), text_path)
+    return True
+
+def load_products_cached(text_path=PRODUCTS_FILE):
+    """
+    Load products, using the pre-parsed store when the text file is unchanged.
+
+    Falls back to parsing the text file with load_products and rebuilds the
+    store afterwards so the next start can use it.
+
+    Args:
+        text_path (str, optional): Path to the product text file
+
+    Returns:
+        list: List of product dictionaries, as returned by load_products
+    """
+    if is_store_fresh(text_path):
+        store = ProductStore(get_store_path(text_path))
+        try:
+            return store.to_products()
+        finally:
+            store.close()
+
+    # Imported here so reading an up-to-date store does not load the product manager
+    from src.product_manager import load_products
+    products = load_products(text_path)
+    if os.path.exists(text_path):
+        build_store(products, get_store_path(text_path), text_path)
+    return products
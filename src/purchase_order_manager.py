@@ -0,0 +1,618 @@
+import csv
+import os
+from datetime import date
+from src import logger, metrics
+from src.history_manager import record_transaction
+from src.inventory_events import publish_change
+from src.lot_manager import get_lot_book, parse_expiry
+from src.product_manager import PRODUCTS_FILE, mark_dirty, save_product_changes, weighted_average_cost
+from src.restock_manager import generate_restock_invoice
+
+# Columns of the purchase order file, one row per product of an order
+ORDER_FIELDS = ("po_id", "created", "supplier", "product", "cost_price", "ordered", "shipped", "received",
+                "cancelled")
+
+# Order books loaded during this session, keyed by product file
+_order_books = {}
+
+def get_orders_file(file_path):
+    """
+    Get the path of the purchase order file of a product file.
+
+    Args:
+        file_path (str): Path to the product file, e.g. data/products.txt
+
+    Returns:
+        str: Path to the purchase order file, e.g. data/products_orders.txt
+    """
+    return os.path.splitext(file_path)[0] + "_orders.txt"
+
+def get_order_book(file_path):
+    """
+    Get the purchase order book of a product file, loading it on first use.
+
+    Args:
+        file_path (str): Path to the product file
+
+    Returns:
+        PurchaseOrderBook: Purchase orders of the location
+    """
+    book = _order_books.get(file_path)
+    if book is None:
+        book = _order_books[file_path] = PurchaseOrderBook(get_orders_file(file_path))
+    return book
+
+def get_line_state(line):
+    """
+    Split the units of a purchase order line by state.
+
+    Args:
+        line (dict): Purchase order line
+
+    Returns:
+        tuple: (on order, in transit, received) units
+    """
+    return (line["ordered"] - line["shipped"] - line["cancelled"], line["shipped"] - line["received"],
+            line["received"])
+
+class PurchaseOrderBook:
+    """
+    Supplier purchase orders of one product file.
+
+    Each order line tracks the units ordered, shipped by the supplier,
+    received into stock and cancelled, so units on order (not shipped yet)
+    and in transit (shipped, not received yet) are kept apart from stock on
+    hand. Units only become stock when they are received, and an order can
+    be received in several partial deliveries.
+
+    The units on order and in transit of every product are kept in an index
+    that is updated with each change, so the available-to-promise figure of
+    a product is one dictionary lookup instead of a scan of all orders.
+    """
+
+    def __init__(self, orders_path):
+        """
+        Load a purchase order file.
+
+        Args:
+            orders_path (str): Path to the purchase order file; a missing file means no orders
+        """
+        self.path = orders_path
+        self.orders = {}
+        self._incoming = {}
+        self._next_seq = 1
+        self._changed = False
+
+        if os.path.exists(orders_path):
+            with open(orders_path, "r", newline="", encoding="utf-8") as file:
+                for row in csv.DictReader(file):
+                    order = self.orders.get(row["po_id"])
+                    if order is None:
+                        order = self.orders[row["po_id"]] = {"id": row["po_id"], "created": row["created"],
+                                                             "supplier": row["supplier"], "lines": []}
+                        self._next_seq = max(self._next_seq, int(row["po_id"].split("-")[1]) + 1)
+                    line = {"product": row["product"], "cost_price": float(row["cost_price"])}
+                    for field in ("ordered", "shipped", "received", "cancelled"):
+                        line[field] = int(row[field])
+                    order["lines"].append(line)
+                    self._index(line)
+
+    def _index(self, line, sign=1):
+        """Add a line's units on order and in transit to the per-product totals, or remove them with sign=-1."""
+        on_order, in_transit, _ = get_line_state(line)
+        totals = self._incoming.setdefault(line["product"], [0, 0])
+        totals[0] += sign * on_order
+        totals[1] += sign * in_transit
+
+    def _update(self, line, **changes):
+        """Change the unit counts of a line and keep the index in step."""
+        self._index(line, -1)
+        for field, value in changes.items():
+            line[field] += value
+        self._index(line)
+        self._changed = True
+
+    def find_line(self, po_id, product_name):
+        """
+        Find the line of a product in a purchase order.
+
+        Args:
+            po_id (str): Purchase order ID, e.g. PO-3
+            product_name (str): Product name (case-insensitive)
+
+        Returns:
+            dict: The order line, or None if the order has no such product
+        """
+        order = self.orders.get(po_id)
+        if order is None:
+            return None
+        return next((line for line in order["lines"] if line["product"].lower() == product_name.lower()), None)
+
+    def create_order(self, supplier, items):
+        """
+        Create a purchase order.
+
+        A product listed more than once is merged into a single line with the
+        units added up and the cost price averaged by units, because receipts
+        and voids address a line by its order and product.
+
+        Args:
+            supplier (str): Supplier name
+            items (list): (product name, quantity, cost price) tuples
+
+        Returns:
+            str: ID of the new order, e.g. PO-3
+        """
+        po_id = f"PO-{self._next_seq}"
+        self._next_seq += 1
+        order = {"id": po_id, "created": date.today().isoformat(), "supplier": supplier, "lines": []}
+        lines = {}
+        for product_name, quantity, cost_price in items:
+            line = lines.get(product_name.lower())
+            if line is None:
+                line = lines[product_name.lower()] = {"product": product_name, "cost_price": cost_price,
+                                                      "ordered": quantity, "shipped": 0, "received": 0,
+                                                      "cancelled": 0}
+                order["lines"].append(line)
+                continue
+            line["cost_price"] = round((line["ordered"] * line["cost_price"] + quantity * cost_price)
+                                       / (line["ordered"] + quantity), 2)
+            line["ordered"] += quantity
+        for line in order["lines"]:
+            self._index(line)
+        self.orders[po_id] = order
+        self._changed = True
+        return po_id
+
+    def ship(self, line, units):
+        """
+        Mark units of an order line as shipped by the supplier.
+
+        Args:
+            line (dict): Order line
+            units (int): Units shipped, at most the units still on order
+
+        Returns:
+            int: Units marked as in transit
+        """
+        units = min(units, get_line_state(line)[0])
+        if units > 0:
+            self._update(line, shipped=units)
+        return max(units, 0)
+
+    def receive(self, line, units):
+        """
+        Record units of an order line as received.
+
+        Units in transit are received first. Units that arrive without being
+        marked as shipped are taken from the units on order.
+
+        Args:
+            line (dict): Order line
+            units (int): Units received
+
+        Returns:
+            int: Units recorded, at most the units on order and in transit
+        """
+        on_order, in_transit, _ = get_line_state(line)
+        units = min(units, on_order + in_transit)
+        if units <= 0:
+            return 0
+        self._update(line, shipped=max(units - in_transit, 0), received=units)
+        return units
+
+    def unreceive(self, line, units):
+        """
+        Move received units of an order line back to in transit, e.g. when the receipt is voided.
+
+        Args:
+            line (dict): Order line
+            units (int): Units to move back
+
+        Returns:
+            int: Units moved back, at most the units received
+        """
+        units = min(units, line["received"])
+        if units > 0:
+            self._update(line, received=-units)
+        return max(units, 0)
+
+    def cancel(self, po_id):
+        """
+        Cancel the units of an order that have not been shipped yet.
+
+        Args:
+            po_id (str): Purchase order ID
+
+        Returns:
+            int: Units cancelled
+        """
+        cancelled = 0
+        for line in self.orders[po_id]["lines"]:
+            on_order = get_line_state(line)[0]
+            if on_order > 0:
+                self._update(line, cancelled=on_order)
+                cancelled += on_order
+        return cancelled
+
+    def get_status(self, po_id):
+        """
+        Get the state of a purchase order.
+
+        Args:
+            po_id (str): Purchase order ID
+
+        Returns:
+            str: "ordered", "in transit", "partially received", "received" or "cancelled"
+        """
+        on_order = in_transit = received = 0
+        for line in self.orders[po_id]["lines"]:
+            line_on_order, line_in_transit, line_received = get_line_state(line)
+            on_order += line_on_order
+            in_transit += line_in_transit
+            received += line_received
+        if in_transit:
+            return "in transit"
+        if on_order:
+            return "partially received" if received else "ordered"
+        return "received" if received else "cancelled"
+
+    def incoming(self, product_name):
+        """
+        Get the units of a product that are on order and in transit.
+
+        Args:
+            product_name (str): Product name
+
+        Returns:
+            tuple: (on order, in transit) units across all orders
+        """
+        totals = self._incoming.get(product_name)
+        return (totals[0], totals[1]) if totals else (0, 0)
+
+    def available_to_promise(self, product, held=0):
+        """
+        Get how many units of a product can be promised now and later.
+
+        Args:
+            product (dict): Product to check
+            held (int, optional): Units already promised, e.g. held in a cart
+
+        Returns:
+            dict: Units available now from stock on hand, in transit and on
+                  order, and the total that can be promised once every open
+                  order has been received
+        """
+        on_order, in_transit = self.incoming(product["name"])
+        now = max(product["quantity"] - held, 0)
+        return {"now": now, "in_transit": in_transit, "on_order": on_order,
+                "total": now + in_transit + on_order}
+
+    def rename(self, old_name, new_name):
+        """
+        Move a product's order lines to its new name.
+
+        Args:
+            old_name (str): Previous product name
+            new_name (str): New product name
+
+        Returns:
+            None
+        """
+        if old_name not in self._incoming:
+            return
+        for order in self.orders.values():
+            for line in order["lines"]:
+                if line["product"] == old_name:
+                    line["product"] = new_name
+        self._incoming[new_name] = self._incoming.pop(old_name)
+        self._changed = True
+
+    def save(self):
+        """
+        Write the purchase order file if any order changed.
+
+        The file is written to a temporary path and moved into place.
+
+        Returns:
+            None
+        """
+        if not self._changed:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(ORDER_FIELDS)
+            for order in self.orders.values():
+                for line in order["lines"]:
+                    writer.writerow([order["id"], order["created"], order["supplier"], line["product"],
+                                     line["cost_price"], line["ordered"], line["shipped"], line["received"],
+                                     line["cancelled"]])
+        os.replace(temp_path, self.path)
+        self._changed = False
+
+def describe_incoming(promise):
+    """
+    Describe the units of a product that are on their way, for messages to the user.
+
+    Args:
+        promise (dict): Available-to-promise figures as returned by
+                        PurchaseOrderBook.available_to_promise
+
+    Returns:
+        str: e.g. "20 units in transit and 50 on order from suppliers, 70
+             units can be promised in total", or "" if nothing is on its way
+    """
+    parts = []
+    if promise["in_transit"]:
+        parts.append(f"{promise['in_transit']} units in transit")
+    if promise["on_order"]:
+        parts.append(f"{promise['on_order']} {'units ' if not parts else ''}on order")
+    if not parts:
+        return ""
+    return f"{' and '.join(parts)} from suppliers, {promise['total']} units can be promised in total"
+
+def receive_purchase_order(products, po_id, receipts, file_path=PRODUCTS_FILE):
+    """
+    Receive a full or partial delivery of a purchase order into stock.
+
+    Every received product gets a new lot at the order's cost price, and its
+    cost price becomes the weighted average of the stock on hand and the
+    delivery. The delivery is recorded as one restock transaction that
+    references the order, so it can be voided like any restock.
+
+    Args:
+        products (list): Products of the location the order was placed for
+        po_id (str): Purchase order ID
+        receipts (dict): Mapping of product name to (units, expiry date) tuples
+        file_path (str, optional): Product file of the location
+
+    Returns:
+        str: ID of the restock transaction, or None if nothing was received
+    """
+    order_book = get_order_book(file_path)
+    if po_id not in order_book.orders:
+        logger.error(f"Error: Purchase order {po_id} not found.")
+        return None
+
+    # Validate every line before changing anything
+    plan = []
+    for product_name, (units, expiry) in receipts.items():
+        line = order_book.find_line(po_id, product_name)
+        if line is None:
+            logger.error(f"Error: {product_name} is not on {po_id}.")
+            return None
+        on_order, in_transit, _ = get_line_state(line)
+        if units <= 0 or units > on_order + in_transit:
+            logger.error(f"Error: Only {on_order + in_transit} units of {line['product']} are still expected "
+                         f"on {po_id}.")
+            return None
+        product = next((p for p in products if p["name"] == line["product"]), None)
+        if product is None:
+            logger.error(f"Error: Product {line['product']} no longer exists at this location.")
+            return None
+        plan.append((line, product, units, expiry))
+
+    if not plan:
+        logger.warning("Nothing to receive.")
+        return None
+
+    lot_book = get_lot_book(file_path)
+    restock_details = []
+    for line, product, units, expiry in plan:
+        order_book.receive(line, units)
+        old_quantity = product["quantity"]
+        old_cost_price = product["cost_price"]
+        average_cost = weighted_average_cost(product, units, line["cost_price"])
+        product["quantity"] += units
+        product["cost_price"] = average_cost
+        mark_dirty(product, products)
+        publish_change("restock", product, quantity_delta=units, old_cost_price=old_cost_price, order=po_id)
+        metrics.increment("wecare_units_restocked_total", units)
+        restock_details.append({
+            "product_name": product["name"],
+            "brand": product["brand"],
+            "quantity": units,
+            "cost_price": line["cost_price"],
+            "average_cost": average_cost,
+            "old_quantity": old_quantity,
+            "old_cost_price": old_cost_price,
+            "item_cost": line["cost_price"] * units,
+            "lot": lot_book.add_lot(product["name"], units, line["cost_price"], expiry),
+            "expiry": expiry
+        })
+
+    invoice_path = generate_restock_invoice(restock_details, sum(item["item_cost"] for item in restock_details))
+    metrics.increment("wecare_restocks_total")
+    txn_id = record_transaction("restock", [{
+        "name": item["product_name"],
+        "quantity_delta": item["quantity"],
+        "cost_price": item["average_cost"],
+        "old_cost_price": item["old_cost_price"],
+        "lot": item["lot"]
+    } for item in restock_details], products, file_path, reference=po_id)
+    save_product_changes(products, file_path)
+    lot_book.save()
+    order_book.save()
+
+    logger.success(f"Received {sum(item['quantity'] for item in restock_details)} units on {po_id} "
+                   f"({order_book.get_status(po_id)}).", po_id=po_id, txn_id=txn_id, invoice=invoice_path)
+    for item in restock_details:
+        print(f"{item['product_name']}: +{item['quantity']} as {item['lot']}, "
+              f"average cost ₹{item['old_cost_price']:.2f} -> ₹{item['average_cost']:.2f}")
+    print(f"Transaction ID: {txn_id} (use it to void the receipt)")
+    return txn_id
+
+def display_purchase_orders(order_book, include_closed=False):
+    """
+    Display purchase orders with the units in each state.
+
+    Args:
+        order_book (PurchaseOrderBook): Purchase orders of the location
+        include_closed (bool, optional): Also show received and cancelled orders
+
+    Returns:
+        None
+    """
+    shown = 0
+    print(f"\n{'PO':<8}{'Supplier':<16}{'Product':<24}{'Ordered':>8}{'On Order':>9}{'Transit':>9}"
+          f"{'Received':>9}{'Cost':>12}")
+    print("-"*95)
+    for po_id, order in order_book.orders.items():
+        status = order_book.get_status(po_id)
+        if not include_closed and status in ("received", "cancelled"):
+            continue
+        shown += 1
+        for i, line in enumerate(order["lines"]):
+            on_order, in_transit, received = get_line_state(line)
+            label = po_id if i == 0 else ""
+            supplier = order["supplier"][:15] if i == 0 else ""
+            print(f"{label:<8}{supplier:<16}{line['product'][:23]:<24}{line['ordered']:>8}{on_order:>9}"
+                  f"{in_transit:>9}{received:>9}{'₹' + format(line['cost_price'], '.2f'):>12}")
+        print(f"{'':<8}{order['created']} - {status}")
+    print("-"*95)
+    if not shown:
+        print("No open purchase orders." if not include_closed else "No purchase orders.")
+
+def create_purchase_order(products, file_path=PRODUCTS_FILE):
+    """
+    Ask for a supplier and products to order, and create a purchase order.
+
+    Ordered units are not added to stock until they are received.
+
+    Args:
+        products (list): Products of the location the order is placed for
+        file_path (str, optional): Product file of the location
+
+    Returns:
+        str: ID of the new order, or None if nothing was ordered
+    """
+    supplier = input("\nEnter supplier name: ").strip()
+    if not supplier:
+        logger.error("Error: Supplier name cannot be empty.")
+        return None
+
+    items = []
+    while True:
+        product_name = input("\nEnter product name to order (or 'done' to finish): ").strip()
+        if product_name.lower() == 'done':
+            break
+        product = next((p for p in products if p["name"].lower() == product_name.lower()), None)
+        if not product:
+            logger.error("Product not found. Please try again.")
+            continue
+        try:
+            quantity = int(input(f"Enter quantity to order for {product['name']}: "))
+            cost_price = float(input(f"Enter agreed cost price per unit "
+                                     f"(current average: ₹{product['cost_price']:.2f}): "))
+        except ValueError:
+            logger.error("Error: Invalid input. Please enter valid numbers.")
+            continue
+        if quantity <= 0 or cost_price < 0:
+            logger.error("Error: Quantity must be positive and cost price cannot be negative.")
+            continue
+        if any(name == product["name"] for name, _, _ in items):
+            logger.info(f"{product['name']} is already on this order; the units will be added to its line.")
+        items.append((product["name"], quantity, cost_price))
+
+    if not items:
+        logger.warning("No products ordered. Returning to menu.")
+        return None
+
+    order_book = get_order_book(file_path)
+    po_id = order_book.create_order(supplier, items)
+    order_book.save()
+    total = sum(line["ordered"] * line["cost_price"] for line in order_book.orders[po_id]["lines"])
+    logger.success(f"Purchase order {po_id} placed with {supplier} for ₹{total:.2f}.", po_id=po_id,
+                   supplier=supplier, total=total)
+    return po_id
+
+def manage_purchase_orders(products, file_path=PRODUCTS_FILE):
+    """
+    Display the purchase order submenu.
+
+    Allows placing orders with suppliers, marking them as shipped,
+    receiving full or partial deliveries, cancelling what has not shipped
+    and listing orders.
+
+    Args:
+        products (list): Products of the active location
+        file_path (str, optional): Product file of the active location
+
+    Returns:
+        None
+    """
+    order_book = get_order_book(file_path)
+    while True:
+        # Display submenu header
+        print("\n" + "="*80)
+        print(" "*30 + "PURCHASE ORDERS" + " "*30)
+        print("="*80)
+
+        # Display menu options
+        print("\n  1. Open Orders          - Show orders that are not fully received")
+        print("  2. Place Order          - Order products from a supplier")
+        print("  3. Mark In Transit      - Record that the supplier shipped an order")
+        print("  4. Receive Delivery     - Add a full or partial delivery to stock")
+        print("  5. Cancel Order         - Cancel the units that have not shipped")
+        print("  6. All Orders           - Show every order including closed ones")
+        print("  7. Return               - Go back to the restock menu")
+
+        try:
+            choice = int(input("\nEnter your choice (1-7): "))
+        except ValueError:
+            logger.error("Invalid input. Please enter a valid number.")
+            continue
+
+        if choice == 1:
+            display_purchase_orders(order_book)
+        elif choice == 2:
+            create_purchase_order(products, file_path)
+        elif choice in (3, 4, 5):
+            po_id = input("\nEnter purchase order ID (e.g. PO-3): ").strip().upper()
+            if po_id not in order_book.orders:
+                logger.error(f"Error: Purchase order {po_id} not found.")
+                continue
+            if choice == 5:
+                cancelled = order_book.cancel(po_id)
+                order_book.save()
+                logger.success(f"Cancelled {cancelled} units on {po_id}.", po_id=po_id, cancelled=cancelled)
+                continue
+
+            entries = {}
+            for line in order_book.orders[po_id]["lines"]:
+                on_order, in_transit, _ = get_line_state(line)
+                expected = on_order if choice == 3 else on_order + in_transit
+                if expected <= 0:
+                    continue
+                try:
+                    value = input(f"Units of {line['product']} {'shipped' if choice == 3 else 'received'} "
+                                  f"(max {expected}, blank for all): ").strip()
+                    units = int(value) if value else expected
+                    expiry = ""
+                    if choice == 4 and units > 0:
+                        expiry = parse_expiry(input("Enter expiry date (YYYY-MM-DD, blank if none): "))
+                except ValueError:
+                    logger.error("Error: Invalid input. Skipping this product.")
+                    continue
+                if units > 0:
+                    entries[line["product"]] = (units, expiry)
+
+            if not entries:
+                logger.warning("Nothing recorded.")
+            elif choice == 3:
+                for product_name, (units, _) in entries.items():
+                    order_book.ship(order_book.find_line(po_id, product_name), units)
+                order_book.save()
+                logger.success(f"{po_id} is now {order_book.get_status(po_id)}.", po_id=po_id)
+            else:
+                receive_purchase_order(products, po_id, entries, file_path)
+        elif choice == 6:
+            display_purchase_orders(order_book, include_closed=True)
+        elif choice == 7:
+            return
+        else:
+            logger.error("Invalid choice. Please enter a number between 1 and 7.")
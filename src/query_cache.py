@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from src import metrics
+from src.inventory_events import get_version
+
+# Rendered listings and computed reports kept at most, least recently used dropped first
+DEFAULT_MAX_ENTRIES = 32
+
+class QueryCache:
+    """
+    LRU cache of rendered listings and computed reports.
+
+    Entries are keyed by (query, inventory version). Every committed sale,
+    restock, edit, transfer or reversal publishes a change that bumps the
+    inventory version, so a cached result is only reused while nothing has
+    changed. Older versions can never be requested again, so their entries
+    are dropped as soon as the version moves on.
+
+    Example:
+        listing = query_cache.get_or_compute(("products", "main"), lambda: render(products))
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Create an empty cache.
+
+        Args:
+            max_entries (int, optional): Number of results kept at most
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._version = get_version()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, query, compute):
+        """
+        Get the cached result of a query, computing it on a miss.
+
+        Args:
+            query (tuple): Hashable description of the query, including
+                           anything besides the inventory version that
+                           changes its result (e.g. the location)
+            compute (callable): Function without arguments returning the result
+
+        Returns:
+            object: The cached or freshly computed result
+        """
+        version = get_version()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+        key = (query, version)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            metrics.increment("wecare_query_cache_hits_total")
+            metrics.set_gauge("wecare_query_cache_hit_ratio", self.hit_ratio)
+            return self._entries[key]
+
+        result = compute()
+        self.misses += 1
+        self._entries[key] = result
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        metrics.increment("wecare_query_cache_misses_total")
+        metrics.set_gauge("wecare_query_cache_hit_ratio", self.hit_ratio)
+        return result
+
+    @property
+    def hit_ratio(self):
+        """Share of lookups answered from the cache, 0.0 before the first lookup."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        """
+        Drop every cached result. The hit and miss counts are kept.
+
+        Returns:
+            None
+        """
+        self._entries.clear()
+
+    def stats(self):
+        """
+        Get the cache statistics for tuning the cache size.
+
+        Returns:
+            dict: Keys hits, misses, hit_ratio, entries and max_entries
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries
+        }
+
+# Cache shared by the menu and the reports of this session
+_cache = QueryCache()
+
+def cached_query(query, compute):
+    """
+    Get the result of a query from the shared cache, computing it on a miss.
+
+    Args:
+        query (tuple): Hashable description of the query
+        compute (callable): Function without arguments returning the result
+
+    Returns:
+        object: The cached or freshly computed result
+    """
+    return _cache.get_or_compute(query, compute)
+
+def get_cache_stats():
+    """
+    Get the statistics of the shared cache.
+
+    Returns:
+        dict: Statistics as returned by QueryCache.stats
+    """
+    return _cache.stats()
@@ -0,0 +1,260 @@
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from src.inventory_events import get_version, subscribe, unsubscribe
+from src.cart import MARKUP_MULTIPLIER
+
+class ReplicationPrimary:
+    """
+    Stream inventory changes from the primary process to read replicas.
+
+    Replicas connect over a local socket. Each new replica first receives a
+    full snapshot of the products, followed by every change published through
+    inventory_events as a delta. Replicas acknowledge the version they have
+    applied, which is used to report replica lag.
+    """
+
+    def __init__(self, products, address=("127.0.0.1", 0)):
+        """
+        Start listening for replicas.
+
+        Args:
+            products (list): The primary's live product list
+            address (tuple, optional): Host and port to listen on, a free port
+                                       is picked by default
+        """
+        self.products = products
+        self.authkey = os.urandom(16)
+        self._listener = Listener(address, authkey=self.authkey)
+        self.address = self._listener.address
+        self._lock = threading.Lock()
+        self._replicas = {}
+        self._event_times = {}
+        self._next_replica_id = 0
+
+        subscribe(self._on_change)
+        threading.Thread(target=self._accept_replicas, daemon=True).start()
+
+    def _accept_replicas(self):
+        """Accept replica connections and send each a snapshot."""
+        while True:
+            try:
+                connection = self._listener.accept()
+            except OSError:
+                return
+            with self._lock:
+                self._next_replica_id += 1
+                replica_id = self._next_replica_id
+                version = get_version()
+                self._replicas[replica_id] = {"connection": connection, "acked": 0}
+                connection.send(("snapshot", version, [dict(p) for p in self.products], time.time()))
+            threading.Thread(target=self._read_acks, args=(replica_id,), daemon=True).start()
+
+    def _read_acks(self, replica_id):
+        """Record the versions a replica reports as applied."""
+        connection = self._replicas[replica_id]["connection"]
+        while True:
+            try:
+                _, version = connection.recv()
+            except (EOFError, OSError):
+                with self._lock:
+                    self._replicas.pop(replica_id, None)
+                return
+            with self._lock:
+                self._replicas[replica_id]["acked"] = version
+
+    def _on_change(self, event):
+        """Forward a published change to every connected replica."""
+        with self._lock:
+            self._event_times[event["version"]] = event["timestamp"]
+            for replica_id, replica in list(self._replicas.items()):
+                try:
+                    replica["connection"].send(("delta", event))
+                except OSError:
+                    del self._replicas[replica_id]
+
+            # Forget timestamps every replica has already applied
+            oldest_acked = min((r["acked"] for r in self._replicas.values()), default=event["version"])
+            for version in [v for v in self._event_times if v <= oldest_acked]:
+                del self._event_times[version]
+
+    def publish_snapshot(self, products):
+        """
+        Replace the replicated product list, e.g. after switching location.
+
+        Args:
+            products (list): The new live product list
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.products = products
+            version = get_version()
+            for replica_id, replica in list(self._replicas.items()):
+                try:
+                    replica["connection"].send(("snapshot", version, [dict(p) for p in products], time.time()))
+                except OSError:
+                    del self._replicas[replica_id]
+
+    def replica_lag(self):
+        """
+        Report how far each replica is behind the primary.
+
+        Returns:
+            list: One dictionary per replica with keys replica_id,
+                  versions_behind and seconds_behind
+        """
+        now = time.time()
+        current = get_version()
+        lag = []
+        with self._lock:
+            for replica_id, replica in self._replicas.items():
+                pending = [self._event_times[v] for v in self._event_times if v > replica["acked"]]
+                lag.append({
+                    "replica_id": replica_id,
+                    "versions_behind": max(current - replica["acked"], 0),
+                    "seconds_behind": now - min(pending) if pending else 0.0
+                })
+        return lag
+
+    def close(self):
+        """
+        Stop replicating and disconnect all replicas.
+
+        Returns:
+            None
+        """
+        unsubscribe(self._on_change)
+        self._listener.close()
+        with self._lock:
+            for replica in self._replicas.values():
+                replica["connection"].close()
+            self._replicas.clear()
+
+def _apply_stream(connection, state, lock):
+    """Apply the snapshot and delta stream from the primary to the replica state."""
+    while True:
+        try:
+            message = connection.recv()
+        except (EOFError, OSError):
+            return
+
+        with lock:
+            if message[0] == "snapshot":
+                _, version, products, timestamp = message
+                state["products"] = {p["name"]: p for p in products}
+                state["version"] = version
+                state["applied_at"] = timestamp
+            else:
+                event = message[1]
+                products = state["products"]
+                products.pop(event["name"], None)
+                products[event["product"]["name"]] = event["product"]
+                state["version"] = event["version"]
+                state["applied_at"] = event["timestamp"]
+            version = state["version"]
+        connection.send(("ack", version))
+
+def _run_replica(address, authkey, query_connection):
+    """
+    Entry point of a replica process.
+
+    Keeps a read-only copy of the products up to date from the primary's
+    stream and answers read queries sent over query_connection.
+    """
+    state = {"products": {}, "version": 0, "applied_at": 0.0}
+    lock = threading.Lock()
+    stream = Client(address, authkey=authkey)
+    threading.Thread(target=_apply_stream, args=(stream, state, lock), daemon=True).start()
+
+    while True:
+        try:
+            query = query_connection.recv()
+        except EOFError:
+            return
+
+        with lock:
+            products = sorted(state["products"].values(), key=lambda p: p.get("id", 0))
+            version = state["version"]
+
+        if query[0] == "products":
+            query_connection.send((version, products))
+        elif query[0] == "listing":
+            rows = [{
+                "id": p["id"],
+                "name": p["name"],
+                "brand": p["brand"],
+                "selling_price": p["cost_price"] * MARKUP_MULTIPLIER,
+                "quantity": p["quantity"],
+                "country": p["country"]
+            } for p in products]
+            query_connection.send((version, rows))
+        elif query[0] == "low_stock":
+            query_connection.send((version, [p for p in products if p["quantity"] <= query[1]]))
+        elif query[0] == "stop":
+            stream.close()
+            query_connection.send((version, None))
+            return
+
+class ReplicaClient:
+    """
+    Handle to a read replica process used to serve read-only queries.
+
+    Example:
+        primary = ReplicationPrimary(products)
+        replica = ReplicaClient.start(primary)
+        version, rows = replica.query("listing")
+    """
+
+    def __init__(self, process, connection):
+        self._process = process
+        self._connection = connection
+
+    @classmethod
+    def start(cls, primary):
+        """
+        Start a replica process subscribed to a primary.
+
+        Args:
+            primary (ReplicationPrimary): Primary to replicate from
+
+        Returns:
+            ReplicaClient: Handle to the running replica
+        """
+        parent_end, replica_end = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=_run_replica, args=(primary.address, primary.authkey, replica_end),
+                                          daemon=True)
+        process.start()
+        replica_end.close()
+        return cls(process, parent_end)
+
+    def query(self, name, *args):
+        """
+        Run a read-only query on the replica.
+
+        Supported queries are "products", "listing" and "low_stock" (which
+        takes a stock threshold).
+
+        Args:
+            name (str): Name of the query
+            *args: Query arguments
+
+        Returns:
+            tuple: (replica version, result)
+        """
+        self._connection.send((name,) + args)
+        return self._connection.recv()
+
+    def stop(self):
+        """
+        Stop the replica process.
+
+        Returns:
+            None
+        """
+        self.query("stop")
+        self._process.join()
+        self._connection.close()
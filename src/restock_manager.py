@@ -1,16 +1,23 @@
 from datetime import datetime
 import os
-from src.product_manager import update_product_file
+from src import logger, metrics
+from src.logger import colorize
+from src.product_manager import PRODUCTS_FILE, mark_dirty, save_product_changes, weighted_average_cost
+from src.history_manager import record_transaction
+from src.inventory_events import publish_change
+from src.lot_manager import get_lot_book, parse_expiry
 
-def restock_products(products):
+def restock_products(products, file_path=PRODUCTS_FILE):
     """
     Handle the restocking of existing products or adding new products to inventory.
     
     This function provides a submenu for restocking operations, allowing users to
-    either add stock to existing products or add completely new products to the inventory.
+    either add stock to existing products directly or order it from suppliers
+    and receive it when it arrives.
     
     Args:
         products (list): List of product dictionaries containing inventory information
+        file_path (str, optional): Product file of the location being restocked
         
     Returns:
         None
@@ -22,37 +29,46 @@ def restock_products(products):
     
     # Display menu options
     print("\n  1. Restock Existing Product  - Add inventory to products already in system")
-    print("  2. Return to Main Menu     - Go back to main menu")
+    print("  2. Purchase Orders         - Order from suppliers and receive deliveries")
+    print("  3. Return to Main Menu     - Go back to main menu")
     
     # Get user choice with validation
     while True:
         try:
             choice = int(input("\nEnter your choice (1-3): "))
-            if choice in [1, 2]:
+            if choice in [1, 2, 3]:
                 break
-            print("\033[91mError: Please enter a number between 1 and 3.\033[0m")
+            logger.error("Error: Please enter a number between 1 and 3.")
         except ValueError:
-            print("\033[91mError: Please enter a valid number.\033[0m")
+            logger.error("Error: Please enter a valid number.")
     
     # Process user choice
     if choice == 1:
-        restock_existing_product(products)
+        restock_existing_product(products, file_path)
     elif choice == 2:
+        # Imported here because purchase orders build on this module
+        from src.purchase_order_manager import manage_purchase_orders
+        manage_purchase_orders(products, file_path)
+    elif choice == 3:
         return
     
-    # Save changes to file
-    update_product_file(products)
+    # Save changed products to file, nothing is written if the restock was abandoned
+    save_product_changes(products, file_path)
 
-def restock_existing_product(products):
+def restock_existing_product(products, file_path=PRODUCTS_FILE):
     """
     Restock an existing product in the inventory.
     
-    This function allows users to add more stock to existing products and
-    optionally update the cost price. It generates a restock invoice for
-    record-keeping and updates the inventory.
+    This function allows users to add more stock to existing products that
+    arrived without a purchase order. The product's cost price becomes the
+    weighted average of the stock on hand and the delivery, and each
+    restocked product gets a new lot with the delivery's cost price and
+    expiry date. It generates a restock invoice for record-keeping and
+    updates the inventory.
     
     Args:
         products (list): List of product dictionaries containing inventory information
+        file_path (str, optional): Product file of the location being restocked
         
     Returns:
         None
@@ -62,7 +78,8 @@ def restock_existing_product(products):
         print("\n" + "="*80)
         print(" "*30 + "RESTOCK PRODUCTS" + " "*30)
         print("="*80)
-        print("\n\033[93mNo products available in inventory to restock. Please add products first.\033[0m")
+        print()
+        logger.warning("No products available in inventory to restock. Please add products first.")
         return
         
     # Display current inventory
@@ -87,6 +104,7 @@ def restock_existing_product(products):
     # Initialize restock process variables
     restock_details = []
     total_cost = 0
+    lot_book = get_lot_book(file_path)
     
     # Product selection loop
     while True:
@@ -95,14 +113,14 @@ def restock_existing_product(products):
         # Check if user is done restocking
         if product_name.lower() == 'done':
             if not restock_details:
-                print("\033[93mNo products restocked. Returning to menu.\033[0m")
+                logger.warning("No products restocked. Returning to menu.")
                 return
             break
         
         # Find the product in inventory
         product = next((p for p in products if p["name"].lower() == product_name.lower()), None)
         if not product:
-            print("\033[91mProduct not found. Please try again or add as a new product.\033[0m")
+            logger.error("Product not found. Please try again or add as a new product.")
             continue
         
         # Get restock quantity with validation
@@ -110,28 +128,41 @@ def restock_existing_product(products):
             try:
                 quantity = int(input(f"Enter quantity to add for {product_name}: "))
                 if quantity <= 0:
-                    print("\033[91mError: Quantity must be a positive integer.\033[0m")
+                    logger.error("Error: Quantity must be a positive integer.")
                 else:
                     break
             except ValueError:
-                print("\033[91mError: Invalid input. Please enter a valid quantity.\033[0m")
+                logger.error("Error: Invalid input. Please enter a valid quantity.")
         
-        # Get new cost price with validation
+        # Get the cost price of the delivery with validation
         while True:
             try:
-                cost_price = float(input(f"Enter new cost price for {product_name} (current: ₹{product['cost_price']:.2f}): "))
+                cost_price = float(input(f"Enter cost price per unit of this delivery of {product_name} (current average: ₹{product['cost_price']:.2f}): "))
                 if cost_price < 0:
-                    print("\033[91mError: Cost price cannot be negative.\033[0m")
+                    logger.error("Error: Cost price cannot be negative.")
                 else:
                     break
             except ValueError:
-                print("\033[91mError: Invalid input. Please enter a valid cost price.\033[0m") 
+                logger.error("Error: Invalid input. Please enter a valid cost price.")
+        
+        # Get expiry date of the new lot with validation
+        while True:
+            try:
+                expiry = parse_expiry(input("Enter expiry date for this lot (YYYY-MM-DD, blank if none): "))
+                break
+            except ValueError:
+                logger.error("Error: Invalid date. Please use the format YYYY-MM-DD.")
         
         # Update product in inventory
         old_quantity = product["quantity"]
         old_cost_price = product["cost_price"]
+        average_cost = weighted_average_cost(product, quantity, cost_price)
         product["quantity"] += quantity
-        product["cost_price"] = cost_price
+        product["cost_price"] = average_cost
+        mark_dirty(product, products)
+        publish_change("restock", product, quantity_delta=quantity, old_cost_price=old_cost_price)
+        metrics.increment("wecare_units_restocked_total", quantity)
+        lot_id = lot_book.add_lot(product["name"], quantity, cost_price, expiry)
         
         # Calculate costs
         item_cost = cost_price * quantity
@@ -143,15 +174,20 @@ def restock_existing_product(products):
             "brand": product["brand"],
             "quantity": quantity,
             "cost_price": cost_price,
+            "average_cost": average_cost,
             "old_quantity": old_quantity,
             "old_cost_price": old_cost_price,
-            "item_cost": item_cost
+            "item_cost": item_cost,
+            "lot": lot_id,
+            "expiry": expiry
         })
         
         # Confirm restock action
-        print(f"\033[92mAdded {quantity} units of {product_name} at ₹{cost_price:.2f} each.\033[0m")
+        logger.success(f"Added {quantity} units of {product_name} at ₹{cost_price:.2f} each as {lot_id}"
+                       + (f", expiring {expiry}." if expiry else "."))
         print(f"Item cost: ₹{item_cost:.2f}")
         print(f"New stock level: {old_quantity} + {quantity} = {product['quantity']}")
+        print(f"Average cost price: ₹{old_cost_price:.2f} -> ₹{average_cost:.2f}")
     
     # Display restock summary if items were restocked
     if restock_details:
@@ -167,18 +203,32 @@ def restock_existing_product(products):
         
         # Show total cost
         print("-"*80)
-        print(f"{'Total Cost:':<50}\033[92m₹{total_cost:.2f}\033[0m")
+        print(f"{'Total Cost:':<50}{colorize(f'₹{total_cost:.2f}', 'green')}")
         print("="*80)
         
         # Generate and save restock invoice
         invoice_path = generate_restock_invoice(restock_details, total_cost)
+        metrics.increment("wecare_restocks_total")
+        
+        # Record the restock in the inventory history
+        txn_id = record_transaction("restock", [{
+            "name": item["product_name"],
+            "quantity_delta": item["quantity"],
+            "cost_price": item["average_cost"],
+            "old_cost_price": item["old_cost_price"],
+            "lot": item["lot"]
+        } for item in restock_details], products, file_path, reference=invoice_path)
+        lot_book.save()
         
         # Confirm completion
         print("\n" + "-"*80)
-        print("\033[92mRestock operation completed successfully!\033[0m")
+        logger.success("Restock operation completed successfully!", invoice=invoice_path, total_cost=total_cost,
+                       products=len(restock_details))
         print(f"Restock invoice generated at: {invoice_path}")
+        print(f"Transaction ID: {txn_id} (use it to void the restock)")
         print("-"*80)
 
+@metrics.timed("wecare_restock_invoice_write_seconds")
 def generate_restock_invoice(restock_details, total_cost):
     """
     Generate an invoice for a restock operation.
@@ -223,6 +273,8 @@ def generate_restock_invoice(restock_details, total_cost):
         # List each restocked item
         for item in restock_details:
             invoice.write(f"{item['product_name']:<25}{item['brand']:<15}{item['quantity']:<10}₹{item['cost_price']:<13.2f}₹{item['item_cost']:<13.2f}\n")
+            if item.get("lot"):
+                invoice.write(f"{'':<25}{item['lot']}, expiry: {item.get('expiry') or 'none'}\n")
         
         # Totals section
         invoice.write("-"*80 + "\n")
@@ -0,0 +1,324 @@
+from datetime import datetime
+from src import logger
+from src.customer_manager import record_customer_reversal
+from src.history_manager import find_transaction, get_recent_transactions, reconstruct_stock_at, record_transaction
+from src.inventory_events import publish_change
+from src.lot_manager import cost_of_goods, get_lot_book
+from src.product_manager import PRODUCTS_FILE, mark_dirty, save_product_changes
+
+# Only these transaction types can be voided or returned
+REVERSIBLE_TYPES = ("sale", "restock")
+
+def get_remaining_units(transaction, reversals):
+    """
+    Get how many units of each product in a transaction are not yet reversed.
+
+    Args:
+        transaction (dict): Sale or restock transaction entry
+        reversals (list): Void and return entries that reverse it
+
+    Returns:
+        dict: Mapping of product name to units that can still be reversed
+    """
+    remaining = {}
+    for line in transaction["lines"]:
+        remaining[line["name"]] = remaining.get(line["name"], 0) + abs(line["quantity_delta"])
+    for reversal in reversals:
+        for line in reversal["lines"]:
+            remaining[line["name"]] = remaining.get(line["name"], 0) - abs(line["quantity_delta"])
+    return remaining
+
+def get_reversed_units(product_name, reversals):
+    """
+    Get how many units of a product earlier reversals of a transaction took back.
+
+    Args:
+        product_name (str): Product name
+        reversals (list): Void and return entries that reverse the transaction
+
+    Returns:
+        int: Units already reversed
+    """
+    return sum(abs(line["quantity_delta"]) for reversal in reversals for line in reversal["lines"]
+               if line["name"] == product_name)
+
+def remove_restocked_lots(lot_book, lines, already_reversed, units):
+    """
+    Take the units of a voided restock out of the lots its lines created.
+
+    Lines are undone from the last to the first, so each lot only loses the
+    units its own line added, skipping units earlier reversals took back.
+
+    Args:
+        lot_book (LotBook): Lots of the location
+        lines (list): Restock history lines of one product, in order
+        already_reversed (int): Units of the product reversed before
+        units (int): Units being reversed now
+
+    Returns:
+        None
+    """
+    for line in reversed(lines):
+        if units <= 0:
+            break
+        skipped = min(already_reversed, line["quantity_delta"])
+        already_reversed -= skipped
+        taken = min(line["quantity_delta"] - skipped, units)
+        if taken > 0 and line.get("lot"):
+            lot_book.remove_lot_units(line["lot"], taken)
+        units -= max(taken, 0)
+
+def get_lots_to_restore(line, reversals, units):
+    """
+    Work out which lots the returned units of a sale line go back to.
+
+    Units are put back in the reverse order they were taken, skipping
+    whatever earlier returns of the same sale already put back.
+
+    Args:
+        line (dict): Sale history line with the lots it consumed
+        reversals (list): Void and return entries that reverse the sale
+        units (int): Units being returned
+
+    Returns:
+        list: Entries with keys lot, quantity, cost_price and expiry
+    """
+    restored = {}
+    for reversal in reversals:
+        for reversal_line in reversal["lines"]:
+            if reversal_line["name"] == line["name"]:
+                for entry in reversal_line.get("lots", []):
+                    restored[entry["lot"]] = restored.get(entry["lot"], 0) + entry["quantity"]
+
+    entries = []
+    for entry in reversed(line.get("lots", [])):
+        if units <= 0:
+            break
+        already = min(restored.get(entry["lot"], 0), entry["quantity"])
+        restored[entry["lot"]] = restored.get(entry["lot"], 0) - already
+        quantity = min(entry["quantity"] - already, units)
+        if quantity > 0:
+            entries.append(dict(entry, quantity=quantity))
+            units -= quantity
+    return entries
+
+def reverse_transaction(products, txn_id, file_path=PRODUCTS_FILE, quantities=None):
+    """
+    Void a sale or restock, or return part of a sale, as one transaction.
+
+    Every line is validated before any stock changes, so the reversal is
+    applied either completely or not at all. The reversal is recorded in the
+    inventory history with a reference to the original transaction, and
+    units that were already returned cannot be reversed twice.
+
+    Voiding a restock removes the restocked units again and restores the
+    previous cost price if it has not been changed since. Returned sale
+    units go back into the lots they were sold from, and a voided restock
+    empties the lot it created. Voiding the receipt of a purchase order
+    puts the units back in transit on the order. A sale of a registered
+    customer that is voided or returned in full is marked as reversed in the
+    customer's purchase history.
+
+    Args:
+        products (list): Products of the location the transaction belongs to
+        txn_id (str): ID of the sale or restock, e.g. TXN-42
+        file_path (str, optional): Product file of the location
+        quantities (dict, optional): Mapping of product name to units to
+                                     return. Voids everything not yet
+                                     reversed when omitted
+
+    Returns:
+        str: ID of the reversing transaction, or None if nothing was changed
+    """
+    transaction, reversals = find_transaction(file_path, txn_id)
+    if transaction is None:
+        logger.error(f"Error: Transaction {txn_id} not found.")
+        return None
+    if transaction["type"] not in REVERSIBLE_TYPES:
+        logger.error(f"Error: Only sales and restocks can be reversed, {txn_id} is a {transaction['type']}.")
+        return None
+
+    remaining = get_remaining_units(transaction, reversals)
+    change_type = "void" if quantities is None else "return"
+    if quantities is None:
+        quantities = {name: units for name, units in remaining.items() if units > 0}
+    elif transaction["type"] != "sale":
+        logger.error("Error: Items can only be returned from a sale. Void the restock instead.")
+        return None
+
+    # Validate every line before changing anything
+    plan = []
+    for name, units in quantities.items():
+        if units <= 0:
+            continue
+        if units > remaining.get(name, 0):
+            logger.error(f"Error: Only {max(remaining.get(name, 0), 0)} units of {name} can still be reversed.")
+            return None
+        product = next((p for p in products if p["name"] == name), None)
+        if product is None:
+            logger.error(f"Error: Product {name} no longer exists at this location.")
+            return None
+        if transaction["type"] == "restock" and product["quantity"] < units:
+            logger.error(f"Error: Only {product['quantity']} units of {name} left, cannot remove {units}.")
+            return None
+        plan.append((product, units))
+
+    if not plan:
+        logger.warning(f"Nothing left to reverse in {txn_id}.")
+        return None
+
+    # Apply all lines. A transaction can list a product more than once, e.g. when it was restocked
+    # twice in one session, so every original line of a product is kept in order
+    original_lines = {}
+    for line in transaction["lines"]:
+        original_lines.setdefault(line["name"], []).append(line)
+    lot_book = get_lot_book(file_path)
+    order_book = None
+    if transaction["type"] == "restock" and (transaction.get("reference") or "").startswith("PO-"):
+        # Imported here because purchase orders build on the restock module
+        from src.purchase_order_manager import get_order_book
+        order_book = get_order_book(file_path)
+    history_lines = []
+    for product, units in plan:
+        delta = units if transaction["type"] == "sale" else -units
+        product["quantity"] += delta
+        history_line = {"name": product["name"], "quantity_delta": delta}
+
+        originals = original_lines[product["name"]]
+        if transaction["type"] == "sale" and any("lots" in line for line in originals):
+            sold = {"name": product["name"], "lots": [entry for line in originals for entry in line.get("lots", [])]}
+            restored = get_lots_to_restore(sold, reversals, units)
+            lot_book.restore(product["name"], restored)
+            history_line["lots"] = restored
+            history_line["cost_of_goods"] = -cost_of_goods(restored)
+        elif transaction["type"] == "restock":
+            remove_restocked_lots(lot_book, originals, get_reversed_units(product["name"], reversals), units)
+            lot_book.reconcile(product)
+        if order_book is not None:
+            order_line = order_book.find_line(transaction["reference"], product["name"])
+            if order_line is not None:
+                order_book.unreceive(order_line, units)
+        # The cost price goes back to what it was before the first line, unless it was changed since the last
+        if (transaction["type"] == "restock" and units == remaining[product["name"]]
+                and product["cost_price"] == originals[-1].get("cost_price")
+                and originals[0].get("old_cost_price") is not None):
+            history_line["old_cost_price"] = product["cost_price"]
+            history_line["cost_price"] = originals[0]["old_cost_price"]
+            product["cost_price"] = originals[0]["old_cost_price"]
+
+        mark_dirty(product, products)
+        publish_change(change_type, product, quantity_delta=delta, reverses=txn_id)
+        history_lines.append(history_line)
+
+    reversal_id = record_transaction(change_type, history_lines, products, file_path, reverses=txn_id)
+    save_product_changes(products, file_path)
+    lot_book.save()
+    if order_book is not None:
+        order_book.save()
+
+    # A sale that is now voided or returned in full no longer counts toward the customer's loyalty tier
+    reversed_units = {product["name"]: units for product, units in plan}
+    if (transaction.get("customer")
+            and all(units <= reversed_units.get(name, 0) for name, units in remaining.items())):
+        record_customer_reversal(transaction["customer"], datetime.now().strftime("%Y-%m-%d"), txn_id,
+                                 reversal_id)
+    logger.success(f"{txn_id} reversed by {reversal_id}.", txn_id=txn_id, reversal=reversal_id, type=change_type)
+    return reversal_id
+
+def display_transactions(transactions):
+    """
+    Display transactions in a formatted table.
+
+    Args:
+        transactions (list): Transaction entries, oldest first
+
+    Returns:
+        None
+    """
+    print(f"\n{'ID':<12}{'Type':<10}{'Date':<22}{'Products':<36}")
+    print("-"*80)
+    for entry in transactions:
+        date = datetime.fromtimestamp(entry["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+        summary = ", ".join(f"{line['name']} {line['quantity_delta']:+d}" for line in entry["lines"])
+        if entry.get("reverses"):
+            summary = f"(reverses {entry['reverses']}) {summary}"
+        print(f"{entry['txn_id']:<12}{entry['type']:<10}{date:<22}{summary[:36]:<36}")
+    print("-"*80)
+
+def manage_history(products, file_path=PRODUCTS_FILE):
+    """
+    Display the history and returns submenu.
+
+    Allows viewing recent transactions, voiding sales and restocks,
+    returning items from a sale and looking up stock at a past point in time.
+
+    Args:
+        products (list): Products of the active location
+        file_path (str, optional): Product file of the active location
+
+    Returns:
+        None
+    """
+    while True:
+        # Display submenu header
+        print("\n" + "="*80)
+        print(" "*30 + "HISTORY & RETURNS" + " "*30)
+        print("="*80)
+
+        # Display menu options
+        print("\n  1. Recent Transactions  - Show the latest sales, restocks and edits")
+        print("  2. Void Transaction     - Fully reverse a sale or restock")
+        print("  3. Return Items         - Return part of a sale to stock")
+        print("  4. Stock At Date        - Show stock as it was at a point in time")
+        print("  5. Return to Main Menu  - Go back to main menu")
+
+        try:
+            choice = int(input("\nEnter your choice (1-5): "))
+        except ValueError:
+            logger.error("Invalid input. Please enter a valid number.")
+            continue
+
+        if choice == 1:
+            transactions = get_recent_transactions(file_path)
+            if not transactions:
+                logger.warning("No transactions recorded yet.")
+                continue
+            display_transactions(transactions)
+        elif choice == 2:
+            txn_id = input("\nEnter transaction ID to void (e.g. TXN-12): ").strip().upper()
+            confirm = input(f"Void {txn_id}? (yes/no): ").strip().lower()
+            if confirm in ['yes', 'y']:
+                reverse_transaction(products, txn_id, file_path)
+        elif choice == 3:
+            txn_id = input("\nEnter sale transaction ID (e.g. TXN-12): ").strip().upper()
+            product_name = input("Enter product name to return: ").strip()
+            try:
+                units = int(input("Enter units to return (including free units): "))
+            except ValueError:
+                logger.error("Error: Invalid input. Units must be a number.")
+                continue
+            product = next((p for p in products if p["name"].lower() == product_name.lower()), None)
+            if product is None:
+                logger.error("Product not found. Please try again.")
+                continue
+            reverse_transaction(products, txn_id, file_path, {product["name"]: units})
+        elif choice == 4:
+            value = input("\nEnter date and time (YYYY-MM-DD HH:MM): ").strip()
+            try:
+                timestamp = datetime.strptime(value, "%Y-%m-%d %H:%M").timestamp()
+            except ValueError:
+                logger.error("Error: Please use the format YYYY-MM-DD HH:MM.")
+                continue
+            stock = reconstruct_stock_at(file_path, timestamp)
+            if stock is None:
+                logger.warning("The recorded history does not go back that far.")
+                continue
+            print(f"\n{'Product Name':<30}{'Stock':>10}{'Cost Price':>15}")
+            print("-"*55)
+            for name, entry in stock.items():
+                print(f"{name:<30}{entry['quantity']:>10}{'₹' + format(entry['cost_price'], '.2f'):>15}")
+            print("-"*55)
+        elif choice == 5:
+            return
+        else:
+            logger.error("Invalid choice. Please enter a number between 1 and 5.")
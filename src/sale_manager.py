@@ -1,14 +1,23 @@
 from datetime import datetime
 import os
-from src.product_manager import update_product_file
+from src import logger, metrics
+from src.logger import colorize
+from src.product_manager import PRODUCTS_FILE, save_product_changes
+from src.history_manager import record_transaction
+from src.customer_manager import get_loyalty_discount_rate, record_customer_sale
+from src.cart import MARKUP_MULTIPLIER, Cart
+from src.lot_manager import get_lot_book
+from src.purchase_order_manager import describe_incoming, get_order_book
 
-def process_sale(products, customer_name):
+def process_sale(products, customer_name, file_path=PRODUCTS_FILE, customer=None):
     """
     Process a sale transaction for a customer.
     
     This function handles the entire sales process including:
     - Displaying available products
-    - Adding products to the cart
+    - Adding products to the cart, merging repeated products into one line
+    - Showing the available-to-promise units on order and in transit when
+      stock runs short
     - Calculating totals and discounts
     - Generating invoices
     - Updating inventory
@@ -16,14 +25,20 @@ def process_sale(products, customer_name):
     Args:
         products (list): List of product dictionaries with inventory information
         customer_name (str): Name of the customer making the purchase
+        file_path (str, optional): Product file of the location the sale is made from
+        customer (dict, optional): Registered customer making the purchase. The
+                                   sale is added to their purchase history and
+                                   their loyalty discount is applied
         
     Returns:
         None
     """
-    # Initialize sale variables
-    total_amount = 0
-    sale_details = []
-    MARKUP_MULTIPLIER = 3
+    # Initialize the cart, which merges repeated products into one line
+    cart = Cart()
+    order_book = get_order_book(file_path)
+    
+    # Index products by name so each lookup is a dictionary access
+    by_name = {p["name"].lower(): p for p in products}
 
     # Display welcome message and header
     print(f"\n" + "="*80)
@@ -36,7 +51,8 @@ def process_sale(products, customer_name):
     # Filter and display available products with stock > 0
     in_stock_products = [p for p in products if p["quantity"] > 0]
     if not in_stock_products:
-        print("\n\033[93mSorry, no products are currently in stock.\033[0m")
+        print()
+        logger.warning("Sorry, no products are currently in stock.")
         return
         
     # Display available products
@@ -51,8 +67,8 @@ def process_sale(products, customer_name):
         
         # Check if user is done shopping
         if product_input.lower() == 'done':
-            if not sale_details:
-                print("\033[93mNo items added to cart. Sale cancelled.\033[0m")
+            if not cart:
+                logger.warning("No items added to cart. Sale cancelled.")
                 return
             break
         
@@ -61,70 +77,62 @@ def process_sale(products, customer_name):
         if product_input.isdigit():
             # Search by ID
             product_id = int(product_input)
-            product = next((p for p in products if p.get("id") == product_id), None)
+            if 0 < product_id <= len(products) and products[product_id - 1].get("id") == product_id:
+                product = products[product_id - 1]
         else:
             # Search by name
-            product = next((p for p in products if p["name"].lower() == product_input.lower()), None)
+            product = by_name.get(product_input.lower())
             
         if not product:
-            print("\033[91mProduct not found. Please try again.\033[0m")
+            logger.error("Product not found. Please try again.")
             continue
             
-        # Check if product is in stock
-        if product["quantity"] <= 0:
-            print(f"\033[91mSorry, {product['name']} is out of stock.\033[0m")
+        # Check if the product has stock left after what is already in the cart
+        available = cart.available(product)
+        incoming = describe_incoming(order_book.available_to_promise(product, cart.units_held(product)))
+        if available <= 0:
+            if cart.units_held(product):
+                logger.error(f"Sorry, all available units of {product['name']} are already in the cart.")
+            else:
+                logger.error(f"Sorry, {product['name']} is out of stock.")
+            if incoming:
+                logger.info(f"{incoming.capitalize()}.")
             continue
         
-        # Get quantity from user
-        valid_quantity = False
-        while not valid_quantity:
+        # Get quantity from user and add it to the product's cart line
+        while True:
             try:
-                quantity = int(input(f"Enter quantity for {product['name']} (max {product['quantity']}): "))
+                quantity = int(input(f"Enter quantity for {product['name']} (max {available}): "))
                 
                 # Validate quantity
                 if quantity <= 0:
-                    print("\033[91mError: Quantity must be a positive number.\033[0m")
-                    continue
-                    
-                free_quantity = quantity // 3
-                total_quantity = quantity + free_quantity
-                
-                if total_quantity > product["quantity"]:
-                    print(f"\033[91mError: Only {product['quantity']} units of {product['name']} available.\033[0m")
+                    logger.error("Error: Quantity must be a positive number.")
                     continue
                 
-                valid_quantity = True
-                if quantity > total_quantity:
-                    print("\033[91mError: Quantity exceeds available stock.\033[0m")
+                # Combined paid and free units must fit in stock
+                sale_item = cart.add(product, quantity)
+                if sale_item is None:
+                    logger.error(f"Error: Only {available} more units of {product['name']} can be added "
+                                 f"(including free units).")
+                    if incoming:
+                        logger.info(f"{incoming.capitalize()}.")
                     continue
+                break
                 
             except ValueError:
-                print("\033[91mError: Please enter a valid number.\033[0m")
-        
-        # Apply promotions and calculate totals
-        selling_price = product["cost_price"] * MARKUP_MULTIPLIER
-        item_total = selling_price * quantity 
-        total_amount += item_total
-
-        # Add to sale details
-        sale_details.append({
-            "product_name": product["name"],
-            "brand": product["brand"],
-            "quantity_sold": quantity,
-            "free_quantity": free_quantity,
-            "unit_price": selling_price,
-            "item_total": item_total
-        })
+                logger.error("Error: Please enter a valid number.")
         
         # Confirm item added
-        if free_quantity > 0:
-            print(f"\033[92mAdded {quantity} {product['name']} to cart + {free_quantity} FREE!\033[0m")
-            print(f"Item total: ₹{item_total:.2f}")
+        if sale_item["free_quantity"] > 0:
+            logger.success(f"Added {quantity} {product['name']} to cart "
+                           f"({sale_item['quantity_sold']} in cart + {sale_item['free_quantity']} FREE)!")
         else:
-            print(f"\033[92mAdded {quantity} {product['name']} to cart.\033[0m")
-            print(f"Item total: ₹{item_total:.2f}")
+            logger.success(f"Added {quantity} {product['name']} to cart.")
+        print(f"Item total: ₹{sale_item['item_total']:.2f}    Cart total: ₹{cart.subtotal:.2f}")
     
     # Display sale summary
+    sale_details = cart.lines()
+    total_amount = cart.subtotal
     print("\n" + "="*80)
     print(" "*30 + "SALE SUMMARY" + " "*30)
     print("="*80)
@@ -140,11 +148,20 @@ def process_sale(products, customer_name):
     print(f"{'Total Amount:':<65}₹{total_amount:.2f}")
     
     # Apply discount for purchases over ₹1000 (5% discount)
-    discount = 0
-    if total_amount >= 1000:
-        discount = total_amount * 0.05
+    discount = cart.discount
+    if discount:
         print(f"{'Discount (5%):':<65}₹{discount:.2f}")
-        print(f"{'Final Amount:':<65}\033[92m₹{total_amount - discount:.2f}\033[0m")
+    
+    # Apply loyalty discount for returning customers
+    loyalty_discount = 0
+    loyalty_rate, loyalty_tier = get_loyalty_discount_rate(customer) if customer else (0, None)
+    if loyalty_rate:
+        loyalty_discount = cart.total * loyalty_rate
+        print(f"{f'Loyalty Discount ({loyalty_tier} {loyalty_rate * 100:.0f}%):':<65}₹{loyalty_discount:.2f}")
+    
+    final_amount = cart.total - loyalty_discount
+    if final_amount != total_amount:
+        print(f"{'Final Amount:':<65}{colorize(f'₹{final_amount:.2f}', 'green')}")
     print("="*80)
     
     # Confirm sale with user
@@ -152,29 +169,42 @@ def process_sale(products, customer_name):
         confirm = input("\nConfirm sale? (yes/no): ")
         if confirm.lower() in ['yes', 'y', 'no', 'n']:
             break
-        print("\033[91mPlease enter 'yes' or 'no'.\033[0m")
+        logger.error("Please enter 'yes' or 'no'.")
     
     # Process confirmed sale
     if confirm.lower() in ['yes', 'y']:
-        # Update product quantities in inventory
-        for sale in sale_details:
-            product = next((p for p in products if p["name"] == sale["product_name"]), None)
-            if product:
-                product["quantity"] -= (sale["quantity_sold"] + sale["free_quantity"])
-        
-        # Generate invoice and update inventory file
-        invoice_path = generate_invoice(customer_name, sale_details, total_amount, discount)
-        update_product_file(products)
+        with metrics.timer("wecare_sale_commit_seconds"):
+            # Take every cart line from stock at once, earliest-expiring lots first
+            lot_book = get_lot_book(file_path)
+            history_lines = cart.commit(products, lot_book)
+            if history_lines is None:
+                logger.error("Error: Stock changed while the sale was open. Sale cancelled, no changes made.")
+                return
+            
+            # Generate invoice, record the sale in the history and update inventory file
+            invoice_path = generate_invoice(customer_name, sale_details, total_amount, discount,
+                                            loyalty_discount, loyalty_tier, customer["id"] if customer else None)
+            txn_id = record_transaction("sale", history_lines, products, file_path, reference=invoice_path,
+                                        customer=customer["id"] if customer else None)
+            save_product_changes(products, file_path)
+            lot_book.save()
+            if customer:
+                record_customer_sale(customer["id"], get_current_date(), txn_id, final_amount, invoice_path)
+        metrics.increment("wecare_sales_total")
         
         # Confirm completion
         print("\n" + "-"*80)
-        print("\033[92mSale completed successfully!\033[0m")
+        logger.success("Sale completed successfully!", customer=customer_name, invoice=invoice_path,
+                       total=final_amount, customer_id=customer["id"] if customer else None)
         print(f"Invoice generated at: {invoice_path}")
+        print(f"Transaction ID: {txn_id} (use it to void the sale or return items)")
         print("-"*80)
     else:
-        print("\033[93mSale cancelled. No changes made to inventory.\033[0m")
+        logger.warning("Sale cancelled. No changes made to inventory.")
 
-def generate_invoice(customer_name, sale_details, total_amount, discount=0):
+@metrics.timed("wecare_invoice_write_seconds")
+def generate_invoice(customer_name, sale_details, total_amount, discount=0, loyalty_discount=0,
+                     loyalty_tier=None, customer_id=None):
     """
     Generate an invoice for a completed sale.
     
@@ -187,6 +217,9 @@ def generate_invoice(customer_name, sale_details, total_amount, discount=0):
         sale_details (list): List of dictionaries containing sale details
         total_amount (float): Total amount of the sale before discount
         discount (float, optional): Discount amount applied to the sale
+        loyalty_discount (float, optional): Loyalty discount amount applied to the sale
+        loyalty_tier (str, optional): Loyalty tier the loyalty discount was given for
+        customer_id (str, optional): ID of the registered customer
         
     Returns:
         str: Path to the generated invoice file
@@ -208,7 +241,10 @@ def generate_invoice(customer_name, sale_details, total_amount, discount=0):
         # Invoice details section
         invoice.write(f"{'Invoice Date:':<20}{get_current_date()}\n")
         invoice.write(f"{'Invoice Number:':<20}INV-{get_current_date_for_filename()}\n")
-        invoice.write(f"{'Customer Name:':<20}{customer_name}\n\n")
+        invoice.write(f"{'Customer Name:':<20}{customer_name}\n")
+        if customer_id:
+            invoice.write(f"{'Customer ID:':<20}{customer_id}\n")
+        invoice.write("\n")
         
         # Items section
         invoice.write("="*80 + "\n")
@@ -226,7 +262,10 @@ def generate_invoice(customer_name, sale_details, total_amount, discount=0):
         # Apply discount if applicable
         if discount > 0:
             invoice.write(f"{'Discount (5%):':<65}₹{discount:.2f}\n")
-            invoice.write(f"{'Final Amount:':<65}₹{total_amount - discount:.2f}\n")
+        if loyalty_discount > 0:
+            invoice.write(f"{f'Loyalty Discount ({loyalty_tier}):':<65}₹{loyalty_discount:.2f}\n")
+        if discount > 0 or loyalty_discount > 0:
+            invoice.write(f"{'Final Amount:':<65}₹{total_amount - discount - loyalty_discount:.2f}\n")
         
         # Footer section
         invoice.write("="*80 + "\n\n")
@@ -234,6 +273,8 @@ def generate_invoice(customer_name, sale_details, total_amount, discount=0):
         invoice.write(" "*25 + "We Care Because You Matter" + " "*25 + "\n")
         invoice.write(" "*30 + "Visit us again soon!" + " "*30 + "\n")
     
+    if metrics.is_enabled():
+        metrics.increment("wecare_invoice_bytes_written_total", os.path.getsize(invoice_name))
     return invoice_name
 
 def get_current_date():
@@ -0,0 +1,349 @@
+import multiprocessing
+import zlib
+from src.cart import build_sale_item
+from src.product_manager import weighted_average_cost
+
+# How often the coordinator checks that a worker is still alive while waiting for its reply
+WORKER_POLL_SECONDS = 0.5
+
+def shard_for(product_name, shard_count):
+    """
+    Get the shard that owns a product.
+
+    Products are partitioned by a stable hash of their lowercase name so the
+    same product always lands on the same worker, in every process.
+
+    Args:
+        product_name (str): Name of the product
+        shard_count (int): Number of shards in the engine
+
+    Returns:
+        int: Index of the owning shard
+    """
+    return zlib.crc32(product_name.lower().encode("utf-8")) % shard_count
+
+def _apply_sale(stock, holds, name, quantity):
+    """
+    Validate, price and apply a single sale inside a shard worker.
+
+    Args:
+        stock (dict): Products owned by the shard keyed by lowercase name
+        holds (dict): Units held by prepared transactions keyed by lowercase name
+        name (str): Name of the product being sold
+        quantity (int): Number of paid units
+
+    Returns:
+        tuple: (sale_item, invoice_line) or (None, error message) if the sale
+               could not be applied
+    """
+    product = stock.get(name.lower())
+    if product is None:
+        return None, f"Product not found: {name}"
+    if quantity <= 0:
+        return None, "Quantity must be a positive number"
+
+    sale_item = build_sale_item(product, quantity)
+    needed = quantity + sale_item["free_quantity"]
+    if needed > product["quantity"] - holds.get(name.lower(), 0):
+        return None, f"Only {product['quantity']} units of {product['name']} available"
+
+    product["quantity"] -= needed
+    invoice_line = (f"{sale_item['product_name']:<25}{sale_item['brand']:<15}{sale_item['quantity_sold']:<5}"
+                    f"{sale_item['free_quantity']:<5}₹{sale_item['unit_price']:<13.2f}₹{sale_item['item_total']:<8.2f}\n")
+    return sale_item, invoice_line
+
+def _shard_worker(connection, products):
+    """
+    Run the command loop of a single shard worker process.
+
+    Each worker owns its partition of the catalog exclusively, so no locking is
+    needed. Commands are tuples whose first element names the operation:
+
+    - ("sale", name, quantity)
+    - ("restock", name, quantity, cost_price)
+    - ("orders", [(name, quantity), ...])  batch of sales, returns a summary
+    - ("prepare", txn_id, [(name, quantity), ...])  phase one of a cart commit, paid units
+    - ("commit", txn_id) / ("abort", txn_id)  phase two of a cart commit
+    - ("snapshot",)
+    - ("stop",)
+
+    Args:
+        connection (Connection): Worker end of the pipe to the coordinator
+        products (list): Products owned by this shard
+
+    Returns:
+        None
+    """
+    stock = {product["name"].lower(): product for product in products}
+    holds = {}
+    prepared = {}
+
+    while True:
+        command = connection.recv()
+        try:
+            operation = command[0]
+            if operation == "sale":
+                sale_item, result = _apply_sale(stock, holds, command[1], command[2])
+                connection.send((sale_item is not None, sale_item if sale_item else result))
+
+            elif operation == "restock":
+                product = stock.get(command[1].lower())
+                if product is None:
+                    connection.send((False, f"Product not found: {command[1]}"))
+                    continue
+                if command[3] is not None:
+                    product["cost_price"] = weighted_average_cost(product, command[2], command[3])
+                product["quantity"] += command[2]
+                connection.send((True, dict(product)))
+
+            elif operation == "orders":
+                completed = 0
+                rejected = 0
+                revenue = 0.0
+                invoice_bytes = 0
+                for name, quantity in command[1]:
+                    sale_item, result = _apply_sale(stock, holds, name, quantity)
+                    if sale_item is None:
+                        rejected += 1
+                        continue
+                    completed += 1
+                    revenue += sale_item["item_total"]
+                    invoice_bytes += len(result.encode("utf-8"))
+                connection.send((True, {"completed": completed, "rejected": rejected,
+                                        "revenue": revenue, "invoice_bytes": invoice_bytes}))
+
+            elif operation == "prepare":
+                txn_id, lines = command[1], command[2]
+                # A cart may list the same product on several lines. Like Cart, merge them before
+                # working out the free units, then check the total per product
+                paid = {}
+                for name, quantity in lines:
+                    paid[name.lower()] = paid.get(name.lower(), 0) + quantity
+                ok = True
+                requested = {}
+                for key, quantity in paid.items():
+                    product = stock.get(key)
+                    if product is None:
+                        ok = False
+                        break
+                    units = quantity + build_sale_item(product, quantity)["free_quantity"]
+                    if units > product["quantity"] - holds.get(key, 0):
+                        ok = False
+                        break
+                    requested[key] = units
+                if ok:
+                    for key, units in requested.items():
+                        holds[key] = holds.get(key, 0) + units
+                    prepared[txn_id] = list(requested.items())
+                connection.send((ok, txn_id))
+
+            elif operation in ("commit", "abort"):
+                lines = prepared.pop(command[1], [])
+                for name, units in lines:
+                    holds[name.lower()] -= units
+                    if holds[name.lower()] == 0:
+                        del holds[name.lower()]
+                    if operation == "commit":
+                        stock[name.lower()]["quantity"] -= units
+                connection.send((True, command[1]))
+
+            elif operation == "snapshot":
+                connection.send((True, list(stock.values())))
+
+            elif operation == "stop":
+                connection.send((True, None))
+                connection.close()
+                return
+        except Exception as error:
+            # Report the failure instead of dying, so the coordinator is never left waiting
+            connection.send((False, f"Shard worker error: {error}"))
+
+class ShardedInventory:
+    """
+    Inventory engine that partitions products across worker processes.
+
+    Products are assigned to shards by hashing their name. Single sales and
+    restocks are routed to the owning shard, batches of orders are split by
+    shard and processed by all workers in parallel, and carts spanning several
+    shards are committed with a two-phase (prepare/commit) protocol so a cart is
+    either fully applied or not applied at all.
+
+    Example:
+        engine = ShardedInventory(products, shard_count=4)
+        engine.process_orders([("Sunscreen", 2), ("Face Mask", 1)])
+        update_product_file(engine.snapshot())
+        engine.stop()
+    """
+
+    def __init__(self, products, shard_count=None):
+        """
+        Start one worker process per shard and hand each its partition.
+
+        Args:
+            products (list): Products to distribute across the shards
+            shard_count (int, optional): Number of worker processes, defaults
+                                         to the number of CPU cores
+        """
+        self.shard_count = shard_count or multiprocessing.cpu_count()
+        self._next_txn_id = 0
+        self._connections = []
+        self._workers = []
+
+        partitions = [[] for _ in range(self.shard_count)]
+        for product in products:
+            partitions[shard_for(product["name"], self.shard_count)].append(product)
+
+        for partition in partitions:
+            parent_end, worker_end = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_shard_worker, args=(worker_end, partition), daemon=True)
+            worker.start()
+            worker_end.close()
+            self._connections.append(parent_end)
+            self._workers.append(worker)
+
+    def _receive(self, shard):
+        """
+        Wait for the reply of one shard without hanging on a dead worker.
+
+        Args:
+            shard (int): Index of the shard
+
+        Returns:
+            tuple: (ok, result) as sent by the worker
+
+        Raises:
+            RuntimeError: If the worker process exited before replying
+        """
+        connection = self._connections[shard]
+        while not connection.poll(WORKER_POLL_SECONDS):
+            if not self._workers[shard].is_alive():
+                raise RuntimeError(f"Shard worker {shard} exited with code {self._workers[shard].exitcode}")
+        try:
+            return connection.recv()
+        except EOFError:
+            raise RuntimeError(f"Shard worker {shard} closed its connection") from None
+
+    def _send(self, shard, command):
+        """Send a command to one shard, failing clearly if its worker is gone."""
+        try:
+            self._connections[shard].send(command)
+        except OSError:
+            raise RuntimeError(f"Shard worker {shard} is not running") from None
+
+    def _request(self, shard, command):
+        """Send a command to one shard and wait for its reply."""
+        self._send(shard, command)
+        return self._receive(shard)
+
+    def _broadcast(self, commands):
+        """Send one command per shard, then collect all replies in shard order."""
+        for shard, command in commands.items():
+            self._send(shard, command)
+        return {shard: self._receive(shard) for shard in commands}
+
+    def sale(self, product_name, quantity):
+        """
+        Sell a product from its owning shard.
+
+        Args:
+            product_name (str): Name of the product
+            quantity (int): Number of paid units
+
+        Returns:
+            tuple: (True, sale_item) on success or (False, error message)
+        """
+        return self._request(shard_for(product_name, self.shard_count), ("sale", product_name, quantity))
+
+    def restock(self, product_name, quantity, cost_price=None):
+        """
+        Add stock to a product on its owning shard.
+
+        Args:
+            product_name (str): Name of the product
+            quantity (int): Number of units to add
+            cost_price (float, optional): Cost price of the added units, averaged
+                                          into the product's cost price. Unchanged if None
+
+        Returns:
+            tuple: (True, updated product) on success or (False, error message)
+        """
+        return self._request(shard_for(product_name, self.shard_count),
+                             ("restock", product_name, quantity, cost_price))
+
+    def process_orders(self, orders):
+        """
+        Process a batch of single-line orders on all shards in parallel.
+
+        Args:
+            orders (list): List of (product_name, quantity) tuples
+
+        Returns:
+            dict: Totals with keys completed, rejected, revenue and invoice_bytes
+        """
+        batches = {}
+        for order in orders:
+            batches.setdefault(shard_for(order[0], self.shard_count), []).append(order)
+
+        totals = {"completed": 0, "rejected": 0, "revenue": 0.0, "invoice_bytes": 0}
+        replies = self._broadcast({shard: ("orders", batch) for shard, batch in batches.items()})
+        for ok, summary in replies.values():
+            if not ok:
+                raise RuntimeError(summary)
+            for key in totals:
+                totals[key] += summary[key]
+        return totals
+
+    def checkout(self, cart_lines):
+        """
+        Commit a cart spanning several shards atomically.
+
+        Phase one asks every involved shard to hold the units (paid plus free)
+        of each product, with repeated lines of a product merged as in Cart.
+        Only if every shard accepts are the holds committed; otherwise all
+        holds are released and no stock changes.
+
+        Args:
+            cart_lines (list): List of (product_name, quantity) tuples with paid units
+
+        Returns:
+            bool: True if the cart was committed, False if it was aborted
+        """
+        self._next_txn_id += 1
+        txn_id = self._next_txn_id
+
+        lines_by_shard = {}
+        for name, quantity in cart_lines:
+            lines_by_shard.setdefault(shard_for(name, self.shard_count), []).append((name, quantity))
+
+        votes = self._broadcast({shard: ("prepare", txn_id, lines) for shard, lines in lines_by_shard.items()})
+        decision = "commit" if all(ok for ok, _ in votes.values()) else "abort"
+        self._broadcast({shard: (decision, txn_id) for shard in lines_by_shard})
+        return decision == "commit"
+
+    def snapshot(self):
+        """
+        Collect the current products from every shard.
+
+        Returns:
+            list: All products ordered by ID, ready for update_product_file
+        """
+        replies = self._broadcast({shard: ("snapshot",) for shard in range(self.shard_count)})
+        for ok, result in replies.values():
+            if not ok:
+                raise RuntimeError(result)
+        products = [product for _, partition in replies.values() for product in partition]
+        products.sort(key=lambda product: product.get("id", 0))
+        return products
+
+    def stop(self):
+        """
+        Stop all worker processes.
+
+        Returns:
+            None
+        """
+        self._broadcast({shard: ("stop",) for shard in range(self.shard_count) if self._workers[shard].is_alive()})
+        for worker in self._workers:
+            worker.join()
+        for connection in self._connections:
+            connection.close()
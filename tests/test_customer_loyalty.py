@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+from src.customer_manager import get_loyalty_discount_rate, get_purchase_history, record_customer_sale
+from src.history_manager import record_transaction
+from src.product_manager import load_products, update_product_file
+from src.returns_manager import reverse_transaction
+
+class ReversedSaleLoyaltyTest(unittest.TestCase):
+    def setUp(self):
+        self.previous_dir = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+        os.makedirs("data")
+        self.file_path = os.path.join(self.temp_dir.name, "data", "products.txt")
+        update_product_file([{"id": 1, "name": "Sunscreen", "brand": "WeCare", "quantity": 100,
+                              "cost_price": 100.0, "country": "Nepal"}], self.file_path)
+        self.products = load_products(self.file_path)
+        self.customer = {"id": "C0001", "name": "Asha"}
+        self.txn_ids = [self.sell(2) for _ in range(3)]
+
+    def tearDown(self):
+        os.chdir(self.previous_dir)
+        self.temp_dir.cleanup()
+
+    def sell(self, units):
+        self.products[0]["quantity"] -= units
+        txn_id = record_transaction("sale", [{"name": "Sunscreen", "quantity_delta": -units}], self.products,
+                                    self.file_path, reference="invoice.txt", customer=self.customer["id"])
+        record_customer_sale(self.customer["id"], "2026-10-19", txn_id, 300.0 * units, "invoice.txt")
+        return txn_id
+
+    def test_voided_sale_does_not_count_toward_loyalty(self):
+        self.assertEqual(get_loyalty_discount_rate(self.customer), (0.02, "Bronze"))
+        reversal_id = reverse_transaction(self.products, self.txn_ids[0], self.file_path)
+        self.assertEqual(get_loyalty_discount_rate(self.customer), (0, None))
+        self.assertEqual(get_purchase_history(self.customer["id"])[0]["reversed"], reversal_id)
+
+    def test_only_a_full_return_reverses_the_sale(self):
+        reverse_transaction(self.products, self.txn_ids[1], self.file_path, {"Sunscreen": 1})
+        self.assertEqual(get_loyalty_discount_rate(self.customer), (0.02, "Bronze"))
+        reverse_transaction(self.products, self.txn_ids[1], self.file_path, {"Sunscreen": 1})
+        self.assertEqual(get_loyalty_discount_rate(self.customer), (0, None))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+import unittest
+from src.data_paths import get_location_file
+from src.location_manager import (AVAILABILITY_INDEX_FILE, create_location, get_availability,
+                                  load_availability_index)
+from src.product_manager import update_product_file
+
+def product(name, quantity):
+    return {"name": name, "brand": "WeCare", "quantity": quantity, "cost_price": 100.0, "country": "Nepal"}
+
+class AvailabilityIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.previous_dir = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+        update_product_file([product("Sunscreen", 5), product("Face Mask", 2)], get_location_file("main"))
+        create_location("warehouse")
+        update_product_file([product("sunscreen", 7)], get_location_file("warehouse"))
+
+    def tearDown(self):
+        os.chdir(self.previous_dir)
+        self.temp_dir.cleanup()
+
+    def test_lookup_ignores_case(self):
+        self.assertEqual(get_availability("SUNSCREEN"), {"main": 5, "warehouse": 7})
+        self.assertEqual(get_availability("face mask"), {"main": 2})
+        self.assertEqual(get_availability("Toner"), {})
+
+    def test_changed_shard_replaces_its_stock(self):
+        load_availability_index()
+        file_path = get_location_file("warehouse")
+        update_product_file([product("Toner", 3)], file_path)
+        stat = os.stat(file_path)
+        os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        index = load_availability_index()
+        self.assertEqual(get_availability("Sunscreen", index), {"main": 5})
+        self.assertEqual(get_availability("toner", index), {"warehouse": 3})
+
+    def test_removed_shard_is_dropped(self):
+        load_availability_index()
+        os.remove(get_location_file("warehouse"))
+        self.assertEqual(get_availability("Sunscreen"), {"main": 5})
+
+    def test_index_without_product_map_is_rebuilt(self):
+        with open(AVAILABILITY_INDEX_FILE, "w") as file:
+            json.dump({"main": {"mtime": 0, "stock": {"Sunscreen": 1}}}, file)
+        self.assertEqual(get_availability("Sunscreen"), {"main": 5, "warehouse": 7})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import csv
+import os
+import tempfile
+import unittest
+from src.product_manager import (FILE_SIGNATURE, RECORD_WIDTH, get_rejected_rows_file, load_products, mark_dirty,
+                                 save_product_changes, update_product_file)
+
+def product(name, brand="WeCare", quantity=5, cost_price=100.0, country="Nepal"):
+    return {"name": name, "brand": brand, "quantity": quantity, "cost_price": cost_price, "country": country}
+
+def without_ids(products):
+    return [{key: value for key, value in product.items() if key != "id"} for product in products]
+
+class ProductFileTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "products.txt")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_text(self, text):
+        with open(self.file_path, "w", encoding="utf-8") as file:
+            file.write(text)
+
+    def test_names_with_commas_quotes_and_line_breaks_round_trip(self):
+        products = [product("Cream, Night"), product('Toner "Rose"', brand="Lotus, Herbal"),
+                    product("Serum\nTravel size", country='Korea, "South"'), product("Sunscreen")]
+        update_product_file(products, self.file_path)
+
+        self.assertEqual(without_ids(load_products(self.file_path)), without_ids(products))
+        self.assertEqual(os.path.getsize(self.file_path), (len(products) + 1) * RECORD_WIDTH)
+
+    def test_changed_quoted_row_is_saved_in_place(self):
+        update_product_file([product("Sunscreen"), product("Face Mask")], self.file_path)
+        products = load_products(self.file_path)
+        products[1]["name"] = 'Face Mask, "Clay"'
+        mark_dirty(products[1], products)
+        save_product_changes(products, self.file_path)
+
+        self.assertEqual(os.path.getsize(self.file_path), 3 * RECORD_WIDTH)
+        self.assertEqual(load_products(self.file_path)[1]["name"], 'Face Mask, "Clay"')
+
+    def test_long_row_is_saved_without_padding(self):
+        products = [product("Sunscreen"), product(" ".join(["Face Mask"] * 15))]
+        update_product_file(products, self.file_path)
+
+        self.assertNotEqual(os.path.getsize(self.file_path), 3 * RECORD_WIDTH)
+        self.assertEqual(without_ids(load_products(self.file_path)), without_ids(products))
+
+    def test_legacy_file_is_upgraded_and_backed_up(self):
+        legacy_text = "Sunscreen,WeCare,5,100.0,Nepal\nFace Mask,Lotus,2,80.5,India\n"
+        self.write_text(legacy_text)
+
+        products = load_products(self.file_path)
+
+        self.assertEqual([p["name"] for p in products], ["Sunscreen", "Face Mask"])
+        with open(self.file_path + ".v1.bak", encoding="utf-8") as file:
+            self.assertEqual(file.read(), legacy_text)
+        with open(self.file_path, encoding="utf-8") as file:
+            self.assertTrue(file.readline().startswith(FILE_SIGNATURE))
+        self.assertEqual(without_ids(load_products(self.file_path)), without_ids(products))
+
+    def test_rejected_rows_are_kept_once(self):
+        self.write_text("Sunscreen,WeCare,5,100.0,Nepal\nFace Mask,Lotus,many,80.5,India\nBroken row\n")
+
+        self.assertEqual(len(load_products(self.file_path)), 1)
+        # The upgrade dropped the rows, loading them again must not copy them twice
+        self.write_text("Sunscreen,WeCare,5,100.0,Nepal\nFace Mask,Lotus,many,80.5,India\nBroken row\n")
+        load_products(self.file_path)
+
+        with open(get_rejected_rows_file(self.file_path), newline="", encoding="utf-8") as file:
+            rows = list(csv.reader(file))
+        self.assertEqual(rows, [["line 2", "Face Mask", "Lotus", "many", "80.5", "India"],
+                                ["line 3", "Broken row"]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from src.product_manager import load_products, update_product_file
+from src.purchase_order_manager import get_line_state, get_order_book, receive_purchase_order
+from src.returns_manager import reverse_transaction
+
+class DuplicateOrderLineTest(unittest.TestCase):
+    def setUp(self):
+        self.previous_dir = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+        os.makedirs("data")
+        self.file_path = os.path.join(self.temp_dir.name, "data", "products.txt")
+        update_product_file([{"id": 1, "name": "Sunscreen", "brand": "WeCare", "quantity": 10,
+                              "cost_price": 100.0, "country": "Nepal"}], self.file_path)
+        self.products = load_products(self.file_path)
+        self.order_book = get_order_book(self.file_path)
+        self.po_id = self.order_book.create_order("Acme", [("Sunscreen", 4, 90.0), ("sunscreen", 6, 110.0)])
+
+    def tearDown(self):
+        os.chdir(self.previous_dir)
+        self.temp_dir.cleanup()
+
+    def test_repeated_product_is_merged_into_one_line(self):
+        lines = self.order_book.orders[self.po_id]["lines"]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["ordered"], 10)
+        self.assertEqual(lines[0]["cost_price"], 102.0)
+        self.assertEqual(self.order_book.incoming("Sunscreen"), (10, 0))
+
+    def test_partial_receipt_void_and_available_to_promise(self):
+        txn_id = receive_purchase_order(self.products, self.po_id, {"Sunscreen": (7, None)}, self.file_path)
+        self.assertIsNotNone(txn_id)
+        line = self.order_book.find_line(self.po_id, "Sunscreen")
+        self.assertEqual(get_line_state(line), (3, 0, 7))
+        self.assertEqual(self.products[0]["quantity"], 17)
+        promise = self.order_book.available_to_promise(self.products[0])
+        self.assertEqual((promise["now"], promise["in_transit"], promise["on_order"], promise["total"]),
+                         (17, 0, 3, 20))
+
+        self.assertIsNotNone(reverse_transaction(self.products, txn_id, self.file_path))
+        self.assertEqual(get_line_state(line), (3, 7, 0))
+        self.assertEqual(self.products[0]["quantity"], 10)
+        promise = self.order_book.available_to_promise(self.products[0])
+        self.assertEqual((promise["now"], promise["in_transit"], promise["on_order"], promise["total"]),
+                         (10, 7, 3, 20))
+
+        self.assertIsNotNone(receive_purchase_order(self.products, self.po_id, {"Sunscreen": (10, None)},
+                                                    self.file_path))
+        self.assertEqual(self.order_book.incoming("Sunscreen"), (0, 0))
+        self.assertEqual(self.order_book.get_status(self.po_id), "received")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from src.history_manager import record_transaction
+from src.lot_manager import get_lot_book
+from src.product_manager import load_products, update_product_file, weighted_average_cost
+from src.returns_manager import reverse_transaction
+
+class VoidRepeatedRestockTest(unittest.TestCase):
+    def setUp(self):
+        self.previous_dir = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+        os.makedirs("data")
+        self.file_path = os.path.join(self.temp_dir.name, "data", "products.txt")
+        update_product_file([{"id": 1, "name": "Sun", "brand": "WeCare", "quantity": 10,
+                              "cost_price": 100.0, "country": "Nepal"}], self.file_path)
+        self.products = load_products(self.file_path)
+        self.lot_book = get_lot_book(self.file_path)
+
+    def tearDown(self):
+        os.chdir(self.previous_dir)
+        self.temp_dir.cleanup()
+
+    def restock_line(self, quantity, cost_price):
+        product = self.products[0]
+        old_cost_price = product["cost_price"]
+        product["cost_price"] = weighted_average_cost(product, quantity, cost_price)
+        product["quantity"] += quantity
+        return {"name": "Sun", "quantity_delta": quantity, "cost_price": product["cost_price"],
+                "old_cost_price": old_cost_price, "lot": self.lot_book.add_lot("Sun", quantity, cost_price)}
+
+    def test_void_undoes_each_line_of_a_product(self):
+        lines = [self.restock_line(10, 200.0), self.restock_line(20, 50.0)]
+        txn_id = record_transaction("restock", lines, self.products, self.file_path)
+
+        self.assertIsNotNone(reverse_transaction(self.products, txn_id, self.file_path))
+        self.assertEqual(self.products[0]["quantity"], 10)
+        self.assertEqual(self.products[0]["cost_price"], 100.0)
+        self.assertEqual(self.lot_book.lots[lines[0]["lot"]]["quantity"], 0)
+        self.assertEqual(self.lot_book.lots[lines[1]["lot"]]["quantity"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from src.shard_engine import ShardedInventory
+
+def make_product(name, quantity):
+    return {"id": 1, "name": name, "brand": "WeCare", "quantity": quantity,
+            "cost_price": 100.0, "country": "Nepal"}
+
+class CheckoutTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = ShardedInventory([make_product("A", 6)], shard_count=1)
+
+    def tearDown(self):
+        self.engine.stop()
+
+    def test_repeated_product_is_checked_against_total_units(self):
+        self.assertFalse(self.engine.checkout([("A", 3), ("A", 3)]))
+        self.assertEqual(self.engine.snapshot()[0]["quantity"], 6)
+
+    def test_repeated_product_within_stock_is_committed(self):
+        # Merged into 4 paid units, which earn 1 free unit
+        self.assertTrue(self.engine.checkout([("A", 2), ("A", 2)]))
+        self.assertEqual(self.engine.snapshot()[0]["quantity"], 1)
+
+class RestockTest(unittest.TestCase):
+    def test_restock_averages_the_cost_price(self):
+        engine = ShardedInventory([make_product("A", 6)], shard_count=1)
+        try:
+            ok, product = engine.restock("A", 2, 140.0)
+        finally:
+            engine.stop()
+        self.assertTrue(ok)
+        self.assertEqual(product["quantity"], 8)
+        self.assertEqual(product["cost_price"], 110.0)
+
+class WorkerFailureTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = ShardedInventory([make_product("A", 6)], shard_count=1)
+
+    def tearDown(self):
+        self.engine.stop()
+
+    def test_error_in_worker_is_reported_and_worker_keeps_running(self):
+        ok, message = self.engine.sale("A", "two")
+        self.assertFalse(ok)
+        self.assertIn("Shard worker error", message)
+        self.assertTrue(self.engine.sale("A", 1)[0])
+
+    def test_dead_worker_raises_instead_of_blocking(self):
+        self.engine._workers[0].terminate()
+        self.engine._workers[0].join()
+        with self.assertRaises(RuntimeError):
+            self.engine.sale("A", 1)
+
+if __name__ == "__main__":
+    unittest.main()